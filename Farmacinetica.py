@@ -1,460 +1,747 @@
+import gc
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from scipy.integrate import odeint
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.collections import LineCollection
-from matplotlib.colors import Normalize
-import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.animation as animation
-
-# Funciones farmacocinéticas
-def funcion_f(C, t, D, V, params, medicamento):
-    if medicamento == "Ibuprofeno":
-        return (params['k_a'] * D / V) * (1 / (1 + 0.1 * params['masa'] / 70 + 0.1 * (1 if params['genero'] == "Hombre" else 0)))
-    elif medicamento == "Paracetamol":
-        return params['k_a'] * D ** 0.75 / V
-    elif medicamento == "Aspirina":
-        return params['k_a'] * (D / V) * np.exp(-0.05 * t)
-    elif medicamento == "Amoxicilina":
-        return params['k_a'] * D / V * (1 + 0.02 * params['edad'])
-    elif medicamento == "Metformina":
-        return params['k_a'] * D / V
-    elif medicamento == "Loratadina":
-        return params['k_a'] * D / V * np.exp(-0.03 * t)
-    else:
-        return 0
-
-def funcion_g(D, t, params, medicamento):
-    if medicamento == "Ibuprofeno":
-        return D / (t + 1) * (1 + 0.05 * params['edad'] / 50)
-    elif medicamento == "Paracetamol":
-        return np.log(D + 1) * (1 + 0.1 * params['genetica_factor'])
-    elif medicamento == "Aspirina":
-        return np.sqrt(D)
-    elif medicamento == "Amoxicilina":
-        return D / (params['V_d'] * (1 + 0.1 * params['genetica_factor']))
-    elif medicamento == "Metformina":
-        return D * np.exp(-params['k_e'] * t)
-    elif medicamento == "Loratadina":
-        return D / (t + 1) * (1 + 0.05 * params['alergia_factor'])
+from farmacocinetica import (lista_medicamentos, lista_generos, lista_comorbilidades, lista_genetica,
+                             lista_alergia, construir_parametros, calcular_intervalo_dosificacion,
+                             CacheSimulaciones, BarridoDosisUnica, calcular_metricas, optimizar_regimen)
+from segundo_plano import INTERVALO_REVISION_MS, ejecutar_en_segundo_plano, figuras_vivas, memoria_proceso_mb
+
+# Esta interfaz admite intervalos de hasta 48 horas
+INTERVALO_MAXIMO = 48
+
+# Repetir la simulación de un mismo paciente (p. ej. volver a abrir una ventana)
+# no vuelve a integrar el modelo
+cache = CacheSimulaciones(max_entradas=32)
+
+# --- Animación y exportación ---
+# Las animaciones recorren un subconjunto de los puntos de la solución (500 en
+# dosis única, 750 en dosis múltiples): en pantalla hasta CUADROS_PANTALLA y en
+# el archivo hasta CUADROS_EXPORTACION repartidos en DURACION_EXPORTACION
+# segundos. La exportación dibuja en una figura Agg propia dentro de un hilo
+# aparte, así que la ventana de Tk sigue respondiendo mientras se guarda.
+CUADROS_PANTALLA = 250
+CUADROS_EXPORTACION = 120
+DURACION_EXPORTACION = 6  # segundos
+DPI_EXPORTACION = 72
+FORMATOS_ANIMACION = [("GIF", "*.gif"), ("APNG", "*.png"), ("MP4 (ffmpeg)", "*.mp4")]
+exportaciones = ThreadPoolExecutor(max_workers=1)
+
+def indices_cuadros(n_puntos, max_cuadros):
+    """Índices crecientes de hasta `max_cuadros` puntos, del primero al último."""
+    n = min(n_puntos, max_cuadros)
+    return np.unique(np.linspace(0, n_puntos - 1, n).round().astype(int))
+
+class FiguraDosisUnica:
+    """Gráficos de la simulación de dosis única sobre una Figure.
+
+    Los artistas se crean una sola vez; `actualizar` cambia datos, límites y
+    título en su lugar, así que la misma figura sirve para todas las corridas.
+    """
+    figsize = (12, 6)
+    nombre_animacion = "farmacocinetica.gif"
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.ax1 = fig.add_subplot(1, 2, 1)
+        self.line1, = self.ax1.plot([], [], 'b-', label='Concentración (C)')
+        self.line2, = self.ax1.plot([], [], 'r-', label='Tracto digestivo (D)')
+        self.line3, = self.ax1.plot([], [], 'g-', label='Volumen (V)')
+        self.ax1.set_xlabel('Tiempo (horas)')
+        self.ax1.set_ylabel('Concentración / Cantidad')
+        self.ax1.set_title('Evolución Temporal (Dosis Única)')
+        self.ax1.legend()
+        self.ax1.grid(True)
+
+        self.ax2 = fig.add_subplot(1, 2, 2)
+        self.orbit_line, = self.ax2.plot([], [], 'b-', alpha=0.7)
+        self.current_point, = self.ax2.plot([], [], 'ro')
+        self.ax2.set_xlabel('Concentración (C)')
+        self.ax2.set_ylabel('Volumen (V)')
+        self.ax2.set_title('Trayectoria en Espacio de Fases')
+        self.ax2.grid(True)
+
+    @property
+    def animados(self):
+        return self.line1, self.line2, self.line3, self.orbit_line, self.current_point
+
+    def actualizar(self, t, sol, medicamento):
+        self.t, self.sol = t, sol
+        self.fig.suptitle(f"Simulación Farmacocinética - {medicamento}", fontsize=14)
+        self.ax1.set_xlim(0, 24)
+        self.ax1.set_ylim(0, max(np.max(sol[:,0]), np.max(sol[:,1]), np.max(sol[:,2])) * 1.1)
+        self.ax2.set_xlim(np.min(sol[:,0]) * 1.1, np.max(sol[:,0]) * 1.1)
+        self.ax2.set_ylim(np.min(sol[:,2]) * 1.1, np.max(sol[:,2]) * 1.1)
+        return self
+
+    def init(self):
+        for linea in self.animados:
+            linea.set_data([], [])
+        return self.animados
+
+    def animate(self, i):
+        t, sol = self.t, self.sol
+        self.line1.set_data(t[:i+1], sol[:i+1, 0])
+        self.line2.set_data(t[:i+1], sol[:i+1, 1])
+        self.line3.set_data(t[:i+1], sol[:i+1, 2])
+        self.orbit_line.set_data(sol[:i+1, 0], sol[:i+1, 2])
+        self.current_point.set_data([sol[i, 0]], [sol[i, 2]])
+        return self.animados
+
+class FiguraDosisMultiples:
+    """Gráficos de la simulación de dosis múltiples sobre una Figure.
+
+    Como en `FiguraDosisUnica`, `actualizar` reutiliza los artistas; sólo se
+    vuelven a crear las curvas por ciclo si cambia el número de dosis. La
+    órbita se reparte en una LineCollection por ciclo y cada cuadro sólo
+    cambia los segmentos de las colecciones cuyo número de segmentos visibles
+    varía (normalmente una), en lugar de volver a pasar a `set_segments` toda
+    la órbita hasta el punto actual.
+    """
+    figsize = (13, 6)
+    nombre_animacion = "orbita_periodica.gif"
+
+    def __init__(self, fig):
+        from matplotlib import cm
+        from matplotlib.colors import Normalize
+
+        self.fig = fig
+        self.ax1 = fig.add_subplot(1, 2, 1)
+        self.ax1.set_xlabel('Tiempo (horas)')
+        self.ax1.set_ylabel('Concentración (C)')
+        self.ax1.set_title('Evolución con Dosis Múltiples')
+        self.ax1.grid(True)
+
+        self.ax2 = fig.add_subplot(1, 2, 2)
+        self.current_point, = self.ax2.plot([], [], 'ro', markersize=8)
+        self.ax2.set_xlabel('Concentración (C)')
+        self.ax2.set_ylabel('Volumen (V)')
+        self.ax2.set_title('Órbitas Periódicas (Evolución Temporal)')
+        self.ax2.grid(True)
+
+        self.tiempo = cm.ScalarMappable(norm=Normalize(0, 1), cmap=cm.plasma)
+        cbar = fig.colorbar(self.tiempo, ax=self.ax2)
+        cbar.set_label('Tiempo (horas)')
+
+        self.curvas, self.marcas, self.colecciones = [], [], []
+
+    @property
+    def animados(self):
+        return (*self.colecciones, self.current_point)
+
+    def _preparar_ciclos(self, num_dosis):
+        from matplotlib import cm
+        from matplotlib.collections import LineCollection
+
+        if len(self.curvas) == num_dosis:
+            return
+        for artista in self.curvas + self.marcas + self.colecciones:
+            artista.remove()
+        colors = cm.viridis(np.linspace(0, 1, num_dosis))
+        self.curvas = [self.ax1.plot([], [], color=colors[i], label=f'Dosis {i+1}' if i < 5 else None)[0]
+                       for i in range(num_dosis)]
+        self.marcas = [self.ax1.axvline(x=0, color='r', linestyle='--', alpha=0.3) for _ in range(num_dosis)]
+        self.colecciones = [LineCollection([], cmap=self.tiempo.get_cmap(), norm=self.tiempo.norm,
+                                           alpha=0.8, linewidth=2) for _ in range(num_dosis)]
+        for lc in self.colecciones:
+            self.ax2.add_collection(lc)
+        self.ax1.legend()
+
+    def actualizar(self, t, sol, intervalo, num_dosis, puntos_por_ciclo, medicamento):
+        self.t, self.sol = t, sol
+        self._preparar_ciclos(num_dosis)
+        self.fig.suptitle(f"Dosis Múltiples - {medicamento} (Cada {intervalo:.1f} horas)", fontsize=14)
+
+        for i, (curva, marca) in enumerate(zip(self.curvas, self.marcas)):
+            start = i * puntos_por_ciclo
+            end = (i+1) * puntos_por_ciclo
+            curva.set_data(t[start:end], sol[start:end, 0])
+            marca.set_xdata([i*intervalo, i*intervalo])
+        self.ax1.set_xlim(0, t[-1])
+        self.ax1.set_ylim(0, np.max(sol[:,0]) * 1.1)
+
+        # Tramo k: segmentos [k * puntos_por_ciclo, (k+1) * puntos_por_ciclo)
+        points = np.array([sol[:,0], sol[:,2]]).T.reshape(-1, 1, 2)
+        segments = np.concatenate([points[:-1], points[1:]], axis=1)
+        self.limites = [k * puntos_por_ciclo for k in range(num_dosis)] + [len(segments)]
+        self.tramos = [(segments[a:b], t[a:b]) for a, b in zip(self.limites[:-1], self.limites[1:])]
+        self.visibles = [None] * num_dosis
+        self.mostrar(len(segments))
+        self.tiempo.set_clim(0, t[-1])
+
+        self.ax2.set_xlim(np.min(sol[:,0]) * 0.9, np.max(sol[:,0]) * 1.1)
+        self.ax2.set_ylim(np.min(sol[:,2]) * 0.9, np.max(sol[:,2]) * 1.1)
+        return self
+
+    def mostrar(self, n):
+        # Deja visibles los n primeros segmentos de la órbita
+        for k, (lc, (segs, ts)) in enumerate(zip(self.colecciones, self.tramos)):
+            m = min(max(n - self.limites[k], 0), len(segs))
+            if m != self.visibles[k]:
+                lc.set_segments(segs[:m])
+                lc.set_array(ts[:m])
+                self.visibles[k] = m
+
+    def init(self):
+        self.mostrar(0)
+        self.current_point.set_data([], [])
+        return self.animados
+
+    def animate(self, i):
+        self.mostrar(i)
+        self.current_point.set_data([self.sol[i, 0]], [self.sol[i, 2]])
+        return self.animados
+
+def exportar_animacion(construir, cuadros, ruta, figsize, duracion=DURACION_EXPORTACION, dpi=DPI_EXPORTACION):
+    """Guarda en `ruta` la animación de la figura que devuelve `construir(fig)`, con los índices `cuadros`.
+
+    Pensada para ejecutarse fuera del hilo de Tk: dibuja en una Figure con
+    lienzo Agg propia, no en la de la ventana. El formato sale de la
+    extensión: .gif y .png (APNG) con Pillow, .mp4 con ffmpeg.
+    """
+    from matplotlib import animation
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fps = max(1, round(len(cuadros) / duracion))
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.mp4':
+        if not animation.writers.is_available('ffmpeg'):
+            raise RuntimeError("ffmpeg no está instalado; guarde la animación como GIF o APNG")
+        writer = animation.FFMpegWriter(fps=fps)
+    elif extension in ('.gif', '.png'):
+        writer = animation.PillowWriter(fps=fps)
     else:
-        return 0
-
-def ecuaciones(y, t, params, medicamento):
-    C, D, V = y
-    f = funcion_f(C, t, D, V, params, medicamento)
-    g = funcion_g(D, t, params, medicamento)
-    
-    k_e = params['k_e']
-    
-    if params['comorbilidad'] == "Insuficiencia renal":
-        if medicamento in ["Metformina", "Amoxicilina"]:
-            k_e *= 0.5
-    
-    if params['comorbilidad'] == "Insuficiencia hepática":
-        if medicamento in ["Paracetamol", "Ibuprofeno"]:
-            k_e *= 0.7
-    
-    dC_dt = f - k_e * C
-    dD_dt = -params['k_a'] * g
-    dV_dt = params['k_a'] * D - k_e * V
-    return [dC_dt, dD_dt, dV_dt]
-
-def calcular_intervalo_dosificacion(params, medicamento):
-    intervalos_base = {
-        "Ibuprofeno": 6,
-        "Paracetamol": 6,
-        "Aspirina": 6,
-        "Amoxicilina": 8,
-        "Metformina": 12,
-        "Loratadina": 24
-    }
-    
-    intervalo = intervalos_base.get(medicamento, 8)
-
-    if params['comorbilidad'] == "Insuficiencia renal":
-        if medicamento in ["Metformina", "Amoxicilina"]:
-            intervalo *= 1.5
-
-    if params['comorbilidad'] == "Insuficiencia hepática":
-        if medicamento in ["Paracetamol", "Ibuprofeno"]:
-            intervalo *= 1.3
-
-    if params['genetica'] == "Metabolizador rápido":
-        intervalo *= 0.9
-    elif params['genetica'] == "Metabolizador lento":
-        intervalo *= 1.1
-
-    if params['masa'] > 90:
-        intervalo *= 0.95
-    elif params['masa'] < 50:
-        intervalo *= 1.05
-
-    if medicamento == "Loratadina":
-        if params['alergia'] == "Alergia leve":
-            intervalo *= 1.1
-        elif params['alergia'] == "Alergia moderada":
-            intervalo *= 1.2
-        elif params['alergia'] == "Alergia severa":
-            intervalo *= 1.3
-
-    intervalo = max(4, min(intervalo, 48))  # Extendí el máximo a 48 horas
-    
-    return intervalo
+        raise ValueError(f"Formato de animación no admitido: {extension or ruta}")
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    figura = construir(fig)
+    figura.init()
+    with writer.saving(fig, ruta, dpi):
+        for i in cuadros:
+            figura.animate(i)
+            writer.grab_frame()
+    return ruta
+
+# --- Ventanas de resultados ---
+class VistaResultados:
+    """Ventana de resultados que se reutiliza entre corridas.
+
+    Hay una sola Figure (de matplotlib.figure, fuera del gestor global de
+    pyplot) y un solo lienzo por tipo de simulación; cada corrida actualiza los
+    artistas de `clase_figura` en su lugar. La animación es un bucle propio con
+    `after` que restaura un fondo capturado en cada dibujo completo y sólo
+    vuelve a dibujar los artistas animados. Al cerrar la ventana se liberan la
+    figura y el lienzo.
+    """
+
+    def __init__(self, titulo, geometria, clase_figura):
+        self.titulo = titulo
+        self.geometria = geometria
+        self.clase_figura = clase_figura
+        self.ventana = None
+
+    def _crear(self):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.ventana = tk.Toplevel(root)
+        self.ventana.geometry(self.geometria)
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.fig = Figure(figsize=self.clase_figura.figsize, dpi=100)
+        figuras_vivas.add(self.fig)
+        self.figura = self.clase_figura(self.fig)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.ventana)
+        self.canvas.mpl_connect('draw_event', self._capturar_fondo)
+        self.boton_guardar = ttk.Button(self.ventana, text="Guardar Animación", command=self.guardar_animacion)
+        self.boton_guardar.pack(side=tk.BOTTOM, pady=10)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+        self._fondo = None
+        self._siguiente = None
+
+    def _capturar_fondo(self, evento):
+        # Un dibujo completo omite los artistas animados: el lienzo queda como fondo
+        self._fondo = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _detener(self):
+        if self._siguiente is not None:
+            self.ventana.after_cancel(self._siguiente)
+            self._siguiente = None
+
+    def mostrar(self, *datos):
+        """Actualiza la figura con `clase_figura.actualizar(*datos)` y reinicia la animación."""
+        if self.ventana is None:
+            self._crear()
+        self._detener()
+        self.ventana.title(self.titulo)
+        self.datos = datos
+        self.figura.actualizar(*datos)
+        for artista in self.figura.animados:
+            artista.set_animated(True)
+        self.figura.init()
+        self.canvas.draw()
+        self.ventana.deiconify()
+        self.ventana.lift()
+
+        # La animación completa dura lo mismo que con un cuadro por punto cada 20 ms
+        n_puntos = len(self.figura.t)
+        self.cuadros = indices_cuadros(n_puntos, CUADROS_PANTALLA)
+        self.intervalo_cuadro = 20 * n_puntos // len(self.cuadros)
+        self._cuadro(0)
+
+    def _cuadro(self, k):
+        if k == len(self.cuadros):
+            k = 0
+        if self._fondo is not None:
+            self.canvas.restore_region(self._fondo)
+            for artista in self.figura.animate(self.cuadros[k]):
+                self.fig.draw_artist(artista)
+            self.canvas.blit(self.fig.bbox)
+        self._siguiente = self.ventana.after(self.intervalo_cuadro, self._cuadro, k + 1)
+
+    def cerrar(self):
+        self._detener()
+        self.ventana.destroy()
+        self.ventana = self.fig = self.figura = self.canvas = self._fondo = None
+        gc.collect()
+        actualizar_recursos()
+
+    def guardar_animacion(self):
+        ruta = filedialog.asksaveasfilename(parent=self.ventana, initialfile=self.clase_figura.nombre_animacion,
+                                            defaultextension='.gif', filetypes=FORMATOS_ANIMACION)
+        if not ruta:
+            return
+        clase_figura, datos = self.clase_figura, self.datos
+        construir = lambda fig: clase_figura(fig).actualizar(*datos)
+        cuadros = indices_cuadros(len(self.figura.t), CUADROS_EXPORTACION)
+        self.boton_guardar.config(state=tk.DISABLED, text="Guardando...")
+        self._esperar(exportaciones.submit(exportar_animacion, construir, cuadros, ruta, clase_figura.figsize))
+
+    def _esperar(self, futuro):
+        if not futuro.done():
+            root.after(100, self._esperar, futuro)
+            return
+        if self.ventana is not None:
+            self.boton_guardar.config(state=tk.NORMAL, text="Guardar Animación")
+        try:
+            messagebox.showinfo("Guardado", f"Animación guardada como {futuro.result()}")
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo guardar: {str(e)}")
 
-def ejecutar_simulacion():
+def actualizar_recursos():
+    memoria = memoria_proceso_mb()
+    texto_memoria = f"{memoria:.0f} MB" if memoria is not None else "n/d"
+    label_recursos.config(text=f"Figuras abiertas: {len(figuras_vivas)} | Memoria: {texto_memoria} | "
+                               f"Caché: {cache.estadisticas()['entradas']} simulaciones")
+
+def leer_paciente():
     try:
         masa = float(entry_masa.get())
         altura = float(entry_altura.get())
         edad = int(entry_edad.get())
     except ValueError:
         label_intervalo.config(text="Por favor, ingrese valores numéricos válidos.")
-        return
+        return None
+
+    return construir_parametros(masa, altura, edad, genero_var.get(), comorbilidad_var.get(),
+                                genetica_var.get(), alergia_var.get())
 
-    genero = genero_var.get()
-    comorbilidad = comorbilidad_var.get()
-    genetica = genetica_var.get()
-    alergia = alergia_var.get()
+def ejecutar_simulacion():
+    params = leer_paciente()
+    if params is None:
+        return
     medicamento = medicamento_var.get()
 
-    imc = masa / (altura ** 2)
-
-    genetica_factor = 0.0
-    if genetica == "Metabolizador rápido":
-        genetica_factor = 0.2
-    elif genetica == "Metabolizador lento":
-        genetica_factor = -0.2
-
-    alergia_factor = 0.0
-    if alergia == "Alergia leve":
-        alergia_factor = 0.1
-    elif alergia == "Alergia moderada":
-        alergia_factor = 0.2
-    elif alergia == "Alergia severa":
-        alergia_factor = 0.3
-
-    params = {
-        'masa': masa,
-        'altura': altura,
-        'imc': imc,
-        'edad': edad,
-        'genero': genero,
-        'comorbilidad': comorbilidad,
-        'genetica': genetica,
-        'genetica_factor': genetica_factor,
-        'alergia': alergia,
-        'alergia_factor': alergia_factor,
-        'V_d': 0.6 * masa,
-        'k_a': 0.5 * (1 + 0.01 * imc),
-        'k_e': 0.3 * (1 - 0.01 * imc)
-    }
-
-    y0 = [0, 100, params['V_d']]
-    t = np.linspace(0, 24, 500)
-    sol = odeint(ecuaciones, y0, t, args=(params, medicamento))
-
-    intervalo_dosificacion = calcular_intervalo_dosificacion(params, medicamento)
-    label_intervalo.config(text=f"Intervalo de dosificación recomendado: cada {intervalo_dosificacion:.1f} horas")
-
-    graph_window = tk.Toplevel(root)
-    graph_window.title(f"Resultados - {medicamento}")
-    graph_window.geometry("1200x700")
-
-    fig = plt.figure(figsize=(12, 6), dpi=100)
-    fig.suptitle(f"Simulación Farmacocinética - {medicamento}", fontsize=14)
-
-    ax1 = fig.add_subplot(1, 2, 1)
-    line1, = ax1.plot([], [], 'b-', label='Concentración (C)')
-    line2, = ax1.plot([], [], 'r-', label='Tracto digestivo (D)')
-    line3, = ax1.plot([], [], 'g-', label='Volumen (V)')
-    ax1.set_xlim(0, 24)
-    ax1.set_ylim(0, max(np.max(sol[:,0]), np.max(sol[:,1]), np.max(sol[:,2])) * 1.1)
-    ax1.set_xlabel('Tiempo (horas)')
-    ax1.set_ylabel('Concentración / Cantidad')
-    ax1.set_title('Evolución Temporal (Dosis Única)')
-    ax1.legend()
-    ax1.grid(True)
-
-    ax2 = fig.add_subplot(1, 2, 2)
-    orbit_line, = ax2.plot([], [], 'b-', alpha=0.7)
-    current_point, = ax2.plot([], [], 'ro')
-    ax2.set_xlim(np.min(sol[:,0]) * 1.1, np.max(sol[:,0]) * 1.1)
-    ax2.set_ylim(np.min(sol[:,2]) * 1.1, np.max(sol[:,2]) * 1.1)
-    ax2.set_xlabel('Concentración (C)')
-    ax2.set_ylabel('Volumen (V)')
-    ax2.set_title('Trayectoria en Espacio de Fases')
-    ax2.grid(True)
-
-    canvas = FigureCanvasTkAgg(fig, master=graph_window)
-    canvas.draw()
-    canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-
-    def init():
-        line1.set_data([], [])
-        line2.set_data([], [])
-        line3.set_data([], [])
-        orbit_line.set_data([], [])
-        current_point.set_data([], [])
-        return line1, line2, line3, orbit_line, current_point
-
-    def animate(i):
-        line1.set_data(t[:i], sol[:i, 0])
-        line2.set_data(t[:i], sol[:i, 1])
-        line3.set_data(t[:i], sol[:i, 2])
-        orbit_line.set_data(sol[:i, 0], sol[:i, 2])
-        current_point.set_data(sol[i, 0], sol[i, 2])
-        return line1, line2, line3, orbit_line, current_point
-
-    ani = FuncAnimation(fig, animate, frames=len(t), init_func=init,
-                        blit=True, interval=20, repeat=True)
-
-    def guardar_animacion():
-        try:
-            writer = animation.PillowWriter(fps=20)
-            ani.save("farmacocinetica.gif", writer=writer)
-            messagebox.showinfo("Guardado", "Animación guardada como farmacocinetica.gif")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar: {str(e)}")
+    # Una sola integración corta: no hay puntos de control para cancelarla
+    def calcular(progreso):
+        t, sol = cache.simular_dosis_unica(params, medicamento)
+        intervalo_dosificacion = calcular_intervalo_dosificacion(params, medicamento, INTERVALO_MAXIMO)
+        return t, sol, intervalo_dosificacion, calcular_metricas(t, sol)
+
+    ejecutar_en_segundo_plano(root, f"Simulación - {medicamento}", calcular,
+                              lambda resultado: mostrar_dosis_unica(medicamento, *resultado),
+                              botones=(btn_simular, btn_periodico, btn_optimizar), cancelable=False)
 
-    btn_guardar = ttk.Button(graph_window, text="Guardar Animación", command=guardar_animacion)
-    btn_guardar.pack(side=tk.BOTTOM, pady=10)
+def mostrar_dosis_unica(medicamento, t, sol, intervalo_dosificacion, metricas):
+    label_intervalo.config(text=f"Intervalo de dosificación recomendado: cada {intervalo_dosificacion:.1f} horas\n"
+                                f"Cmax: {metricas['cmax']:.3f} a las {metricas['tmax']:.1f} h | "
+                                f"AUC 0-24 h: {metricas['auc']:.2f}")
+    vista_dosis_unica.titulo = f"Resultados - {medicamento}"
+    vista_dosis_unica.mostrar(t, sol, medicamento)
+    actualizar_recursos()
 
 def ejecutar_simulacion_periodica():
-    try:
-        masa = float(entry_masa.get())
-        altura = float(entry_altura.get())
-        edad = int(entry_edad.get())
-    except ValueError:
-        label_intervalo.config(text="Por favor, ingrese valores numéricos válidos.")
+    params = leer_paciente()
+    if params is None:
         return
-
-    genero = genero_var.get()
-    comorbilidad = comorbilidad_var.get()
-    genetica = genetica_var.get()
-    alergia = alergia_var.get()
     medicamento = medicamento_var.get()
-
-    imc = masa / (altura ** 2)
-
-    genetica_factor = 0.0
-    if genetica == "Metabolizador rápido":
-        genetica_factor = 0.2
-    elif genetica == "Metabolizador lento":
-        genetica_factor = -0.2
-
-    alergia_factor = 0.0
-    if alergia == "Alergia leve":
-        alergia_factor = 0.1
-    elif alergia == "Alergia moderada":
-        alergia_factor = 0.2
-    elif alergia == "Alergia severa":
-        alergia_factor = 0.3
-
-    params = {
-        'masa': masa,
-        'altura': altura,
-        'imc': imc,
-        'edad': edad,
-        'genero': genero,
-        'comorbilidad': comorbilidad,
-        'genetica': genetica,
-        'genetica_factor': genetica_factor,
-        'alergia': alergia,
-        'alergia_factor': alergia_factor,
-        'V_d': 0.6 * masa,
-        'k_a': 0.5 * (1 + 0.01 * imc),
-        'k_e': 0.3 * (1 - 0.01 * imc)
-    }
-
-    intervalo = calcular_intervalo_dosificacion(params, medicamento)
     num_dosis = 5
     puntos_por_ciclo = 150
-    
-    t_total = 0
-    t_segmentos = []
-    sol_segmentos = []
-    y0 = [0, 100, params['V_d']]
-    
-    for ciclo in range(num_dosis):
-        t_segmento = np.linspace(t_total, t_total + intervalo, puntos_por_ciclo)
-        sol_segmento = odeint(ecuaciones, y0, t_segmento, args=(params, medicamento))
-        
-        t_segmentos.append(t_segmento)
-        sol_segmentos.append(sol_segmento)
-        
-        y0 = sol_segmento[-1, :].copy()
-        y0[1] += 100
-        t_total += intervalo
-    
-    t = np.concatenate(t_segmentos)
-    sol = np.concatenate(sol_segmentos, axis=0)
-    
-    graph_window = tk.Toplevel(root)
-    graph_window.title(f"Simulación Periódica - {medicamento}")
-    graph_window.geometry("1300x750")
-
-    fig = plt.figure(figsize=(13, 6), dpi=100)
-    fig.suptitle(f"Dosis Múltiples - {medicamento} (Cada {intervalo:.1f} horas)", fontsize=14)
-
-    ax1 = fig.add_subplot(1, 2, 1)
-    colors = plt.cm.viridis(np.linspace(0, 1, num_dosis))
-    for i in range(num_dosis):
-        start = i * puntos_por_ciclo
-        end = (i+1) * puntos_por_ciclo
-        ax1.plot(t[start:end], sol[start:end, 0], color=colors[i], 
-                label=f'Dosis {i+1}' if i < 5 else None)
-    
-    for i in range(num_dosis):
-        ax1.axvline(x=i*intervalo, color='r', linestyle='--', alpha=0.3)
-    
-    ax1.set_xlim(0, t[-1])
-    ax1.set_ylim(0, np.max(sol[:,0]) * 1.1)
-    ax1.set_xlabel('Tiempo (horas)')
-    ax1.set_ylabel('Concentración (C)')
-    ax1.set_title('Evolución con Dosis Múltiples')
-    ax1.legend()
-    ax1.grid(True)
-
-    ax2 = fig.add_subplot(1, 2, 2)
-    points = np.array([sol[:,0], sol[:,2]]).T.reshape(-1, 1, 2)
-    segments = np.concatenate([points[:-1], points[1:]], axis=1)
-    
-    norm = plt.Normalize(0, t[-1])
-    cmap = plt.cm.plasma
-    
-    lc = LineCollection(segments, cmap=cmap, norm=norm, alpha=0.8)
-    lc.set_array(t)
-    lc.set_linewidth(2)
-    line = ax2.add_collection(lc)
-    
-    current_point, = ax2.plot([], [], 'ro', markersize=8)
-    
-    ax2.set_xlim(np.min(sol[:,0]) * 0.9, np.max(sol[:,0]) * 1.1)
-    ax2.set_ylim(np.min(sol[:,2]) * 0.9, np.max(sol[:,2]) * 1.1)
-    ax2.set_xlabel('Concentración (C)')
-    ax2.set_ylabel('Volumen (V)')
-    ax2.set_title('Órbitas Periódicas (Evolución Temporal)')
-    ax2.grid(True)
-    
-    cbar = fig.colorbar(lc, ax=ax2)
-    cbar.set_label('Tiempo (horas)')
-
-    canvas = FigureCanvasTkAgg(fig, master=graph_window)
-    canvas.draw()
-    canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-
-    def animate(i):
-        current_point.set_data(sol[i, 0], sol[i, 2])
-        lc.set_segments(segments[:i])
-        lc.set_array(t[:i])
-        return lc, current_point
-
-    ani = FuncAnimation(fig, animate, frames=len(t), interval=20, blit=True)
-
-    def guardar_animacion():
+
+    # Cinco ciclos integrados de una vez: no hay puntos de control para cancelarla
+    def calcular(progreso):
+        intervalo = calcular_intervalo_dosificacion(params, medicamento, INTERVALO_MAXIMO)
+        t, sol, intervalo = cache.simular_dosis_multiples(params, medicamento, num_dosis=num_dosis,
+                                                          puntos_por_ciclo=puntos_por_ciclo, intervalo=intervalo)
+        return t, sol, intervalo, calcular_metricas(t, sol, puntos_por_ciclo)
+
+    ejecutar_en_segundo_plano(root, f"Simulación Periódica - {medicamento}", calcular,
+                              lambda resultado: mostrar_dosis_multiples(medicamento, num_dosis, puntos_por_ciclo,
+                                                                        *resultado),
+                              botones=(btn_simular, btn_periodico, btn_optimizar), cancelable=False)
+
+def mostrar_dosis_multiples(medicamento, num_dosis, puntos_por_ciclo, t, sol, intervalo, metricas):
+    label_intervalo.config(text=f"Intervalo de dosificación recomendado: cada {intervalo:.1f} horas\n"
+                                f"Cmax: {metricas['cmax']:.3f} | Valle: {metricas['valle']:.3f} | "
+                                f"AUC último ciclo: {metricas['auc_ciclo'][-1]:.2f} | "
+                                f"Acumulación: {metricas['razon_acumulacion']:.2f}")
+    vista_dosis_multiples.titulo = f"Simulación Periódica - {medicamento}"
+    vista_dosis_multiples.mostrar(t, sol, intervalo, num_dosis, puntos_por_ciclo, medicamento)
+    actualizar_recursos()
+
+# --- Barrido de parámetros ---
+# Panel con deslizadores sobre la simulación de dosis única. Los cambios que
+# llegan dentro de RETARDO_BARRIDO_MS se agrupan en uno. Las simulaciones
+# corren en un único hilo aparte y se guardan por celda de la malla de los
+# deslizadores (ver `farmacocinetica.barrido`): una posición ya visitada se
+# dibuja al momento y una nueva muestra primero la interpolación de sus
+# vecinas ya simuladas, que se reemplaza por la curva exacta al terminar. Si
+# el deslizador se mueve mientras se simula, sólo se simula después la última
+# posición.
+RETARDO_BARRIDO_MS = 30
+PASOS_BARRIDO = {'masa': 0.5, 'altura': 0.01, 'edad': 1}
+RANGOS_BARRIDO = {'masa': (30, 150), 'altura': (1.4, 2.1), 'edad': (1, 100)}
+barrido = BarridoDosisUnica(PASOS_BARRIDO, max_entradas=1024)
+simulaciones_barrido = ThreadPoolExecutor(max_workers=1)
+
+class PanelBarrido:
+    """Ventana con deslizadores de masa, altura y edad y menús de las categorías.
+
+    Cada cambio actualiza las curvas en su lugar, primero con la vista previa
+    de `barrido.estimar` y luego con la simulación exacta; la concentración del
+    paciente del formulario queda como referencia.
+    """
+
+    def __init__(self, params, medicamento):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.params_referencia = params
+        self.ventana = tk.Toplevel(root)
+        self.ventana.title("Barrido de Parámetros")
+        self.ventana.geometry("1150x560")
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
+        controles = ttk.Frame(self.ventana, padding="10 10 10 10")
+        controles.pack(side=tk.LEFT, fill=tk.Y)
+
+        self.variables = {}
+        fila = 0
+        for campo, etiqueta in [('masa', "Masa (kg)"), ('altura', "Altura (m)"), ('edad', "Edad (años)")]:
+            minimo, maximo = RANGOS_BARRIDO[campo]
+            var = tk.DoubleVar(value=min(max(params[campo], minimo), maximo))
+            ttk.Label(controles, text=etiqueta + ":").grid(row=fila, column=0, sticky='e', pady=5)
+            tk.Scale(controles, variable=var, from_=minimo, to=maximo, resolution=PASOS_BARRIDO[campo],
+                     orient=tk.HORIZONTAL, length=220, command=self.cambio).grid(row=fila, column=1, pady=5)
+            self.variables[campo] = var
+            fila += 1
+        menus = [('genero', "Género", lista_generos, params['genero']),
+                 ('comorbilidad', "Comorbilidad", lista_comorbilidades, params['comorbilidad']),
+                 ('genetica', "Genética", lista_genetica, params['genetica']),
+                 ('alergia', "Alergia", lista_alergia, params['alergia']),
+                 ('medicamento', "Medicamento", lista_medicamentos, medicamento)]
+        for campo, etiqueta, catalogo, valor in menus:
+            var = tk.StringVar(value=valor)
+            ttk.Label(controles, text=etiqueta + ":").grid(row=fila, column=0, sticky='e', pady=5)
+            ttk.OptionMenu(controles, var, valor, *catalogo, command=self.cambio).grid(row=fila, column=1,
+                                                                                    pady=5, sticky='w')
+            self.variables[campo] = var
+            fila += 1
+        self.label_metricas = ttk.Label(controles, text="", justify=tk.LEFT)
+        self.label_metricas.grid(row=fila, column=0, columnspan=2, sticky='w', pady=(15, 0))
+        self.label_tiempo = ttk.Label(controles, text="", foreground='gray')
+        self.label_tiempo.grid(row=fila + 1, column=0, columnspan=2, sticky='w')
+
+        self.fig = Figure(figsize=(7.5, 5), dpi=100)
+        figuras_vivas.add(self.fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        t, sol = barrido.simular(params, medicamento)
+        self.referencia, = self.ax.plot(t, sol[:, 0], color='gray', linestyle='--',
+                                        label='Concentración (paciente del formulario)')
+        self.lineas = [self.ax.plot(t, sol[:, k], estilo, label=etiqueta)[0]
+                       for k, (estilo, etiqueta) in enumerate([('b-', 'Concentración (C)'),
+                                                              ('r-', 'Tracto digestivo (D)'),
+                                                              ('g-', 'Volumen (V)')])]
+        self.ax.set_xlim(0, 24)
+        self.ax.set_xlabel('Tiempo (horas)')
+        self.ax.set_ylabel('Concentración / Cantidad')
+        self.ax.legend(loc='upper right')
+        self.ax.grid(True)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.ventana)
+        self.canvas.get_tk_widget().pack(side=tk.RIGHT, fill=tk.BOTH, expand=1)
+
+        self.medicamento_referencia = None
+        self._pendiente = None
+        self._simulacion = None
+        self._revision = None
+        self.recalcular()
+
+    def cambio(self, *args):
+        if self._pendiente is None:
+            self._pendiente = self.ventana.after(RETARDO_BARRIDO_MS, self.recalcular)
+
+    def leer(self):
+        v = {campo: var.get() for campo, var in self.variables.items()}
+        params = construir_parametros(v['masa'], v['altura'], int(round(v['edad'])), v['genero'],
+                                      v['comorbilidad'], v['genetica'], v['alergia'])
+        return params, v['medicamento']
+
+    def recalcular(self):
+        self._pendiente = None
+        inicio = time.perf_counter()
+        params, medicamento = self.leer()
+        resultado = barrido.consultar(params, medicamento)
+        exacto = resultado is not None
+        if not exacto:
+            self.simular(params, medicamento)
+            resultado = barrido.estimar(params, medicamento)
+            if resultado is None:
+                return  # Sin vecinas: se dibuja cuando termine la simulación
+        self.dibujar(params, medicamento, *resultado, exacto, inicio)
+
+    def simular(self, params, medicamento):
+        # Una simulación a la vez; al terminar, `revisar` vuelve a leer los
+        # deslizadores y pide la posición en la que estén
+        if self._simulacion is not None:
+            return
+        referencia = self.params_referencia
+
+        def trabajo():
+            barrido.simular(referencia, medicamento)
+            return barrido.simular(params, medicamento)
+
+        self._simulacion = simulaciones_barrido.submit(trabajo)
+        self.revisar()
+
+    def revisar(self):
+        self._revision = None
+        if not self._simulacion.done():
+            self._revision = self.ventana.after(INTERVALO_REVISION_MS, self.revisar)
+            return
+        simulacion, self._simulacion = self._simulacion, None
         try:
-            writer = animation.PillowWriter(fps=20)
-            ani.save("orbita_periodica.gif", writer=writer)
-            messagebox.showinfo("Guardado", "Animación guardada como orbita_periodica.gif")
+            simulacion.result()
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar: {str(e)}")
+            messagebox.showerror("Error", f"La simulación falló: {e}", parent=self.ventana)
+            return
+        self.recalcular()
+
+    def dibujar(self, params, medicamento, t, sol, exacto, inicio):
+        if medicamento != self.medicamento_referencia:
+            resultado_referencia = barrido.consultar(self.params_referencia, medicamento)
+            if resultado_referencia is not None:
+                sol_referencia = resultado_referencia[1]
+                self.referencia.set_ydata(sol_referencia[:, 0])
+                self.medicamento_referencia = medicamento
+                self.ax.set_ylim(0, np.max(sol_referencia) * 1.1)
+                self.fig.suptitle(f"Barrido de parámetros - {medicamento}", fontsize=13)
+        for k, linea in enumerate(self.lineas):
+            linea.set_ydata(sol[:, k])
+        # El eje sólo crece mientras se arrastra, para que las curvas no salten
+        techo = np.max(sol) * 1.1
+        if techo > self.ax.get_ylim()[1]:
+            self.ax.set_ylim(0, techo)
+
+        metricas = calcular_metricas(t, sol)
+        intervalo = calcular_intervalo_dosificacion(params, medicamento, INTERVALO_MAXIMO)
+        self.label_metricas.config(text=f"Cmax: {metricas['cmax']:.3f} a las {metricas['tmax']:.1f} h\n"
+                                        f"AUC 0-24 h: {metricas['auc']:.2f}\n"
+                                        f"Intervalo recomendado: cada {intervalo:.1f} h")
+        self.canvas.draw()
+        self.label_tiempo.config(text=f"Última actualización: {1000 * (time.perf_counter() - inicio):.0f} ms"
+                                      + ("" if exacto else " (vista previa)"))
+
+    def cerrar(self):
+        for pendiente in (self._pendiente, self._revision):
+            if pendiente is not None:
+                self.ventana.after_cancel(pendiente)
+        self.ventana.destroy()
+        self.fig = self.canvas = None
+        gc.collect()
+        actualizar_recursos()
+
+# --- Optimización del régimen ---
+# El régimen se busca y se muestra con el mismo número de dosis, así que la
+# ventana se cumple en el último ciclo de la gráfica. Las dosis se redondean a
+# múltiplos de PASO_DOSIS.
+NUM_DOSIS_REGIMEN = 10
+PASO_DOSIS = 5
+
+def ejecutar_optimizacion():
+    params = leer_paciente()
+    if params is None:
+        return
+    try:
+        c_min = float(entry_c_min.get())
+        c_max = float(entry_c_max.get())
+    except ValueError:
+        label_intervalo.config(text="Indique la ventana terapéutica (C mínima y máxima).")
+        return
+    if not 0 < c_min < c_max:
+        label_intervalo.config(text="La C mínima debe ser positiva y menor que la máxima.")
+        return
+    medicamento = medicamento_var.get()
+    puntos_por_ciclo = 150
 
-    btn_guardar = ttk.Button(graph_window, text="Guardar Animación", command=guardar_animacion)
-    btn_guardar.pack(side=tk.BOTTOM, pady=10)
+    def calcular(progreso):
+        regimen = optimizar_regimen(params, medicamento, c_min, c_max, paso_dosis=PASO_DOSIS,
+                                    num_dosis=NUM_DOSIS_REGIMEN, intervalo_maximo=INTERVALO_MAXIMO,
+                                    progreso=progreso)
+        t, sol, intervalo = cache.simular_dosis_multiples(params, medicamento, num_dosis=NUM_DOSIS_REGIMEN,
+                                                          puntos_por_ciclo=puntos_por_ciclo,
+                                                          intervalo=regimen['intervalo'], dosis=regimen['dosis'])
+        return regimen, t, sol, intervalo, calcular_metricas(t, sol, puntos_por_ciclo)
+
+    ejecutar_en_segundo_plano(root, f"Optimización del régimen - {medicamento}", calcular,
+                              lambda resultado: mostrar_regimen(medicamento, puntos_por_ciclo, *resultado),
+                              botones=(btn_simular, btn_periodico, btn_optimizar))
+
+def mostrar_regimen(medicamento, puntos_por_ciclo, regimen, t, sol, intervalo, metricas):
+    estado = "dentro de la ventana" if regimen['dentro'] else "no alcanza la ventana"
+    if not regimen['sensible']:
+        estado += "; la dosis no modifica C en este modelo, se mantiene la de referencia"
+    label_intervalo.config(text=f"Régimen: dosis de {regimen['dosis']:.0f} cada {regimen['intervalo']:.1f} horas "
+                                f"({estado})\n"
+                                f"Valle: {regimen['valle']:.3f} | Pico: {regimen['pico']:.3f} | "
+                                f"Regla: cada {regimen['intervalo_regla']:.1f} horas")
+    vista_dosis_multiples.titulo = f"Régimen Optimizado - {medicamento}"
+    vista_dosis_multiples.mostrar(t, sol, intervalo, NUM_DOSIS_REGIMEN, puntos_por_ciclo, medicamento)
+    actualizar_recursos()
+
+def abrir_barrido():
+    params = leer_paciente()
+    if params is None:
+        return
+    PanelBarrido(params, medicamento_var.get())
+    actualizar_recursos()
 
 # Interfaz gráfica
-root = tk.Tk()
-root.title("Simulador Farmacocinético Avanzado")
-root.geometry("650x750")
-
-style = ttk.Style()
-style.theme_use('clam')
-style.configure('TFrame', background='#f0f8ff')
-style.configure('TLabel', background='#f0f8ff', font=('Arial', 11))
-style.configure('TButton', font=('Arial', 11, 'bold'), background='#4b8bbe', foreground='white')
-style.configure('TEntry', font=('Arial', 11))
-style.configure('TOptionMenu', font=('Arial', 11))
-style.map('TButton', background=[('active', '#3a7ab1')])
-
-main_frame = ttk.Frame(root, padding="20 20 20 20")
-main_frame.pack(fill=tk.BOTH, expand=True)
-
-medicamento_var = tk.StringVar(value="Ibuprofeno")
-genero_var = tk.StringVar(value="Hombre")
-comorbilidad_var = tk.StringVar(value="Sin comorbilidad")
-genetica_var = tk.StringVar(value="Metabolizador normal")
-alergia_var = tk.StringVar(value="Sin alergia")
-
-lista_medicamentos = ["Ibuprofeno", "Paracetamol", "Aspirina", "Amoxicilina", "Metformina", "Loratadina"]
-lista_genero = ["Hombre", "Mujer"]
-lista_comorbilidades = ["Sin comorbilidad", "Diabetes", "Insuficiencia renal", "Insuficiencia hepática", "Hipertensión", "Asma"]
-lista_genetica = ["Metabolizador normal", "Metabolizador rápido", "Metabolizador lento", "No identificado"]
-lista_alergia = ["Sin alergia", "Alergia leve", "Alergia moderada", "Alergia severa"]
-
-ttk.Label(main_frame, text="Datos del Paciente", font=('Arial', 14, 'bold')).grid(row=0, column=0, columnspan=2, pady=(0,15))
-
-row = 1
-ttk.Label(main_frame, text="Masa (kg):").grid(row=row, column=0, sticky='e', pady=5)
-entry_masa = ttk.Entry(main_frame, width=15)
-entry_masa.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Altura (m):").grid(row=row, column=0, sticky='e', pady=5)
-entry_altura = ttk.Entry(main_frame, width=15)
-entry_altura.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Edad (años):").grid(row=row, column=0, sticky='e', pady=5)
-entry_edad = ttk.Entry(main_frame, width=15)
-entry_edad.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Género:").grid(row=row, column=0, sticky='e', pady=5)
-genero_menu = ttk.OptionMenu(main_frame, genero_var, lista_genero[0], *lista_genero)
-genero_menu.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Comorbilidad:").grid(row=row, column=0, sticky='e', pady=5)
-comorbilidad_menu = ttk.OptionMenu(main_frame, comorbilidad_var, lista_comorbilidades[0], *lista_comorbilidades)
-comorbilidad_menu.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Genética:").grid(row=row, column=0, sticky='e', pady=5)
-genetica_menu = ttk.OptionMenu(main_frame, genetica_var, lista_genetica[0], *lista_genetica)
-genetica_menu.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Alergia:").grid(row=row, column=0, sticky='e', pady=5)
-alergia_menu = ttk.OptionMenu(main_frame, alergia_var, lista_alergia[0], *lista_alergia)
-alergia_menu.grid(row=row, column=1, pady=5, sticky='w')
-row += 1
-
-ttk.Label(main_frame, text="Medicamento:", font=('Arial', 11, 'bold')).grid(row=row, column=0, sticky='e', pady=10)
-medicamento_menu = ttk.OptionMenu(main_frame, medicamento_var, lista_medicamentos[0], *lista_medicamentos)
-medicamento_menu.grid(row=row, column=1, pady=10, sticky='w')
-row += 1
-
-btn_simular = ttk.Button(main_frame, text="Simulación Básica (Dosis Única)", command=ejecutar_simulacion)
-btn_simular.grid(row=row, column=0, columnspan=2, pady=(15,5))
-row += 1
-
-btn_periodico = ttk.Button(main_frame, text="Simulación Avanzada (Dosis Múltiples)", command=ejecutar_simulacion_periodica)
-btn_periodico.grid(row=row, column=0, columnspan=2, pady=(5,15))
-row += 1
-
-label_intervalo = ttk.Label(main_frame, text="", foreground='blue', font=('Arial', 12, 'bold'))
-label_intervalo.grid(row=row, column=0, columnspan=2, pady=(10,0))
-row += 1
-
-ttk.Label(main_frame, text="Instrucciones:", font=('Arial', 11, 'bold')).grid(row=row, column=0, sticky='w', pady=(20,5))
-row += 1
-ttk.Label(main_frame, text="1. Complete los datos del paciente\n2. Seleccione el medicamento\n3. Elija el tipo de simulación", 
-          justify=tk.LEFT).grid(row=row, column=0, columnspan=2, sticky='w')
-
-entry_masa.insert(0, "70")
-entry_altura.insert(0, "1.75")
-entry_edad.insert(0, "30")
-
-root.mainloop()
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+
+    root = tk.Tk()
+    root.title("Simulador Farmacocinético Avanzado")
+    root.geometry("650x960")
+
+    style = ttk.Style()
+    style.theme_use('clam')
+    style.configure('TFrame', background='#f0f8ff')
+    style.configure('TLabel', background='#f0f8ff', font=('Arial', 11))
+    style.configure('TButton', font=('Arial', 11, 'bold'), background='#4b8bbe', foreground='white')
+    style.configure('TEntry', font=('Arial', 11))
+    style.configure('TOptionMenu', font=('Arial', 11))
+    style.map('TButton', background=[('active', '#3a7ab1')])
+
+    main_frame = ttk.Frame(root, padding="20 20 20 20")
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    medicamento_var = tk.StringVar(value="Ibuprofeno")
+    genero_var = tk.StringVar(value="Hombre")
+    comorbilidad_var = tk.StringVar(value="Sin comorbilidad")
+    genetica_var = tk.StringVar(value="Metabolizador normal")
+    alergia_var = tk.StringVar(value="Sin alergia")
+
+    ttk.Label(main_frame, text="Datos del Paciente", font=('Arial', 14, 'bold')).grid(row=0, column=0, columnspan=2, pady=(0,15))
+
+    row = 1
+    ttk.Label(main_frame, text="Masa (kg):").grid(row=row, column=0, sticky='e', pady=5)
+    entry_masa = ttk.Entry(main_frame, width=15)
+    entry_masa.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Altura (m):").grid(row=row, column=0, sticky='e', pady=5)
+    entry_altura = ttk.Entry(main_frame, width=15)
+    entry_altura.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Edad (años):").grid(row=row, column=0, sticky='e', pady=5)
+    entry_edad = ttk.Entry(main_frame, width=15)
+    entry_edad.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Género:").grid(row=row, column=0, sticky='e', pady=5)
+    genero_menu = ttk.OptionMenu(main_frame, genero_var, lista_generos[0], *lista_generos)
+    genero_menu.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Comorbilidad:").grid(row=row, column=0, sticky='e', pady=5)
+    comorbilidad_menu = ttk.OptionMenu(main_frame, comorbilidad_var, lista_comorbilidades[0], *lista_comorbilidades)
+    comorbilidad_menu.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Genética:").grid(row=row, column=0, sticky='e', pady=5)
+    genetica_menu = ttk.OptionMenu(main_frame, genetica_var, lista_genetica[0], *lista_genetica)
+    genetica_menu.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Alergia:").grid(row=row, column=0, sticky='e', pady=5)
+    alergia_menu = ttk.OptionMenu(main_frame, alergia_var, lista_alergia[0], *lista_alergia)
+    alergia_menu.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="Medicamento:", font=('Arial', 11, 'bold')).grid(row=row, column=0, sticky='e', pady=10)
+    medicamento_menu = ttk.OptionMenu(main_frame, medicamento_var, lista_medicamentos[0], *lista_medicamentos)
+    medicamento_menu.grid(row=row, column=1, pady=10, sticky='w')
+    row += 1
+
+    btn_simular = ttk.Button(main_frame, text="Simulación Básica (Dosis Única)", command=ejecutar_simulacion)
+    btn_simular.grid(row=row, column=0, columnspan=2, pady=(15,5))
+    row += 1
+
+    btn_periodico = ttk.Button(main_frame, text="Simulación Avanzada (Dosis Múltiples)", command=ejecutar_simulacion_periodica)
+    btn_periodico.grid(row=row, column=0, columnspan=2, pady=(5,5))
+    row += 1
+
+    btn_barrido = ttk.Button(main_frame, text="Barrido de Parámetros (Dosis Única)", command=abrir_barrido)
+    btn_barrido.grid(row=row, column=0, columnspan=2, pady=(5,5))
+    row += 1
+
+    ttk.Label(main_frame, text="C mínima:").grid(row=row, column=0, sticky='e', pady=5)
+    entry_c_min = ttk.Entry(main_frame, width=15)
+    entry_c_min.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    ttk.Label(main_frame, text="C máxima:").grid(row=row, column=0, sticky='e', pady=5)
+    entry_c_max = ttk.Entry(main_frame, width=15)
+    entry_c_max.grid(row=row, column=1, pady=5, sticky='w')
+    row += 1
+
+    btn_optimizar = ttk.Button(main_frame, text="Optimizar Régimen (Ventana Terapéutica)", command=ejecutar_optimizacion)
+    btn_optimizar.grid(row=row, column=0, columnspan=2, pady=(5,15))
+    row += 1
+
+    label_intervalo = ttk.Label(main_frame, text="", foreground='blue', font=('Arial', 12, 'bold'))
+    label_intervalo.grid(row=row, column=0, columnspan=2, pady=(10,0))
+    row += 1
+
+    ttk.Label(main_frame, text="Instrucciones:", font=('Arial', 11, 'bold')).grid(row=row, column=0, sticky='w', pady=(20,5))
+    row += 1
+    ttk.Label(main_frame, text="1. Complete los datos del paciente\n2. Seleccione el medicamento\n3. Elija el tipo de simulación\n4. Para optimizar dosis e intervalo, indique C mínima y máxima", 
+              justify=tk.LEFT).grid(row=row, column=0, columnspan=2, sticky='w')
+    row += 1
+
+    label_recursos = ttk.Label(main_frame, text="", foreground='gray', font=('Arial', 9))
+    label_recursos.grid(row=row, column=0, columnspan=2, sticky='w', pady=(20,0))
+
+    vista_dosis_unica = VistaResultados("Resultados", "1200x700", FiguraDosisUnica)
+    vista_dosis_multiples = VistaResultados("Simulación Periódica", "1300x750", FiguraDosisMultiples)
+    actualizar_recursos()
+
+    entry_masa.insert(0, "70")
+    entry_altura.insert(0, "1.75")
+    entry_edad.insert(0, "30")
+
+    root.mainloop()
@@ -0,0 +1,90 @@
+# Compara la exportación de las animaciones de Farmacinetica.py antes y
+# después de la decimación: todos los puntos como cuadros a 100 dpi, con
+# `set_segments(segments[:i])` en cada cuadro de la órbita periódica, frente a
+# `exportar_animacion` con CUADROS_EXPORTACION cuadros. Mide tiempo y tamaño
+# del archivo. Usa el backend Agg, así que no necesita pantalla.
+#
+#   python benchmarks/bench_animacion.py
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib import animation
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import construir_parametros, simular_dosis_unica, simular_dosis_multiples
+from Farmacinetica import (CUADROS_EXPORTACION, FiguraDosisUnica, FiguraDosisMultiples, indices_cuadros,
+                           exportar_animacion)
+
+
+def orbita_reslicing(fig, t, sol):
+    # Órbita de `ejecutar_simulacion_periodica` antes de las colecciones por ciclo
+    ax = fig.add_subplot(1, 1, 1)
+    points = np.array([sol[:, 0], sol[:, 2]]).T.reshape(-1, 1, 2)
+    segments = np.concatenate([points[:-1], points[1:]], axis=1)
+    lc = LineCollection(segments, cmap='plasma', alpha=0.8)
+    lc.set_array(t[:-1])
+    ax.add_collection(lc)
+    current_point, = ax.plot([], [], 'ro', markersize=8)
+    ax.autoscale_view()
+
+    def animate(i):
+        current_point.set_data([sol[i, 0]], [sol[i, 2]])
+        lc.set_segments(segments[:i])
+        lc.set_array(t[:i])
+    return animate
+
+
+def exportar_todo(construir, n_puntos, ruta, figsize):
+    # `guardar_animacion` anterior: un cuadro por punto, 20 fps, 100 dpi
+    fig = Figure(figsize=figsize, dpi=100)
+    FigureCanvasAgg(fig)
+    animate = construir(fig)
+    writer = animation.PillowWriter(fps=20)
+    with writer.saving(fig, ruta, 100):
+        for i in range(n_puntos):
+            animate(i)
+            writer.grab_frame()
+
+
+def medir(exportar, ruta):
+    inicio = time.perf_counter()
+    exportar(ruta)
+    return time.perf_counter() - inicio, os.path.getsize(ruta) / 1e6
+
+
+def main(medicamento="Ibuprofeno"):
+    params = construir_parametros(70, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal",
+                                  "Sin alergia")
+    t1, sol1 = simular_dosis_unica(params, medicamento)
+    t5, sol5, intervalo = simular_dosis_multiples(params, medicamento)
+    casos = [
+        ("dosis única", len(t1), FiguraDosisUnica.figsize,
+         lambda fig: FiguraDosisUnica(fig).actualizar(t1, sol1, medicamento).animate,
+         lambda fig: FiguraDosisUnica(fig).actualizar(t1, sol1, medicamento)),
+        ("órbita periódica", len(t5), FiguraDosisMultiples.figsize,
+         lambda fig: orbita_reslicing(fig, t5, sol5),
+         lambda fig: FiguraDosisMultiples(fig).actualizar(t5, sol5, intervalo, 5, 150, medicamento)),
+    ]
+    print(f"{'caso':<18} {'cuadros':>8} {'antes (s)':>10} {'antes (MB)':>11} "
+          f"{'cuadros':>8} {'después (s)':>12} {'después (MB)':>13}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre, n, figsize, antes, despues in casos:
+            ruta = os.path.join(carpeta, "animacion.gif")
+            t_antes, mb_antes = medir(lambda r: exportar_todo(antes, n, r, figsize), ruta)
+            cuadros = indices_cuadros(n, CUADROS_EXPORTACION)
+            t_despues, mb_despues = medir(lambda r: exportar_animacion(despues, cuadros, r, figsize), ruta)
+            print(f"{nombre:<18} {n:>8} {t_antes:>10.1f} {mb_antes:>11.2f} "
+                  f"{len(cuadros):>8} {t_despues:>12.1f} {mb_despues:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
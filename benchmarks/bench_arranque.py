@@ -0,0 +1,47 @@
+# Mide el tiempo de arranque de un proceso nuevo que importa el núcleo
+# frente al de las interfaces y a la pila gráfica que éstas cargaban al
+# importarse antes de separar el núcleo (pyplot + backend TkAgg + tkinter).
+#
+#   python benchmarks/bench_arranque.py
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASOS = [
+    ("intérprete", "pass"),
+    ("numpy", "import numpy"),
+    ("núcleo (farmacocinetica)", "import farmacocinetica"),
+    ("Simulaciones.py", "import Simulaciones"),
+    ("Farmacinetica.py", "import Farmacinetica"),
+    ("pila gráfica anterior", "import farmacocinetica, tkinter, matplotlib.pyplot, matplotlib.animation; "
+                              "from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg"),
+]
+
+
+def medir(codigo, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True)
+        tiempos.append(time.perf_counter() - inicio)
+        if proceso.returncode != 0:
+            return None
+    return min(tiempos)
+
+
+def main(repeticiones=7):
+    base = None
+    for nombre, codigo in CASOS:
+        tiempo = medir(codigo, repeticiones)
+        if tiempo is None:
+            print(f"{nombre:<28} no disponible en este entorno")
+            continue
+        base = tiempo if base is None else base
+        print(f"{nombre:<28} {1e3 * tiempo:8.1f} ms  (+{1e3 * (tiempo - base):.1f} ms sobre el intérprete)")
+
+
+if __name__ == "__main__":
+    main()
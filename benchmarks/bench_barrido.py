@@ -0,0 +1,57 @@
+# Mide el costo por cambio del panel de barrido de Farmacinetica.py sin Tk:
+# un arrastre de masa de 50 a 90 kg y de vuelta, al paso del deslizador, para
+# cada medicamento. Para cada posición nueva compara lo que el hilo de Tk
+# esperaba antes (odeint en el momento) con la vista previa que ahora dibuja
+# mientras el hilo trabajador simula (`BarridoDosisUnica.estimar` a partir de
+# las posiciones ya visitadas), y da el error relativo máximo de esa vista
+# previa en C. La vuelta cae sobre posiciones ya simuladas (`consultar`).
+#
+#   python benchmarks/bench_barrido.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import lista_medicamentos, construir_parametros, BarridoDosisUnica
+from Farmacinetica import PASOS_BARRIDO
+
+
+def paciente(masa):
+    return construir_parametros(float(masa), 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal",
+                                "Sin alergia")
+
+
+def medir(medicamento):
+    ida = [paciente(m) for m in np.arange(50, 90 + PASOS_BARRIDO['masa'] / 2, PASOS_BARRIDO['masa'])]
+    barrido = BarridoDosisUnica(PASOS_BARRIDO)
+    barrido.simular(ida[0], medicamento)  # el panel abre con el paciente inicial ya simulado
+    t_odeint = t_previa = 0.0
+    error = 0.0
+    for params in ida[1:]:
+        inicio = time.perf_counter()
+        _, previa = barrido.estimar(params, medicamento)
+        t_previa += time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        _, sol = barrido.simular(params, medicamento)
+        t_odeint += time.perf_counter() - inicio
+        error = max(error, np.max(np.abs(previa[:, 0] - sol[:, 0])) / np.max(sol[:, 0]))
+    inicio = time.perf_counter()
+    for params in ida[::-1]:
+        barrido.consultar(params, medicamento)
+    t_vuelta = time.perf_counter() - inicio
+    n = len(ida) - 1
+    return 1000 * t_odeint / n, 1000 * t_previa / n, error, 1000 * t_vuelta / len(ida)
+
+
+def main():
+    print(f"{'medicamento':<12} {'odeint (ms)':>12} {'previa (ms)':>12} {'error C':>9} {'vuelta (ms)':>12}")
+    for medicamento in lista_medicamentos:
+        odeint, previa, error, vuelta = medir(medicamento)
+        print(f"{medicamento:<12} {odeint:>12.2f} {previa:>12.3f} {error:>9.2%} {vuelta:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
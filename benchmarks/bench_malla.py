@@ -0,0 +1,72 @@
+# Compara las mallas uniformes con las adaptativas: puntos guardados, error de
+# la interpolación lineal frente a una referencia muy fina (relativo al máximo
+# de C) y diferencia en Cmax y AUC, en dosis única y dosis múltiples para
+# cada medicamento, y memoria y tiempo de una cohorte.
+#
+#   python benchmarks/bench_malla.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import (lista_medicamentos, construir_parametros, simular_dosis_unica, simular_dosis_multiples,
+                             calcular_metricas, simular_cohorte)
+
+
+def error_interpolacion(t, C, t_ref, C_ref):
+    return np.max(np.abs(np.interp(t_ref, t, C) - C_ref)) / np.max(C_ref)
+
+
+def error_interpolacion_ciclos(t, C, t_ref, C_ref, num_dosis):
+    # Interpola ciclo a ciclo: en los instantes de dosis la malla repite t
+    partes = zip(np.split(t, num_dosis), np.split(C, num_dosis), np.split(t_ref, num_dosis), np.split(C_ref, num_dosis))
+    return max(np.max(np.abs(np.interp(tr, tc, cc) - cr)) for tc, cc, tr, cr in partes) / np.max(C_ref)
+
+
+def diferencia(a, b):
+    return max(abs(a['cmax'] - b['cmax']) / b['cmax'], abs(a['auc'] - b['auc']) / b['auc'])
+
+
+def main(n_pacientes=10000):
+    params = construir_parametros(70, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal",
+                                  "Sin alergia")
+    print(f"{'medicamento':<12} {'caso':<9} {'puntos':>12} {'error interp.':>22} {'Cmax/AUC':>20}")
+    for medicamento in lista_medicamentos:
+        t_ref, sol_ref = simular_dosis_unica(params, medicamento, puntos=20000)
+        referencia = calcular_metricas(t_ref, sol_ref)
+        t_u, sol_u = simular_dosis_unica(params, medicamento)
+        t_a, sol_a = simular_dosis_unica(params, medicamento, adaptativa=True)
+        print(f"{medicamento:<12} {'única':<9} {len(t_u):>5} -> {len(t_a):>4} "
+              f"{error_interpolacion(t_u, sol_u[:, 0], t_ref, sol_ref[:, 0]):>10.1e} -> "
+              f"{error_interpolacion(t_a, sol_a[:, 0], t_ref, sol_ref[:, 0]):>8.1e} "
+              f"{diferencia(calcular_metricas(t_u, sol_u), referencia):>8.1e} -> "
+              f"{diferencia(calcular_metricas(t_a, sol_a), referencia):>8.1e}")
+
+        t_ref, sol_ref, _ = simular_dosis_multiples(params, medicamento, puntos_por_ciclo=4000)
+        referencia = calcular_metricas(t_ref, sol_ref, 4000)
+        t_u, sol_u, _ = simular_dosis_multiples(params, medicamento)
+        t_a, sol_a, _ = simular_dosis_multiples(params, medicamento, adaptativa=True)
+        print(f"{'':<12} {'múltiple':<9} {len(t_u):>5} -> {len(t_a):>4} "
+              f"{error_interpolacion_ciclos(t_u, sol_u[:, 0], t_ref, sol_ref[:, 0], 5):>10.1e} -> "
+              f"{error_interpolacion_ciclos(t_a, sol_a[:, 0], t_ref, sol_ref[:, 0], 5):>8.1e} "
+              f"{diferencia(calcular_metricas(t_u, sol_u, 150), referencia):>8.1e} -> "
+              f"{diferencia(calcular_metricas(t_a, sol_a, len(t_a) // 5), referencia):>8.1e}")
+
+    print(f"\nCohorte de {n_pacientes} pacientes (float32):")
+    for medicamento in lista_medicamentos:
+        resultados = []
+        for adaptativa in (False, True):
+            inicio = time.perf_counter()
+            cohorte = simular_cohorte(medicamento, n_pacientes, dtype=np.float32, adaptativa=adaptativa)
+            resultados.append((time.perf_counter() - inicio, cohorte.sol.nbytes / n_pacientes / 1e3,
+                               cohorte.puntos_por_ciclo))
+        (t_u, kb_u, p_u), (t_a, kb_a, p_a) = resultados
+        print(f"  {medicamento:<12} {p_u:>4} -> {p_a:>3} puntos por ciclo   {kb_u:>5.1f} -> {kb_a:>4.1f} kB/paciente"
+              f"   {t_u:>5.1f} -> {t_a:>5.1f} s")
+
+
+if __name__ == "__main__":
+    main()
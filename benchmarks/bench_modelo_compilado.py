@@ -0,0 +1,46 @@
+# Compara `ecuaciones` (cadenas y diccionarios en cada llamada, jacobiano por
+# diferencias finitas) con el modelo compilado de `compilar_modelo`.
+#
+#   python benchmarks/bench_modelo_compilado.py
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.integrate import odeint
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import lista_medicamentos, construir_parametros, ecuaciones, compilar_modelo
+
+
+def cronometrar(resolver, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        sol, info = resolver()
+    return (time.perf_counter() - inicio) / repeticiones, sol, info
+
+
+def main(repeticiones=20):
+    params = construir_parametros(70, 1.75, 30, "Hombre", "Insuficiencia renal",
+                                  "Metabolizador lento", "Alergia leve")
+    y0 = [0, 100, params['V_d']]
+    t = np.linspace(0, 24, 500)
+    print(f"{'Medicamento':<12} {'RHS orig':>9} {'RHS comp':>9} {'jac':>4} {'ms orig':>9} {'ms comp':>9} {'acel.':>6} {'dif. rel.':>10}")
+    for medicamento in lista_medicamentos:
+        rhs, jac = compilar_modelo(params, medicamento)
+        t_orig, sol_orig, info_orig = cronometrar(
+            lambda: odeint(ecuaciones, y0, t, args=(params, medicamento), full_output=True), repeticiones)
+        t_comp, sol_comp, info_comp = cronometrar(
+            lambda: odeint(rhs, y0, t, Dfun=jac, full_output=True), repeticiones)
+        llamadas_orig = info_orig['nfe'][-1]
+        llamadas_comp = info_comp['nfe'][-1]
+        dif = np.max(np.abs(sol_comp - sol_orig) / (np.abs(sol_orig) + 1e-9))
+        # LSODA solo evalúa el jacobiano (analítico o por diferencias finitas) en modo rígido
+        jacobianos = info_comp['nje'][-1]
+        print(f"{medicamento:<12} {llamadas_orig:>9} {llamadas_comp:>9} {jacobianos:>4} {1e3 * t_orig:>9.2f} "
+              f"{1e3 * t_comp:>9.2f} {t_orig / t_comp:>5.1f}x {dif:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
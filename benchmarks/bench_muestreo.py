@@ -0,0 +1,37 @@
+# Compara la precisión de `estimar_poblacion` con cada diseño de muestreo:
+# semiancho del intervalo de confianza del 95 % de la media del AUC y del P95
+# de Cmax, con el mismo número de pacientes, y los pacientes que necesitaría
+# el Monte Carlo simple para igualar ese semiancho (escala 1/sqrt(n)).
+#
+#   python benchmarks/bench_muestreo.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import DISENOS, estimar_poblacion
+
+
+def semiancho(resultado, metrica, estadistico):
+    r = resultado[metrica][estadistico]
+    return (r['superior'] - r['inferior']) / 2
+
+
+def main(medicamento="Ibuprofeno", n_pacientes=2048, replicas=16):
+    casos = [('auc', 'media'), ('cmax', 0.95)]
+    print(f"{'diseño':<14} {'tiempo (s)':>10}" + "".join(f" {f'{m} {e}':>12} {'n equiv.':>9}" for m, e in casos))
+    base = None
+    for diseno in DISENOS:
+        inicio = time.perf_counter()
+        resultado = estimar_poblacion(medicamento, n_pacientes, diseno, replicas)
+        tiempo = time.perf_counter() - inicio
+        anchos = [semiancho(resultado, m, e) for m, e in casos]
+        if base is None:
+            base = anchos
+        fila = "".join(f" {a:>12.4g} {n_pacientes * (b / a) ** 2:>9.0f}" for a, b in zip(anchos, base))
+        print(f"{diseno:<14} {tiempo:>10.1f}" + fila)
+
+
+if __name__ == "__main__":
+    main()
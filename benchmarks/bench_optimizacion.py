@@ -0,0 +1,79 @@
+# Compara `optimizar_regimen` con una búsqueda exhaustiva en malla (60 dosis
+# entre 10 y 2000 por intervalo candidato, todas en un solo lote) para un
+# paciente de cada medicamento, y mide el optimizador sobre una cohorte.
+# La ventana de cada medicamento se fija alrededor del régimen de la regla
+# (valle y pico del último ciclo con dosis 100), así que no depende de las
+# unidades de C de cada modelo.
+#
+#   python benchmarks/bench_optimizacion.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import (lista_medicamentos, construir_parametros, calcular_intervalo_dosificacion,
+                             optimizar_regimen, optimizar_regimen_cohorte, muestrear_covariables, Cohorte)
+from farmacocinetica.optimizacion import INTERVALOS_CANDIDATOS, _valle_pico
+
+NUM_DOSIS = 10
+PUNTOS_POR_CICLO = 50
+DOSIS_MALLA = np.geomspace(10, 2000, 60)
+
+
+def ventana(params, medicamento):
+    cohorte = Cohorte.desde_pacientes([params], medicamento)
+    intervalo = calcular_intervalo_dosificacion(params, medicamento)
+    valle, pico = _valle_pico(cohorte.arreglos(), np.array([intervalo]), 100, NUM_DOSIS, PUNTOS_POR_CICLO)
+    # El pico del régimen actual queda por encima de la ventana. En los modelos
+    # en que C casi no varía en el ciclo no cabe una ventana más estrecha que
+    # el régimen por los dos lados.
+    return 0.8 * valle[0], 0.95 * pico[0]
+
+
+def malla(params, medicamento, c_min, c_max):
+    cohorte = Cohorte.desde_pacientes([params], medicamento)
+    tau, dosis = (x.ravel() for x in np.meshgrid(np.array(INTERVALOS_CANDIDATOS, dtype=float), DOSIS_MALLA))
+    arreglos = {c: np.repeat(v, len(tau)) for c, v in cohorte.arreglos().items()}
+    valle, pico = _valle_pico(arreglos, tau, dosis, NUM_DOSIS, PUNTOS_POR_CICLO)
+    dentro = (valle >= c_min) & (pico <= c_max)
+    if not dentro.any():
+        return None, None, len(tau)
+    i = np.flatnonzero(dentro)[np.argmax(tau[dentro])]
+    return dosis[i], tau[i], len(tau)
+
+
+def main():
+    params = construir_parametros(70, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal",
+                                  "Sin alergia")
+    print(f"{'medicamento':<12} {'malla (s)':>10} {'sims':>6} {'régimen':>16} "
+          f"{'optim. (s)':>11} {'sims':>6} {'régimen':>16}")
+    for medicamento in lista_medicamentos:
+        c_min, c_max = ventana(params, medicamento)
+        inicio = time.perf_counter()
+        dosis_malla, tau_malla, sims_malla = malla(params, medicamento, c_min, c_max)
+        t_malla = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        r = optimizar_regimen(params, medicamento, c_min, c_max, num_dosis=NUM_DOSIS,
+                              puntos_por_ciclo=PUNTOS_POR_CICLO)
+        t_optim = time.perf_counter() - inicio
+        texto_malla = f"{dosis_malla:.0f} / {tau_malla:.0f} h" if dosis_malla is not None else "ninguno"
+        texto_optim = (f"{r['dosis']:.0f} / {r['intervalo']:.0f} h" + ("" if r['dentro'] else " (fuera)")
+                       + ("" if r['sensible'] else " *"))
+        print(f"{medicamento:<12} {t_malla:>10.2f} {sims_malla:>6} {texto_malla:>16} "
+              f"{t_optim:>11.2f} {r['simulaciones']:>6} {texto_optim:>16}")
+
+    cohorte = Cohorte.desde_covariables(muestrear_covariables(np.random.default_rng(42), 1000), "Amoxicilina")
+    c_min, c_max = ventana(cohorte.paciente(0), "Amoxicilina")
+    inicio = time.perf_counter()
+    r = optimizar_regimen_cohorte(cohorte, c_min, c_max, num_dosis=NUM_DOSIS, puntos_por_ciclo=PUNTOS_POR_CICLO)
+    print(f"\nCohorte de {len(cohorte)} pacientes (Amoxicilina): {time.perf_counter() - inicio:.1f} s, "
+          f"{r['simulaciones']} simulaciones en {r['rondas']} rondas, "
+          f"{np.mean(r['dentro']):.0%} dentro de la ventana")
+    print("* la dosis no modifica C del último ciclo: se conserva la dosis inicial")
+
+
+if __name__ == "__main__":
+    main()
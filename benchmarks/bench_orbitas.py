@@ -0,0 +1,52 @@
+# Mide el tiempo de dibujo de las órbitas poblacionales de Simulaciones.py
+# frente al número de pacientes: un Line2D por paciente (como antes), una
+# sola LineCollection y el histograma 2D de densidad. Usa el backend Agg, así
+# que no necesita pantalla.
+#
+#   python benchmarks/bench_orbitas.py
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import simular_cohorte
+from Simulaciones import generar_colores, dibujar_orbitas
+
+
+def una_linea_por_paciente(ax, sol, colores):
+    # Dibujo de `visualizar_poblacion` antes de `dibujar_orbitas`
+    for s, color in zip(sol, colores):
+        ax.plot(s[:, 0], s[:, 2], color=color, alpha=0.65)
+
+
+def cronometrar(dibujar, sol):
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=100)
+    inicio = time.perf_counter()
+    dibujar(ax, sol)
+    fig.canvas.draw()
+    tiempo = time.perf_counter() - inicio
+    plt.close(fig)
+    return tiempo
+
+
+def main(medicamento="Ibuprofeno", lista_n=(100, 1000, 5000, 20000), max_lineas=5000):
+    cohorte = simular_cohorte(medicamento, max(lista_n), dtype=np.float32)
+    print(f"{'pacientes':>9} {'Line2D (s)':>11} {'LineCollection (s)':>19} {'densidad (s)':>13}")
+    for n in lista_n:
+        sol = cohorte.sol[:n]
+        colores = generar_colores(n)
+        lineas = cronometrar(lambda ax, s: una_linea_por_paciente(ax, s, colores), sol) if n <= max_lineas else None
+        coleccion = cronometrar(lambda ax, s: dibujar_orbitas(ax, s, colores, umbral_densidad=n), sol)
+        densidad = cronometrar(lambda ax, s: dibujar_orbitas(ax, s, umbral_densidad=0), sol)
+        texto_lineas = f"{lineas:>11.2f}" if lineas is not None else f"{'-':>11}"
+        print(f"{n:>9} {texto_lineas} {coleccion:>19.2f} {densidad:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Entrena el sustituto de cada medicamento y compara el costo por paciente de
+# predecir con él (sólo métricas y con la curva C(t) completa) frente a
+# simular con el motor por lotes. Muestra también el tiempo de entrenamiento,
+# el de carga desde disco y el error medido.
+#
+#   python benchmarks/bench_sustituto.py
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import lista_medicamentos, muestrear_covariables, Cohorte
+from farmacocinetica.sustituto import Sustituto, entrenar_sustituto
+
+
+def microsegundos_por_paciente(funcion, n):
+    inicio = time.perf_counter()
+    funcion()
+    return 1e6 * (time.perf_counter() - inicio) / n
+
+
+def main(n_prediccion=1_000_000, n_curvas=10_000, n_ode=1000):
+    rng = np.random.default_rng(0)
+    print(f"{'medicamento':<12} {'entrenar (s)':>13} {'MB':>6} {'cargar (ms)':>12} {'ODE (µs)':>10} "
+          f"{'métricas (µs)':>14} {'curvas (µs)':>12} {'error Cmax':>11} {'error curva':>12}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for medicamento in lista_medicamentos:
+            inicio = time.perf_counter()
+            sustituto = entrenar_sustituto(medicamento)
+            t_entrenar = time.perf_counter() - inicio
+            ruta = os.path.join(carpeta, medicamento + '.npz')
+            sustituto.guardar(ruta)
+            inicio = time.perf_counter()
+            sustituto = Sustituto.cargar(ruta)
+            t_cargar = 1000 * (time.perf_counter() - inicio)
+
+            grande = Cohorte.desde_covariables(muestrear_covariables(rng, n_prediccion), medicamento)
+            mediana = Cohorte.desde_covariables(muestrear_covariables(rng, n_curvas), medicamento)
+            chica = Cohorte.desde_covariables(muestrear_covariables(rng, n_ode), medicamento)
+            ode = microsegundos_por_paciente(chica.simular, n_ode)
+            metricas = microsegundos_por_paciente(lambda: sustituto.predecir(grande), n_prediccion)
+            curvas = microsegundos_por_paciente(lambda: sustituto.predecir(mediana, curvas=True), n_curvas)
+            print(f"{medicamento:<12} {t_entrenar:>13.1f} {os.path.getsize(ruta) / 1e6:>6.1f} {t_cargar:>12.1f} "
+                  f"{ode:>10.0f} {metricas:>14.2f} {curvas:>12.1f} "
+                  f"{sustituto.error['cmax']['max']:>11.1e} {sustituto.error['curva']['max']:>12.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Genera las referencias de benchmarks/suite.py con el modelo original: las
+# funciones de Simulaciones.py tal como estaban en la primera revisión del
+# repositorio (odeint por paciente y por ciclo, sin Jacobiano ni motor por
+# lotes). La dosis única reproduce la llamada de ejecutar_simulacion de aquel
+# Farmacinetica.py: 500 puntos en 24 horas. Las métricas de las poblaciones se
+# calculan aquí directamente, sin `calcular_metricas`. Los casos de dibujo
+# sólo miden tiempo y no tienen referencia.
+#
+#   python benchmarks/generar_referencias.py
+#   python benchmarks/generar_referencias.py --revision <commit>
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import suite
+from suite import (RAIZ, COVARIABLES_PACIENTE, SEMILLA, TAMANOS_POBLACION, PASO_MUESTRA_LOTE, lista_medicamentos,
+                   lista_generos, lista_comorbilidades, lista_genetica, lista_alergia, muestrear_covariables,
+                   covariables_intervalo_escalar, covariables_intervalo_lote)
+
+
+_INTERFAZ = ('tkinter', 'matplotlib')
+
+
+def _es_literal(nodo):
+    try:
+        ast.literal_eval(nodo)
+        return True
+    except ValueError:
+        return False
+
+
+def cargar_modelo_original(revision):
+    """Funciones y constantes de Simulaciones.py en `revision`, sin la interfaz de Tk."""
+    fuente = subprocess.run(['git', 'show', f'{revision}:Simulaciones.py'], cwd=RAIZ, capture_output=True,
+                            text=True, check=True).stdout
+    arbol = ast.parse(fuente)
+    # Funciones, catálogos (asignaciones de literales) e importaciones que no son de la interfaz
+    arbol.body = [nodo for nodo in arbol.body
+                  if isinstance(nodo, ast.FunctionDef)
+                  or (isinstance(nodo, ast.Assign) and _es_literal(nodo.value))
+                  or (isinstance(nodo, ast.Import) and not any(a.name.startswith(_INTERFAZ) for a in nodo.names))
+                  or (isinstance(nodo, ast.ImportFrom) and not (nodo.module or '').startswith(_INTERFAZ))]
+    espacio = {}
+    exec(compile(arbol, f'{revision}:Simulaciones.py', 'exec'), espacio)
+    return espacio
+
+
+def parametros_originales(masa, altura, edad, genero, comorbilidad, genetica, alergia):
+    # Diccionario que armaban ejecutar_simulacion y simular_poblacion
+    imc = masa / (altura ** 2)
+    genetica_factor = 0.2 if genetica == "Metabolizador rápido" else (-0.2 if genetica == "Metabolizador lento" else 0)
+    alergia_factor = {"Alergia leve": 0.1, "Alergia moderada": 0.2, "Alergia severa": 0.3}.get(alergia, 0)
+    return {
+        'masa': masa, 'altura': altura, 'imc': imc, 'edad': edad, 'genero': genero,
+        'comorbilidad': comorbilidad, 'genetica': genetica, 'genetica_factor': genetica_factor,
+        'alergia': alergia, 'alergia_factor': alergia_factor, 'V_d': 0.6 * masa,
+        'k_a': 0.5 * (1 + 0.01 * imc), 'k_e': 0.3 * (1 - 0.01 * imc),
+    }
+
+
+def paciente_de_covariables(covariables, i):
+    return parametros_originales(float(covariables['masa'][i]), float(covariables['altura'][i]),
+                                 float(covariables['edad'][i]), lista_generos[covariables['genero'][i]],
+                                 lista_comorbilidades[covariables['comorbilidad'][i]],
+                                 lista_genetica[covariables['genetica'][i]], lista_alergia[covariables['alergia'][i]])
+
+
+def referencias(modelo):
+    from scipy.integrate import odeint
+
+    paciente = parametros_originales(*COVARIABLES_PACIENTE)
+    for medicamento in lista_medicamentos:
+        t = np.linspace(0, 24, 500)
+        sol = odeint(modelo['ecuaciones'], [0, 100, paciente['V_d']], t, args=(paciente, medicamento))
+        yield f'dosis_unica/{medicamento}', {'t': t, 'sol': sol}
+    for medicamento in lista_medicamentos:
+        t, sol, intervalo = modelo['simular_dosis_multiples'](paciente, medicamento)
+        yield f'dosis_multiples/{medicamento}', {'t': t, 'sol': sol, 'intervalo': np.array([intervalo])}
+
+    for n_pacientes in TAMANOS_POBLACION:
+        covariables = muestrear_covariables(np.random.default_rng(SEMILLA), n_pacientes)
+        metricas = {c: np.empty(n_pacientes) for c in ('intervalo', 'cmax', 'tmax', 'auc', 'valle')}
+        for i in range(n_pacientes):
+            t, sol, intervalo = modelo['simular_dosis_multiples'](paciente_de_covariables(covariables, i),
+                                                                 "Ibuprofeno")
+            C = sol[:, 0]
+            # Entre ciclos el instante se repite, así que el tramo de ancho cero no suma área
+            metricas['intervalo'][i] = intervalo
+            metricas['cmax'][i] = C.max()
+            metricas['tmax'][i] = t[np.argmax(C)]
+            metricas['auc'][i] = np.sum((C[1:] + C[:-1]) * np.diff(t)) / 2
+            metricas['valle'][i] = C[-1]
+        yield f'poblacion/{n_pacientes}', metricas
+
+    calcular = modelo['calcular_intervalo_dosificacion']
+    pacientes = [parametros_originales(*covariables) for covariables in covariables_intervalo_escalar()]
+    yield 'intervalo/escalar', {'intervalo': np.array([calcular(p, m) for m in lista_medicamentos for p in pacientes])}
+    covariables, medicamento = covariables_intervalo_lote()
+    filas = range(0, len(medicamento), PASO_MUESTRA_LOTE)
+    yield 'intervalo/lote', {'intervalo': np.array([calcular(paciente_de_covariables(covariables, i),
+                                                             lista_medicamentos[medicamento[i]]) for i in filas])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera las referencias de la suite con el modelo original.")
+    parser.add_argument('--revision', default=None,
+                        help="revisión de la que tomar Simulaciones.py (por defecto, la primera del repositorio)")
+    args = parser.parse_args(argv)
+    revision = args.revision or subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=RAIZ,
+                                               capture_output=True, text=True, check=True).stdout.split()[0]
+    modelo = cargar_modelo_original(revision)
+    for nombre, resultado in referencias(modelo):
+        suite.guardar_referencia(nombre, resultado)
+        print(f"{nombre:<28} {os.path.relpath(suite.ruta_referencia(nombre), RAIZ)}")
+
+
+if __name__ == "__main__":
+    main()
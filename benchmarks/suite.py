@@ -0,0 +1,295 @@
+# Suite de rendimiento y regresión numérica de los caminos críticos, sin
+# pantalla (backend Agg):
+#
+#   dosis_unica/<medicamento>      simular_dosis_unica, los seis medicamentos
+#   dosis_multiples/<medicamento>  simular_dosis_multiples, 5 dosis
+#   poblacion/<n>                  simular_cohorte con 100, 1000 y 10000 pacientes
+#   intervalo/escalar, intervalo/lote
+#                                  calcular_intervalo_dosificacion(_lote)
+#   dibujo/...                     las figuras de Farmacinetica.py y las órbitas
+#                                  de Simulaciones.py dibujadas en un lienzo Agg
+#
+# Cada caso se ejecuta `repeticiones` veces y se informa la mediana y el
+# mínimo. El resultado de la primera ejecución se compara con su referencia
+# en benchmarks/referencias/ (trayectorias completas en dosis única y
+# múltiple, métricas por paciente en las poblaciones). Las referencias
+# versionadas salen del modelo original de Simulaciones.py con
+# benchmarks/generar_referencias.py; una referencia que falta es un error. Los
+# tiempos se agregan a benchmarks/historial.jsonl con el commit actual y se
+# comparan con la última corrida del mismo caso en la misma máquina.
+#
+#   python benchmarks/suite.py                         todos los casos
+#   python benchmarks/suite.py -k dosis_unica          casos cuyo nombre contiene el texto
+#   python benchmarks/suite.py --actualizar-referencias
+#                                                      reemplaza las referencias (cambios intencionales del modelo)
+#   python benchmarks/suite.py --umbral 1.25           falla si algo es un 25 % más lento
+#
+# Sale con código 1 si algún resultado difiere de su referencia o no la
+# tiene o, con --umbral, si algún caso es más lento que en la corrida
+# anterior.
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import scipy
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from farmacocinetica import (lista_medicamentos, lista_generos, lista_comorbilidades, lista_genetica,
+                             lista_alergia, construir_parametros, calcular_intervalo_dosificacion,
+                             calcular_intervalo_dosificacion_lote, simular_dosis_unica, simular_dosis_multiples,
+                             simular_cohorte, muestrear_covariables, calcular_metricas, Cohorte)
+from Farmacinetica import FiguraDosisUnica, FiguraDosisMultiples
+from Simulaciones import dibujar_orbitas
+
+REFERENCIAS = os.path.join(RAIZ, 'benchmarks', 'referencias')
+HISTORIAL = os.path.join(RAIZ, 'benchmarks', 'historial.jsonl')
+
+# Entradas de los casos; generar_referencias.py las reutiliza con el modelo original
+COVARIABLES_PACIENTE = (70, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal", "Sin alergia")
+PACIENTE = construir_parametros(*COVARIABLES_PACIENTE)
+SEMILLA = 42
+TAMANOS_POBLACION = (100, 1000, 10000)
+PACIENTES_INTERVALO_LOTE = 1_000_000
+PASO_MUESTRA_LOTE = 100
+
+
+def covariables_intervalo_escalar():
+    return [(masa, 1.75, 40, lista_generos[0], comorbilidad, genetica, alergia)
+            for masa in (45, 70, 95) for comorbilidad in lista_comorbilidades
+            for genetica in lista_genetica for alergia in lista_alergia]
+
+
+def covariables_intervalo_lote():
+    """Covariables de la cohorte de `intervalo/lote`; los medicamentos se alternan por fila."""
+    covariables = muestrear_covariables(np.random.default_rng(SEMILLA), PACIENTES_INTERVALO_LOTE)
+    medicamento = np.arange(PACIENTES_INTERVALO_LOTE, dtype=np.int8) % len(lista_medicamentos)
+    return covariables, medicamento
+
+
+# nombre -> (preparar, repeticiones). `preparar()` hace lo que no se mide y
+# devuelve la función cronometrada, que devuelve un diccionario de arreglos
+# para comparar con la referencia o None si el caso sólo mide tiempo.
+CASOS = {}
+
+
+def caso(nombre, preparar, repeticiones=5):
+    CASOS[nombre] = (preparar, repeticiones)
+
+
+# ----- Casos -----
+def preparar_dosis_unica(medicamento):
+    def ejecutar():
+        t, sol = simular_dosis_unica(PACIENTE, medicamento)
+        return {'t': t, 'sol': sol}
+    return ejecutar
+
+
+def preparar_dosis_multiples(medicamento):
+    def ejecutar():
+        t, sol, intervalo = simular_dosis_multiples(PACIENTE, medicamento)
+        return {'t': t, 'sol': sol, 'intervalo': np.array([intervalo])}
+    return ejecutar
+
+
+def preparar_poblacion(n_pacientes):
+    def ejecutar():
+        cohorte = simular_cohorte("Ibuprofeno", n_pacientes, semilla=SEMILLA)
+        metricas = calcular_metricas(cohorte.t, cohorte.sol, cohorte.puntos_por_ciclo)
+        return {'intervalo': cohorte.intervalos, **{c: metricas[c] for c in ('cmax', 'tmax', 'auc', 'valle')}}
+    return ejecutar
+
+
+def preparar_intervalo_escalar():
+    pacientes = [construir_parametros(*covariables) for covariables in covariables_intervalo_escalar()]
+
+    def ejecutar():
+        return {'intervalo': np.array([calcular_intervalo_dosificacion(p, m) for m in lista_medicamentos
+                                       for p in pacientes])}
+    return ejecutar
+
+
+def preparar_intervalo_lote():
+    covariables, medicamento = covariables_intervalo_lote()
+    cohorte = Cohorte.desde_covariables(covariables, "Loratadina")
+    cohorte.medicamento = medicamento
+
+    def ejecutar():
+        intervalos = calcular_intervalo_dosificacion_lote(cohorte.medicamento, cohorte.comorbilidad,
+                                                          cohorte.genetica, cohorte.masa, cohorte.alergia)
+        # Una muestra regular basta para detectar cambios en la regla
+        return {'intervalo': intervalos[::PASO_MUESTRA_LOTE]}
+    return ejecutar
+
+
+def preparar_dibujo(clase, simular):
+    fig = Figure(figsize=clase.figsize, dpi=100)
+    FigureCanvasAgg(fig)
+    figura = clase(fig)
+    datos = simular()
+
+    def ejecutar():
+        figura.actualizar(*datos)
+        fig.canvas.draw()
+    return ejecutar
+
+
+def preparar_dibujo_orbitas(n_pacientes, umbral_densidad):
+    sol = simular_cohorte("Ibuprofeno", n_pacientes, dtype=np.float32).sol
+    fig = Figure(figsize=(10, 6), dpi=100)
+    FigureCanvasAgg(fig)
+
+    def ejecutar():
+        fig.clear()
+        dibujar_orbitas(fig.add_subplot(1, 1, 1), sol, umbral_densidad=umbral_densidad)
+        fig.canvas.draw()
+    return ejecutar
+
+
+for medicamento in lista_medicamentos:
+    caso(f'dosis_unica/{medicamento}', functools.partial(preparar_dosis_unica, medicamento))
+for medicamento in lista_medicamentos:
+    caso(f'dosis_multiples/{medicamento}', functools.partial(preparar_dosis_multiples, medicamento))
+for n, repeticiones in zip(TAMANOS_POBLACION, (5, 3, 1)):
+    caso(f'poblacion/{n}', functools.partial(preparar_poblacion, n), repeticiones)
+caso('intervalo/escalar', preparar_intervalo_escalar)
+caso('intervalo/lote', preparar_intervalo_lote)
+caso('dibujo/dosis_unica', functools.partial(
+    preparar_dibujo, FiguraDosisUnica,
+    lambda: simular_dosis_unica(PACIENTE, "Ibuprofeno") + ("Ibuprofeno",)))
+caso('dibujo/dosis_multiples', functools.partial(
+    preparar_dibujo, FiguraDosisMultiples,
+    lambda: simular_dosis_multiples(PACIENTE, "Ibuprofeno") + (5, 150, "Ibuprofeno")))
+caso('dibujo/orbitas_1000', functools.partial(preparar_dibujo_orbitas, 1000, 2000), 3)
+caso('dibujo/densidad_10000', functools.partial(preparar_dibujo_orbitas, 10000, 2000), 3)
+
+
+# ----- Referencias -----
+def guardar_referencia(nombre, resultado):
+    os.makedirs(REFERENCIAS, exist_ok=True)
+    np.savez_compressed(ruta_referencia(nombre), **resultado)
+
+
+def ruta_referencia(nombre):
+    return os.path.join(REFERENCIAS, nombre.replace('/', '__') + '.npz')
+
+
+def comparar_referencia(nombre, resultado, rtol, actualizar):
+    """Devuelve (estado, diferencia relativa máxima) frente a la referencia guardada."""
+    if resultado is None:
+        return '-', None
+    ruta = ruta_referencia(nombre)
+    if actualizar:
+        guardar_referencia(nombre, resultado)
+        return 'actualizada', None
+    if not os.path.exists(ruta):
+        return 'FALTA', None
+    with np.load(ruta) as referencia:
+        if set(referencia.files) != set(resultado):
+            return 'DIFERENTE', None
+        diferencia = 0.0
+        for clave, valor in resultado.items():
+            esperado = referencia[clave]
+            if esperado.shape != np.shape(valor):
+                return 'DIFERENTE', None
+            escala = max(np.max(np.abs(esperado), initial=0.0), 1e-300)
+            diferencia = max(diferencia, float(np.max(np.abs(valor - esperado), initial=0.0)) / escala)
+    return ('ok' if diferencia <= rtol else 'DIFERENTE'), diferencia
+
+
+# ----- Historial -----
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ultimas_corridas(maquina):
+    """Última mediana registrada de cada caso en esta máquina."""
+    ultimas = {}
+    if os.path.exists(HISTORIAL):
+        with open(HISTORIAL, encoding='utf-8') as f:
+            for linea in f:
+                registro = json.loads(linea)
+                if registro.get('maquina') == maquina:
+                    ultimas[registro['caso']] = registro
+    return ultimas
+
+
+def medir(preparar, repeticiones):
+    ejecutar = preparar()
+    tiempos, resultado = [], None
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = ejecutar()
+        tiempos.append(time.perf_counter() - inicio)
+        if i == 0:
+            resultado = salida
+    return np.median(tiempos), np.min(tiempos), resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento y regresión numérica.")
+    parser.add_argument('-k', dest='filtro', default='', help="sólo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--listar', action='store_true', help="lista los casos y sale")
+    parser.add_argument('--actualizar-referencias', action='store_true',
+                        help="reemplaza las referencias por los resultados actuales")
+    parser.add_argument('--rtol', type=float, default=1e-6,
+                        help="diferencia máxima admitida, relativa al máximo de cada arreglo")
+    parser.add_argument('--umbral', type=float, default=None,
+                        help="falla si la mediana supera este múltiplo de la corrida anterior")
+    parser.add_argument('--sin-historial', action='store_true', help="no agrega los tiempos al historial")
+    args = parser.parse_args(argv)
+
+    nombres = [n for n in CASOS if args.filtro in n]
+    if args.listar:
+        print("\n".join(nombres))
+        return 0
+
+    maquina = f"{platform.node()} ({platform.machine()})"
+    anteriores = ultimas_corridas(maquina)
+    commit = commit_actual()
+    fecha = datetime.datetime.now().isoformat(timespec='seconds')
+    registros, fallas = [], 0
+    print(f"{'caso':<28} {'mediana (ms)':>13} {'mínimo (ms)':>12} {'anterior':>9} {'referencia':>22}")
+    for nombre in nombres:
+        preparar, repeticiones = CASOS[nombre]
+        mediana, minimo, resultado = medir(preparar, repeticiones)
+        estado, diferencia = comparar_referencia(nombre, resultado, args.rtol, args.actualizar_referencias)
+        anterior = anteriores.get(nombre)
+        razon = mediana / anterior['mediana_s'] if anterior else None
+        lento = args.umbral is not None and razon is not None and razon > args.umbral
+        fallas += (estado in ('DIFERENTE', 'FALTA')) + lento
+        texto_razon = f"x{razon:.2f}" + (" !" if lento else "") if razon is not None else "-"
+        texto_estado = estado + (f" ({diferencia:.1e})" if diferencia is not None else "")
+        print(f"{nombre:<28} {1000 * mediana:>13.2f} {1000 * minimo:>12.2f} {texto_razon:>9} {texto_estado:>22}")
+        registros.append({'fecha': fecha, 'commit': commit, 'maquina': maquina, 'caso': nombre,
+                          'mediana_s': mediana, 'minimo_s': minimo, 'repeticiones': repeticiones,
+                          'python': platform.python_version(), 'numpy': np.__version__,
+                          'scipy': scipy.__version__, 'matplotlib': matplotlib.__version__})
+
+    if not args.sin_historial:
+        with open(HISTORIAL, 'a', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    if fallas:
+        print(f"\n{fallas} caso(s) con diferencias, sin referencia o más lentos que el umbral")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# Núcleo del simulador farmacocinético sin interfaz gráfica: no importa
+# tkinter ni matplotlib, así que puede usarse desde scripts por lotes y
+# procesos trabajadores. Las interfaces son Farmacinetica.py y Simulaciones.py.
+from .parametros import (lista_medicamentos, lista_generos, lista_comorbilidades,
+                         lista_genetica, lista_alergia, construir_parametros,
+                         parametros_a_arreglos)
+from .modelo import funcion_f, funcion_g, ecuaciones, compilar_modelo
+from .dosificacion import (INTERVALO_MINIMO, INTERVALO_MAXIMO, calcular_intervalo_dosificacion,
+                           calcular_intervalo_dosificacion_lote)
+from .estado_estacionario import (MEDICAMENTOS_CON_CICLO_LIMITE, metricas_ciclo,
+                                  simular_hasta_estado_estacionario, resolver_ciclo_periodico)
+from .malla import TOLERANCIA_MALLA, seleccionar_puntos
+from .simulacion import simular_dosis_unica, simular_regimen, simular_dosis_multiples
+from .cohorte import Cohorte, simular_cohorte
+from .metricas import calcular_metricas, tiempo_sobre_umbral
+from .estadisticas import Distribucion, interpolar_en_malla, simular_poblacion_resumen
+from .almacen import AlmacenTrayectorias, crear_almacen, simular_poblacion_en_disco
+from .muestreo import DISENOS, muestrear_diseno, estimar_poblacion
+from .optimizacion import INTERVALOS_CANDIDATOS, optimizar_regimen, optimizar_regimen_cohorte
+from .cache import CacheSimulaciones, canonizar_parametros
+from .barrido import BarridoDosisUnica
+from .tareas import Tarea, TareaCancelada
+from .poblacion import (funcion_f_lote, funcion_g_lote, ecuaciones_lote, muestrear_covariables,
+                        simular_dosis_multiples_lote, malla_adaptativa_lote, simular_poblacion,
+                        simular_poblacion_paralela)
@@ -0,0 +1,142 @@
+# ----- Almacén de trayectorias en disco -----
+# Para cohortes que no caben en RAM las trayectorias se escriben directamente
+# en archivos .npy mapeados en memoria. Un almacén es un directorio con:
+#
+#   metadatos.json     medicamento, forma, tipo y parámetros de la simulación
+#   trayectorias.npy   arreglo (N, T, 3) con C, D y V
+#   <columna>.npy      una columna por covariable (códigos int8 para las
+#                      categorías) e `intervalo`
+#
+# Los procesos trabajadores abren los mismos archivos en modo 'r+' y
+# escriben fragmentos disjuntos sin pasar las trayectorias por el proceso
+# principal. Para leer se usa `np.load(..., mmap_mode='r')`: los cortes son
+# vistas sobre el archivo y sólo se lee del disco lo que se toca.
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .dosificacion import INTERVALO_MAXIMO, calcular_intervalo_dosificacion_lote
+from .parametros import lista_medicamentos
+from .poblacion import muestrear_covariables, simular_dosis_multiples_lote, _tiempos_ciclos
+from .cohorte import Cohorte
+
+COLUMNAS_COVARIABLES = {
+    'masa': np.float64,
+    'altura': np.float64,
+    'edad': np.float64,
+    'genero': np.int8,
+    'comorbilidad': np.int8,
+    'genetica': np.int8,
+    'alergia': np.int8,
+    'intervalo': np.float64,
+}
+
+
+def _ruta_columna(ruta, columna):
+    return os.path.join(ruta, columna + '.npy')
+
+
+def crear_almacen(ruta, n_pacientes, medicamento, num_dosis=5, puntos_por_ciclo=150, dtype=np.float32,
+                  **metadatos):
+    """Crea los archivos vacíos del almacén con su tamaño final y devuelve el almacén en modo 'r+'."""
+    os.makedirs(ruta, exist_ok=True)
+    forma = (n_pacientes, num_dosis * puntos_por_ciclo, 3)
+    np.lib.format.open_memmap(_ruta_columna(ruta, 'trayectorias'), mode='w+', dtype=dtype, shape=forma).flush()
+    for columna, tipo in COLUMNAS_COVARIABLES.items():
+        np.lib.format.open_memmap(_ruta_columna(ruta, columna), mode='w+', dtype=tipo, shape=(n_pacientes,)).flush()
+    metadatos.update(medicamento=medicamento, n_pacientes=n_pacientes, num_dosis=num_dosis,
+                     puntos_por_ciclo=puntos_por_ciclo, dtype=np.dtype(dtype).name)
+    with open(os.path.join(ruta, 'metadatos.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, ensure_ascii=False, indent=2)
+    return AlmacenTrayectorias(ruta, modo='r+')
+
+
+class AlmacenTrayectorias:
+    """Acceso a un almacén creado con `crear_almacen` o `simular_poblacion_en_disco`.
+
+    `sol` y las columnas de `covariables` son `np.memmap`; leer un corte no
+    copia el archivo completo a memoria.
+    """
+
+    def __init__(self, ruta, modo='r'):
+        self.ruta = ruta
+        with open(os.path.join(ruta, 'metadatos.json'), encoding='utf-8') as f:
+            self.metadatos = json.load(f)
+        self.sol = np.load(_ruta_columna(ruta, 'trayectorias'), mmap_mode=modo)
+        self.covariables = {c: np.load(_ruta_columna(ruta, c), mmap_mode=modo) for c in COLUMNAS_COVARIABLES}
+
+    def __len__(self):
+        return self.sol.shape[0]
+
+    @property
+    def intervalos(self):
+        return self.covariables['intervalo']
+
+    def tiempos(self, inicio=0, fin=None):
+        """Tiempos (n, T) de los pacientes [inicio, fin), reconstruidos a partir de los intervalos."""
+        return _tiempos_ciclos(np.asarray(self.intervalos[inicio:fin], dtype=float),
+                               self.metadatos['num_dosis'], self.metadatos['puntos_por_ciclo'])
+
+    def fragmento(self, inicio=0, fin=None):
+        """Devuelve `(t, sol)` de los pacientes [inicio, fin); `sol` es una vista sobre el archivo."""
+        return self.tiempos(inicio, fin), self.sol[inicio:fin]
+
+    def cohorte(self, inicio=0, fin=None):
+        """Covariables de los pacientes [inicio, fin) como `Cohorte` (sin trayectorias)."""
+        columnas = {c: np.asarray(v[inicio:fin]) for c, v in self.covariables.items()}
+        cohorte = Cohorte.desde_covariables(columnas, self.metadatos['medicamento'])
+        cohorte.intervalos = columnas['intervalo']
+        return cohorte
+
+    def flush(self):
+        self.sol.flush()
+        for columna in self.covariables.values():
+            columna.flush()
+
+
+def _llenar_fragmento(ruta, inicio, medicamento, semilla, n_pacientes, num_dosis, puntos_por_ciclo,
+                      intervalo_maximo):
+    # Se ejecuta en el proceso trabajador: escribe su corte directamente en los archivos
+    almacen = AlmacenTrayectorias(ruta, modo='r+')
+    corte = slice(inicio, inicio + n_pacientes)
+    covariables = muestrear_covariables(np.random.default_rng(semilla), n_pacientes)
+    cohorte = Cohorte.desde_covariables(covariables, medicamento)
+    intervalos = calcular_intervalo_dosificacion_lote(cohorte.medicamento, cohorte.comorbilidad, cohorte.genetica,
+                                                      cohorte.masa, cohorte.alergia, intervalo_maximo)
+    simular_dosis_multiples_lote(cohorte.arreglos(), intervalos, num_dosis, puntos_por_ciclo,
+                                 salida=almacen.sol[corte])
+    for columna in COLUMNAS_COVARIABLES:
+        almacen.covariables[columna][corte] = intervalos if columna == 'intervalo' else covariables[columna]
+    almacen.flush()
+    return n_pacientes
+
+
+def simular_poblacion_en_disco(medicamento, ruta, n_pacientes=100, semilla=42, n_procesos=None,
+                               tamano_fragmento=1024, num_dosis=5, puntos_por_ciclo=150, dtype=np.float32,
+                               intervalo_maximo=INTERVALO_MAXIMO):
+    """Como `simular_poblacion_paralela`, pero escribe la cohorte en un almacén en `ruta`.
+
+    Con la misma `semilla` y `tamano_fragmento` la cohorte es la misma. Cada
+    fragmento lo escribe su trabajador en un corte disjunto de los archivos, y
+    la memoria usada no depende de `n_pacientes`. Devuelve el
+    `AlmacenTrayectorias` abierto en sólo lectura.
+    """
+    if medicamento not in lista_medicamentos:
+        raise ValueError(f"Medicamento desconocido: {medicamento}")
+    crear_almacen(ruta, n_pacientes, medicamento, num_dosis, puntos_por_ciclo, dtype,
+                  semilla=semilla, tamano_fragmento=tamano_fragmento, intervalo_maximo=intervalo_maximo)
+    inicios = list(range(0, n_pacientes, tamano_fragmento))
+    tamanos = [min(tamano_fragmento, n_pacientes - inicio) for inicio in inicios]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    argumentos = [(ruta, inicio, medicamento, s, n, num_dosis, puntos_por_ciclo, intervalo_maximo)
+                  for inicio, s, n in zip(inicios, semillas, tamanos)]
+
+    if n_procesos == 1:
+        for args in argumentos:
+            _llenar_fragmento(*args)
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            list(ejecutor.map(_llenar_fragmento, *zip(*argumentos)))
+    return AlmacenTrayectorias(ruta)
@@ -0,0 +1,99 @@
+# ----- Barrido interactivo de parámetros -----
+# El panel de barrido de Farmacinetica.py vuelve a simular la dosis única en
+# cada posición de los deslizadores. Cada solución se guarda en su celda de la
+# malla de masa, altura y edad (al paso de los deslizadores), agrupada por
+# medicamento y categorías. Mientras la posición nueva se simula en otro hilo,
+# `estimar` da una vista previa interpolando las celdas vecinas ya
+# calculadas: al arrastrar, la posición anterior está a uno o dos pasos, así
+# que la curva sigue al deslizador sin esperar a odeint y se reemplaza por la
+# exacta cuando ésta llega.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import CAMPOS_ENTRADA, canonizar_parametros
+from .simulacion import simular_dosis_unica
+
+# Vecinos que entran en la vista previa y distancia máxima, en pasos de los deslizadores
+VECINOS_ESTIMACION = 4
+RADIO_VECINOS = 10
+
+
+class BarridoDosisUnica:
+    """Soluciones de dosis única por celda de la malla `pasos` ({campo: paso}).
+
+    `simular` puede llamarse desde un hilo trabajador mientras la interfaz usa
+    `consultar` y `estimar`. `opciones` se pasan a `simular_dosis_unica`; todas
+    las soluciones comparten la malla de tiempos. Se conservan a lo sumo
+    `max_entradas` celdas, desalojando la usada hace más tiempo.
+    """
+
+    def __init__(self, pasos, max_entradas=1024, **opciones):
+        self.pasos = dict(pasos)
+        self.max_entradas = max_entradas
+        self.opciones = opciones
+        self._soluciones = OrderedDict()  # (grupo, celda) -> (t, sol)
+        self._celdas = {}                 # grupo -> {celda}
+        self._lock = threading.Lock()
+
+    def _clave(self, params, medicamento):
+        _, params = canonizar_parametros(params, self.pasos)
+        grupo = (medicamento, *(params[c] for c in CAMPOS_ENTRADA if c not in self.pasos))
+        celda = tuple(int(round(params[c] / paso)) for c, paso in self.pasos.items())
+        return grupo, celda, params
+
+    def consultar(self, params, medicamento):
+        """`(t, sol)` de la celda de `params` si ya se simuló, o None."""
+        grupo, celda, _ = self._clave(params, medicamento)
+        with self._lock:
+            resultado = self._soluciones.get((grupo, celda))
+            if resultado is not None:
+                self._soluciones.move_to_end((grupo, celda))
+            return resultado
+
+    def simular(self, params, medicamento):
+        """Simula la celda de `params` (si no estaba) y devuelve `(t, sol)`."""
+        grupo, celda, params = self._clave(params, medicamento)
+        resultado = self.consultar(params, medicamento)
+        if resultado is not None:
+            return resultado
+        t, sol = simular_dosis_unica(params, medicamento, **self.opciones)
+        t.flags.writeable = sol.flags.writeable = False
+        with self._lock:
+            self._soluciones[(grupo, celda)] = (t, sol)
+            self._celdas.setdefault(grupo, set()).add(celda)
+            while len(self._soluciones) > self.max_entradas:
+                (grupo_viejo, celda_vieja), _ = self._soluciones.popitem(last=False)
+                self._celdas[grupo_viejo].discard(celda_vieja)
+        return t, sol
+
+    def estimar(self, params, medicamento):
+        """Vista previa `(t, sol)` para `params` a partir de las celdas vecinas ya simuladas.
+
+        Pondera con 1/d las VECINOS_ESTIMACION celdas más cercanas del mismo
+        medicamento y categorías que estén a menos de RADIO_VECINOS pasos (con
+        dos vecinos a ambos lados es la interpolación lineal entre ellos).
+        Devuelve la solución exacta si la celda ya está, o None si no hay
+        vecinos.
+        """
+        resultado = self.consultar(params, medicamento)
+        if resultado is not None:
+            return resultado
+        grupo, celda, _ = self._clave(params, medicamento)
+        with self._lock:
+            celdas = list(self._celdas.get(grupo, ()))
+            if not celdas:
+                return None
+            distancia = np.linalg.norm(np.array(celdas) - np.array(celda), axis=1)
+            cercanas = np.argsort(distancia)[:VECINOS_ESTIMACION]
+            cercanas = cercanas[distancia[cercanas] <= RADIO_VECINOS]
+            if len(cercanas) == 0:
+                return None
+            vecinas = [self._soluciones[(grupo, celdas[i])] for i in cercanas]
+        pesos = 1 / distancia[cercanas]
+        sol = np.tensordot(pesos / pesos.sum(), np.stack([s for _, s in vecinas]), axes=1)
+        return vecinas[0][0], sol
+
+    def __len__(self):
+        return len(self._soluciones)
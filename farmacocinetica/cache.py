@@ -0,0 +1,159 @@
+# ----- Caché de simulaciones -----
+# Las interfaces y las corridas repetidas vuelven a resolver pacientes idénticos
+# (las categorías sólo toman unos pocos valores y masa, altura y edad suelen
+# venir redondeadas). La caché guarda los arreglos devueltos por las funciones
+# de simulación, como sólo lectura, en una LRU acotada por número de entradas
+# y por bytes, con un nivel opcional en disco (.npz) que sobrevive reinicios.
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from .parametros import construir_parametros
+from .simulacion import simular_dosis_unica, simular_dosis_multiples
+
+# Forma parte de la clave en disco: cambiarla invalida los resultados guardados
+# por versiones anteriores del modelo.
+VERSION_CACHE = 1
+
+CAMPOS_ENTRADA = ('masa', 'altura', 'edad', 'genero', 'comorbilidad', 'genetica', 'alergia')
+
+
+def _redondear(valor, paso):
+    return round(round(valor / paso) * paso, 12)
+
+
+def canonizar_parametros(params, cuantizacion=None):
+    """Devuelve `(clave, params)` para un paciente.
+
+    `cuantizacion` es un diccionario `{campo: paso}` (p. ej. `{'masa': 0.5,
+    'edad': 1}`); los campos indicados se redondean al múltiplo más cercano y
+    `params` se reconstruye con `construir_parametros`, de modo que todos los
+    pacientes que caen en la misma celda comparten clave y resultado.
+    """
+    if cuantizacion:
+        entradas = {c: params[c] for c in CAMPOS_ENTRADA}
+        for campo, paso in cuantizacion.items():
+            entradas[campo] = _redondear(float(entradas[campo]), paso)
+        params = construir_parametros(*(entradas[c] for c in CAMPOS_ENTRADA))
+    clave = tuple(sorted((k, float(v) if isinstance(v, (int, float, np.number)) else v)
+                         for k, v in params.items()))
+    return clave, params
+
+
+def _solo_lectura(resultado):
+    for valor in resultado:
+        if isinstance(valor, np.ndarray):
+            valor.flags.writeable = False
+    return resultado
+
+
+def _tamano(resultado):
+    return sum(v.nbytes for v in resultado if isinstance(v, np.ndarray))
+
+
+class CacheSimulaciones:
+    """LRU de resultados de simulación indexada por función, medicamento, paciente y opciones."""
+
+    def __init__(self, max_entradas=128, max_bytes=256 * 2 ** 20, cuantizacion=None, directorio=None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.cuantizacion = cuantizacion
+        self.directorio = directorio
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    # ----- Nivel en memoria -----
+    def _guardar(self, clave, resultado):
+        tamano = _tamano(resultado)
+        if tamano > self.max_bytes:
+            return
+        self._entradas[clave] = (resultado, tamano)
+        self._bytes += tamano
+        while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+            _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+            self._bytes -= tamano_viejo
+            self.desalojos += 1
+
+    # ----- Nivel en disco -----
+    def _ruta(self, clave):
+        resumen = hashlib.sha256(repr((VERSION_CACHE, clave)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, resumen[:32] + '.npz')
+
+    def _leer_disco(self, clave):
+        ruta = self._ruta(clave)
+        if not os.path.exists(ruta):
+            return None
+        try:
+            with np.load(ruta) as datos:
+                valores = [datos[f'arr_{i}'] for i in range(len(datos.files))]
+        except (OSError, ValueError):
+            return None
+        return tuple(v.item() if v.ndim == 0 else v for v in valores)
+
+    def _escribir_disco(self, clave, resultado):
+        # Se escribe a un temporal y se renombra para no dejar archivos a medias
+        fd, temporal = tempfile.mkstemp(suffix='.npz', dir=self.directorio)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, *resultado)
+            os.replace(temporal, self._ruta(clave))
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    # ----- Consulta -----
+    def llamar(self, funcion, params, medicamento, **opciones):
+        """Devuelve `funcion(params, medicamento, **opciones)` desde la caché si ya se calculó.
+
+        Los arreglos devueltos son de sólo lectura y pueden compartirse entre
+        llamadas; cópielos antes de modificarlos.
+        """
+        clave_params, params = canonizar_parametros(params, self.cuantizacion)
+        clave = (funcion.__name__, medicamento, clave_params, tuple(sorted(opciones.items())))
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return self._entradas[clave][0]
+
+        resultado = self._leer_disco(clave) if self.directorio is not None else None
+        if resultado is not None:
+            self.aciertos_disco += 1
+        else:
+            self.fallos += 1
+            resultado = tuple(funcion(params, medicamento, **opciones))
+            if self.directorio is not None:
+                self._escribir_disco(clave, resultado)
+        resultado = _solo_lectura(resultado)
+        self._guardar(clave, resultado)
+        return resultado
+
+    def simular_dosis_unica(self, params, medicamento, **opciones):
+        return self.llamar(simular_dosis_unica, params, medicamento, **opciones)
+
+    def simular_dosis_multiples(self, params, medicamento, **opciones):
+        return self.llamar(simular_dosis_multiples, params, medicamento, **opciones)
+
+    def estadisticas(self):
+        return {
+            'aciertos': self.aciertos,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'entradas': len(self._entradas),
+            'bytes': self._bytes,
+        }
+
+    def limpiar(self):
+        """Vacía el nivel en memoria (el disco se conserva) y reinicia los contadores."""
+        self._entradas.clear()
+        self._bytes = 0
+        self.aciertos = self.aciertos_disco = self.fallos = self.desalojos = 0
@@ -0,0 +1,172 @@
+# ----- Cohorte en columnas -----
+# `simular_poblacion` guarda un diccionario con cadenas por paciente y una
+# tupla (t, sol, intervalo) por paciente. `Cohorte` guarda lo mismo como
+# columnas NumPy: covariables numéricas en float64, categorías como códigos
+# int8 sobre los catálogos de `parametros`, y todas las trayectorias en un
+# único arreglo (N, T, 3) reservado de antemano. Los tiempos no se guardan:
+# se reconstruyen a partir de los intervalos.
+#
+# Memoria por paciente con 5 dosis x 150 puntos (T = 750), medida con
+# sys.getsizeof de forma recursiva:
+#
+#   simular_poblacion (dict + tupla, float64)    ~ 25.3 kB
+#   Cohorte, trayectorias float64                ~ 18.1 kB
+#   Cohorte, trayectorias float32                ~  9.1 kB
+#
+# De esos, covariables, columnas derivadas e intervalo ocupan 85 bytes; el
+# resto son las trayectorias (T x 3 x 8 o 4 bytes).
+import numpy as np
+
+from .dosificacion import INTERVALO_MAXIMO, calcular_intervalo_dosificacion_lote
+from .parametros import (lista_medicamentos, lista_generos, lista_comorbilidades, lista_genetica,
+                         lista_alergia, factor_genetica, factor_alergia, codificar)
+from .malla import TOLERANCIA_MALLA
+from .poblacion import muestrear_covariables, simular_dosis_multiples_lote, malla_adaptativa_lote, _tiempos_ciclos
+
+CATEGORIAS = {
+    'genero': lista_generos,
+    'comorbilidad': lista_comorbilidades,
+    'genetica': lista_genetica,
+    'alergia': lista_alergia,
+}
+_TABLA_GENETICA = np.array([factor_genetica.get(g, 0) for g in lista_genetica], dtype=float)
+_TABLA_ALERGIA = np.array([factor_alergia.get(a, 0) for a in lista_alergia], dtype=float)
+
+
+class Cohorte:
+    """Pacientes de una simulación poblacional como columnas NumPy.
+
+    `masa`, `altura` y `edad` son float64; `medicamento`, `genero`,
+    `comorbilidad`, `genetica` y `alergia` son códigos int8 sobre los
+    catálogos. Las columnas derivadas (`imc`, `genetica_factor`,
+    `alergia_factor`, `V_d`, `k_a`, `k_e`) se calculan de forma vectorizada
+    con las mismas fórmulas que `construir_parametros`.
+    """
+
+    def __init__(self, masa, altura, edad, genero, comorbilidad, genetica, alergia, medicamento):
+        self.masa = np.asarray(masa, dtype=float)
+        self.altura = np.asarray(altura, dtype=float)
+        self.edad = np.asarray(edad, dtype=float)
+        n = len(self.masa)
+        self.genero = np.asarray(genero, dtype=np.int8)
+        self.comorbilidad = np.asarray(comorbilidad, dtype=np.int8)
+        self.genetica = np.asarray(genetica, dtype=np.int8)
+        self.alergia = np.asarray(alergia, dtype=np.int8)
+        if isinstance(medicamento, str):
+            medicamento = [medicamento] * n
+        self.medicamento = codificar(medicamento, lista_medicamentos)
+
+        self.imc = self.masa / self.altura ** 2
+        self.genetica_factor = _TABLA_GENETICA[self.genetica]
+        self.alergia_factor = _TABLA_ALERGIA[self.alergia]
+        self.V_d = 0.6 * self.masa
+        self.k_a = 0.5 * (1 + 0.01 * self.imc)
+        self.k_e = 0.3 * (1 - 0.01 * self.imc)
+
+        self.intervalos = None
+        self.sol = None
+        self.num_dosis = None
+        self.puntos_por_ciclo = None
+        self.malla = None
+
+    @classmethod
+    def desde_covariables(cls, covariables, medicamento):
+        """Crea la cohorte a partir del diccionario de `muestrear_covariables`."""
+        return cls(covariables['masa'], covariables['altura'], covariables['edad'], covariables['genero'],
+                   covariables['comorbilidad'], covariables['genetica'], covariables['alergia'], medicamento)
+
+    @classmethod
+    def desde_pacientes(cls, pacientes, medicamento):
+        """Crea la cohorte a partir de una lista de diccionarios `params`."""
+        columnas = {c: [p[c] for p in pacientes] for c in ('masa', 'altura', 'edad')}
+        for c, catalogo in CATEGORIAS.items():
+            columnas[c] = codificar([p[c] for p in pacientes], catalogo)
+        return cls.desde_covariables(columnas, medicamento)
+
+    def __len__(self):
+        return len(self.masa)
+
+    def paciente(self, i):
+        """Diccionario `params` del paciente i, como el de `construir_parametros`.
+
+        La edad se devuelve como int, igual que la pasan las interfaces.
+        """
+        return {
+            'masa': float(self.masa[i]),
+            'altura': float(self.altura[i]),
+            'imc': float(self.imc[i]),
+            'edad': int(round(self.edad[i])),
+            'genero': lista_generos[self.genero[i]],
+            'comorbilidad': lista_comorbilidades[self.comorbilidad[i]],
+            'genetica': lista_genetica[self.genetica[i]],
+            'genetica_factor': float(self.genetica_factor[i]),
+            'alergia': lista_alergia[self.alergia[i]],
+            'alergia_factor': float(self.alergia_factor[i]),
+            'V_d': float(self.V_d[i]),
+            'k_a': float(self.k_a[i]),
+            'k_e': float(self.k_e[i]),
+        }
+
+    def arreglos(self):
+        """Columnas en el formato de `parametros_a_arreglos`."""
+        return {
+            'medicamento': self.medicamento,
+            'masa': self.masa,
+            'edad': self.edad,
+            'es_hombre': (self.genero == lista_generos.index("Hombre")).astype(float),
+            'comorbilidad': self.comorbilidad,
+            'genetica_factor': self.genetica_factor,
+            'alergia_factor': self.alergia_factor,
+            'V_d': self.V_d,
+            'k_a': self.k_a,
+            'k_e': self.k_e,
+        }
+
+    def calcular_intervalos(self, intervalo_maximo=INTERVALO_MAXIMO):
+        self.intervalos = calcular_intervalo_dosificacion_lote(self.medicamento, self.comorbilidad, self.genetica,
+                                                               self.masa, self.alergia, intervalo_maximo)
+        return self.intervalos
+
+    def simular(self, num_dosis=5, puntos_por_ciclo=150, dosis=100, dtype=np.float64, tamano_bloque=4096,
+                progreso=None, adaptativa=False, tol_malla=TOLERANCIA_MALLA):
+        """Simula dosis múltiples para toda la cohorte y guarda `sol` con el tipo `dtype`.
+
+        `tamano_bloque` y `progreso` se pasan a `simular_dosis_multiples_lote`.
+        Con `adaptativa` los ciclos se muestrean en la malla no uniforme de
+        `malla_adaptativa_lote`, de a lo sumo `puntos_por_ciclo` puntos, que
+        queda en `malla`.
+        """
+        if self.intervalos is None:
+            self.calcular_intervalos()
+        self.malla = None
+        if adaptativa:
+            self.malla = malla_adaptativa_lote(self.arreglos(), self.intervalos, num_dosis, puntos_por_ciclo, dosis,
+                                               tol_malla)
+            puntos_por_ciclo = len(self.malla)
+        self.num_dosis, self.puntos_por_ciclo = num_dosis, puntos_por_ciclo
+        self.sol = np.empty((len(self), num_dosis * puntos_por_ciclo, 3), dtype=dtype)
+        simular_dosis_multiples_lote(self.arreglos(), self.intervalos, num_dosis, puntos_por_ciclo, dosis,
+                                     tamano_bloque, salida=self.sol, progreso=progreso, malla=self.malla)
+        return self.sol
+
+    @property
+    def t(self):
+        """Tiempos (N, T) de las trayectorias, reconstruidos a partir de los intervalos (y de `malla`)."""
+        return _tiempos_ciclos(self.intervalos, self.num_dosis, self.puntos_por_ciclo, self.malla)
+
+    @property
+    def nbytes(self):
+        """Bytes de todas las columnas y trayectorias de la cohorte."""
+        return sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+
+def simular_cohorte(medicamento, n_pacientes=100, semilla=42, num_dosis=5, puntos_por_ciclo=150,
+                    dtype=np.float64, intervalo_maximo=INTERVALO_MAXIMO, tamano_bloque=4096, progreso=None,
+                    adaptativa=False):
+    """Sortea y simula una cohorte con `muestrear_covariables`; devuelve la `Cohorte`."""
+    covariables = muestrear_covariables(np.random.default_rng(semilla), n_pacientes)
+    cohorte = Cohorte.desde_covariables(covariables, medicamento)
+    cohorte.calcular_intervalos(intervalo_maximo)
+    cohorte.simular(num_dosis, puntos_por_ciclo, dtype=dtype, tamano_bloque=tamano_bloque, progreso=progreso,
+                    adaptativa=adaptativa)
+    return cohorte
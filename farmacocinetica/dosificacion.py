@@ -0,0 +1,89 @@
+import numpy as np
+
+from .parametros import (lista_medicamentos, lista_comorbilidades, lista_genetica, lista_alergia,
+                         codificar)
+
+# Simulaciones.py siempre usó 24 h como tope; Farmacinetica.py pasa 48 h.
+INTERVALO_MINIMO = 4
+INTERVALO_MAXIMO = 24
+
+# Fuera de [MASA_BAJA, MASA_ALTA] kg el intervalo se ajusta un 5 %
+MASA_BAJA = 50
+MASA_ALTA = 90
+
+intervalos_base = {
+    "Ibuprofeno": 6,
+    "Paracetamol": 6,
+    "Aspirina": 6,
+    "Amoxicilina": 8,
+    "Metformina": 12,
+    "Loratadina": 24
+}
+INTERVALO_BASE_DESCONOCIDO = 8
+
+def calcular_intervalo_dosificacion(params, medicamento, intervalo_maximo=INTERVALO_MAXIMO):
+    intervalo = intervalos_base.get(medicamento, INTERVALO_BASE_DESCONOCIDO)
+    if params['comorbilidad'] == "Insuficiencia renal":
+        if medicamento in ["Metformina", "Amoxicilina"]:
+            intervalo *= 1.5
+    if params['comorbilidad'] == "Insuficiencia hepática":
+        if medicamento in ["Paracetamol", "Ibuprofeno"]:
+            intervalo *= 1.3
+    if params['genetica'] == "Metabolizador rápido":
+        intervalo *= 0.9
+    elif params['genetica'] == "Metabolizador lento":
+        intervalo *= 1.1
+    if params['masa'] > MASA_ALTA:
+        intervalo *= 0.95
+    elif params['masa'] < MASA_BAJA:
+        intervalo *= 1.05
+    if medicamento == "Loratadina":
+        if params['alergia'] == "Alergia leve":
+            intervalo *= 1.1
+        elif params['alergia'] == "Alergia moderada":
+            intervalo *= 1.2
+        elif params['alergia'] == "Alergia severa":
+            intervalo *= 1.3
+    intervalo = max(INTERVALO_MINIMO, min(intervalo, intervalo_maximo))
+    return intervalo
+
+
+# ----- Versión vectorizada -----
+# Tablas indexadas por código de catálogo (ver `parametros`). Cada ajuste se
+# aplica como una multiplicación por un factor 1.0 o el de la regla, en el
+# mismo orden que la versión escalar, así que el resultado es idéntico bit a bit.
+_BASE = np.array([intervalos_base.get(m, INTERVALO_BASE_DESCONOCIDO) for m in lista_medicamentos]
+                 + [INTERVALO_BASE_DESCONOCIDO], dtype=float)  # el código -1 cae en la última fila
+_RENAL = np.isin(lista_medicamentos + [None], ["Metformina", "Amoxicilina"])
+_HEPATICA = np.isin(lista_medicamentos + [None], ["Paracetamol", "Ibuprofeno"])
+_FACTOR_GENETICA = np.array([0.9 if g == "Metabolizador rápido" else (1.1 if g == "Metabolizador lento" else 1.0)
+                             for g in lista_genetica] + [1.0])
+_FACTOR_ALERGIA = np.array([{"Alergia leve": 1.1, "Alergia moderada": 1.2, "Alergia severa": 1.3}.get(a, 1.0)
+                            for a in lista_alergia] + [1.0])
+_INSUFICIENCIA_RENAL = lista_comorbilidades.index("Insuficiencia renal")
+_INSUFICIENCIA_HEPATICA = lista_comorbilidades.index("Insuficiencia hepática")
+_LORATADINA = lista_medicamentos.index("Loratadina")
+
+
+def calcular_intervalo_dosificacion_lote(medicamento, comorbilidad, genetica, masa, alergia,
+                                         intervalo_maximo=INTERVALO_MAXIMO, intervalo_minimo=INTERVALO_MINIMO):
+    """Versión por columnas de `calcular_intervalo_dosificacion` para toda una cohorte.
+
+    `medicamento` es un nombre común o un arreglo de códigos; `comorbilidad`,
+    `genetica` y `alergia` son códigos enteros sobre los catálogos (-1 si la
+    categoría no existe) y `masa` un arreglo en kg. El intervalo se recorta a
+    [intervalo_minimo, intervalo_maximo].
+    """
+    masa = np.asarray(masa, dtype=float)
+    if isinstance(medicamento, str):
+        medicamento = np.full(masa.shape, codificar([medicamento], lista_medicamentos)[0])
+    medicamento = np.asarray(medicamento)
+    comorbilidad = np.asarray(comorbilidad)
+
+    intervalo = _BASE[medicamento]
+    intervalo *= np.where((comorbilidad == _INSUFICIENCIA_RENAL) & _RENAL[medicamento], 1.5, 1.0)
+    intervalo *= np.where((comorbilidad == _INSUFICIENCIA_HEPATICA) & _HEPATICA[medicamento], 1.3, 1.0)
+    intervalo *= _FACTOR_GENETICA[genetica]
+    intervalo *= np.where(masa > MASA_ALTA, 0.95, np.where(masa < MASA_BAJA, 1.05, 1.0))
+    intervalo *= np.where(medicamento == _LORATADINA, _FACTOR_ALERGIA[alergia], 1.0)
+    return np.clip(intervalo, intervalo_minimo, intervalo_maximo)
@@ -0,0 +1,205 @@
+# ----- Estadísticas poblacionales en flujo -----
+# Para cohortes grandes no hace falta guardar las trayectorias: cada fragmento
+# de pacientes se simula, se resume en acumuladores de memoria fija y se
+# descarta. Los acumuladores guardan momentos (Welford/Chan), mínimo, máximo
+# e histogramas con bordes fijos, de los que se interpolan los cuantiles; se
+# pueden combinar, así que los fragmentos se resumen en procesos separados y
+# el resultado no depende del número de procesos.
+#
+# Con los bordes por defecto (1000 intervalos logarítmicos entre 1e-6 y 1e4)
+# cada intervalo abarca un 2.3 % del valor, y el cuantil interpolado queda
+# dentro de ese margen del cuantil exacto de la muestra. La memoria no depende
+# del número de pacientes: ~2.4 MB de histogramas para la malla de 300 puntos
+# más las trayectorias de un fragmento (~18 MB para 1024 pacientes).
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cohorte import Cohorte
+from .dosificacion import INTERVALO_MAXIMO
+from .metricas import calcular_metricas
+from .poblacion import muestrear_covariables
+
+CUANTILES = (0.05, 0.5, 0.95)
+
+
+def bordes_logaritmicos(minimo=1e-6, maximo=1e4, n=1000):
+    return np.geomspace(minimo, maximo, n)
+
+
+class Distribucion:
+    """Acumulador de memoria fija de una variable (o de una por cada elemento de `forma`).
+
+    `agregar` recibe valores de forma (m,) + forma e ignora los NaN. Los
+    valores por debajo del primer borde o por encima del último caen en dos
+    intervalos extra acotados por el mínimo y el máximo observados.
+    """
+
+    def __init__(self, bordes, forma=()):
+        self.bordes = np.asarray(bordes, dtype=float)
+        self.forma = tuple(forma)
+        self.conteos = np.zeros(self.forma + (len(self.bordes) + 1,), dtype=np.int64)
+        self.n = np.zeros(self.forma, dtype=np.int64)
+        self.media = np.zeros(self.forma)
+        self.m2 = np.zeros(self.forma)
+        self.minimo = np.full(self.forma, np.inf)
+        self.maximo = np.full(self.forma, -np.inf)
+
+    def _combinar_momentos(self, n, media, m2, minimo, maximo):
+        total = self.n + n
+        con_datos = total > 0
+        delta = media - self.media
+        peso = np.divide(n, total, out=np.zeros(self.forma), where=con_datos)
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * peso
+        self.media = self.media + delta * peso
+        self.n = total
+        self.minimo = np.fmin(self.minimo, minimo)
+        self.maximo = np.fmax(self.maximo, maximo)
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        validos = ~np.isnan(valores)
+        n = validos.sum(axis=0)
+        ceros = np.where(validos, valores, 0.0)
+        media = np.divide(ceros.sum(axis=0), n, out=np.zeros(self.forma), where=n > 0)
+        m2 = np.where(validos, (valores - media) ** 2, 0.0).sum(axis=0)
+        with np.errstate(all='ignore'):
+            minimo = np.nanmin(np.where(validos, valores, np.inf), axis=0)
+            maximo = np.nanmax(np.where(validos, valores, -np.inf), axis=0)
+        self._combinar_momentos(n, media, m2, minimo, maximo)
+
+        n_intervalos = len(self.bordes) + 1
+        indices = np.searchsorted(self.bordes, ceros, side='right')
+        indices = indices + n_intervalos * np.arange(int(np.prod(self.forma, dtype=np.int64))).reshape(self.forma)
+        self.conteos += np.bincount(indices[validos], minlength=self.conteos.size).reshape(self.conteos.shape)
+
+    def combinar(self, otra):
+        self._combinar_momentos(otra.n, otra.media, otra.m2, otra.minimo, otra.maximo)
+        self.conteos += otra.conteos
+        return self
+
+    @property
+    def desviacion(self):
+        return np.sqrt(np.divide(self.m2, self.n - 1, out=np.full(self.forma, np.nan), where=self.n > 1))
+
+    def cuantiles(self, q=CUANTILES):
+        """Cuantiles interpolados linealmente dentro de cada intervalo del histograma."""
+        acumulado = np.cumsum(self.conteos, axis=-1)
+        izquierdos = np.concatenate([[-np.inf], self.bordes])
+        derechos = np.concatenate([self.bordes, [np.inf]])
+        resultado = {}
+        for cuantil in q:
+            objetivo = cuantil * self.n
+            k = np.argmax(acumulado >= np.maximum(objetivo, 1)[..., None], axis=-1)
+            previo = np.where(k > 0, np.take_along_axis(acumulado, np.maximum(k - 1, 0)[..., None], -1)[..., 0], 0)
+            en_k = np.take_along_axis(self.conteos, k[..., None], -1)[..., 0]
+            izquierdo = np.maximum(izquierdos[k], self.minimo)
+            derecho = np.minimum(derechos[k], self.maximo)
+            fraccion = np.divide(objetivo - previo, en_k, out=np.zeros(self.forma), where=en_k > 0)
+            with np.errstate(invalid='ignore'):  # instantes sin datos: se descartan abajo
+                valor = izquierdo + np.clip(fraccion, 0, 1) * (derecho - izquierdo)
+            resultado[cuantil] = np.where(self.n > 0, valor, np.nan)
+        return resultado
+
+    def resumen(self, q=CUANTILES):
+        return {
+            'n': self.n,
+            'media': self.media,
+            'desviacion': self.desviacion,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'cuantiles': self.cuantiles(q),
+        }
+
+
+# ----- Resumen de trayectorias -----
+def interpolar_en_malla(C, intervalos, num_dosis, puntos_por_ciclo, malla):
+    """Interpola C (N, T) de la malla por ciclos de cada paciente a una malla común.
+
+    Los instantes posteriores al final de la simulación de un paciente quedan en NaN.
+    """
+    intervalos = intervalos[:, None]
+    ciclo = np.minimum(np.floor(malla / intervalos), num_dosis - 1)
+    s = (malla - ciclo * intervalos) / intervalos * (puntos_por_ciclo - 1)
+    j = np.minimum(np.floor(s), puntos_por_ciclo - 2)
+    fraccion = s - j
+    indice = (ciclo * puntos_por_ciclo + j).astype(np.intp)
+    indice = np.clip(indice, 0, C.shape[1] - 2)
+    izquierdo = np.take_along_axis(C, indice, axis=1)
+    derecho = np.take_along_axis(C, indice + 1, axis=1)
+    valores = izquierdo + fraccion * (derecho - izquierdo)
+    return np.where(malla <= num_dosis * intervalos * (1 + 1e-12), valores, np.nan)
+
+
+def _acumuladores(malla, intervalo_maximo):
+    t_final = malla[-1]
+    return {
+        'C': Distribucion(bordes_logaritmicos(), forma=(len(malla),)),
+        'cmax': Distribucion(bordes_logaritmicos()),
+        'tmax': Distribucion(np.linspace(0, t_final, 1001)),
+        'auc': Distribucion(bordes_logaritmicos(1e-4, 1e6)),
+        'valle': Distribucion(bordes_logaritmicos()),
+        'intervalo': Distribucion(np.linspace(0, intervalo_maximo, 1001)),
+    }
+
+
+def _resumir_fragmento(medicamento, semilla, n_pacientes, num_dosis, puntos_por_ciclo, malla,
+                       intervalo_maximo):
+    # Se ejecuta en el proceso trabajador: simula, resume y descarta las trayectorias
+    cohorte = Cohorte.desde_covariables(muestrear_covariables(np.random.default_rng(semilla), n_pacientes),
+                                        medicamento)
+    cohorte.calcular_intervalos(intervalo_maximo)
+    cohorte.simular(num_dosis, puntos_por_ciclo)
+    metricas = calcular_metricas(cohorte.t, cohorte.sol, puntos_por_ciclo)
+
+    acumuladores = _acumuladores(malla, intervalo_maximo)
+    acumuladores['C'].agregar(interpolar_en_malla(cohorte.sol[:, :, 0], cohorte.intervalos, num_dosis,
+                                                  puntos_por_ciclo, malla))
+    for clave in ('cmax', 'tmax', 'auc', 'valle'):
+        acumuladores[clave].agregar(metricas[clave])
+    acumuladores['intervalo'].agregar(cohorte.intervalos)
+    return acumuladores
+
+
+def simular_poblacion_resumen(medicamento, n_pacientes=100, semilla=42, n_procesos=1, tamano_fragmento=1024,
+                              num_dosis=5, puntos_por_ciclo=150, puntos_malla=300,
+                              intervalo_maximo=INTERVALO_MAXIMO, cuantiles=CUANTILES):
+    """Simula una cohorte por fragmentos y devuelve sólo estadísticas, con memoria constante.
+
+    La cohorte es la misma que la de `simular_poblacion_paralela` con la
+    misma `semilla` y `tamano_fragmento`. Devuelve un diccionario con:
+
+      't'       malla común de 0 a num_dosis * intervalo_maximo horas
+      'n'       pacientes que llegan a cada instante de la malla
+      'bandas'  {cuantil: C en la malla} (por defecto P5, P50 y P95)
+      'cmax', 'tmax', 'auc', 'valle', 'intervalo'
+                resúmenes con n, media, desviacion, minimo, maximo y cuantiles
+
+    Las métricas son las de `calcular_metricas`. `n_procesos` funciona
+    como en `simular_poblacion_paralela` (1 no crea procesos).
+    """
+    malla = np.linspace(0, num_dosis * intervalo_maximo, puntos_malla)
+    tamanos = [min(tamano_fragmento, n_pacientes - inicio) for inicio in range(0, n_pacientes, tamano_fragmento)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    argumentos = [(medicamento, s, n, num_dosis, puntos_por_ciclo, malla, intervalo_maximo)
+                  for s, n in zip(semillas, tamanos)]
+
+    total = _acumuladores(malla, intervalo_maximo)
+
+    def combinar(parciales):
+        # Se combinan en orden de fragmento para que el resultado no dependa de n_procesos
+        for parcial in parciales:
+            for clave, acumulador in total.items():
+                acumulador.combinar(parcial[clave])
+
+    if n_procesos == 1:
+        combinar(_resumir_fragmento(*args) for args in argumentos)
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            combinar(ejecutor.map(_resumir_fragmento, *zip(*argumentos)))
+
+    resumen = {clave: total[clave].resumen(cuantiles) for clave in ('cmax', 'tmax', 'auc', 'valle', 'intervalo')}
+    resumen['t'] = malla
+    resumen['n'] = total['C'].n
+    resumen['bandas'] = total['C'].cuantiles(cuantiles)
+    return resumen
@@ -0,0 +1,144 @@
+# ----- Estado estacionario periódico -----
+# Con dosis repetidas cada `intervalo` horas la trayectoria tiende a un ciclo
+# límite. Hay dos formas de llegar a él:
+#
+#   - simular ciclo a ciclo y parar cuando el valle y el pico de C están
+#     cerca de su límite extrapolado (sirve para todos los medicamentos);
+#   - resolver directamente el punto fijo del mapa de un ciclo
+#     y_k+1 = Φ(y_k) + (0, dosis, 0) con Newton (método de disparo), sin
+#     simular el transitorio.
+#
+# El disparo sólo tiene sentido si el mapa de un ciclo es el mismo en todos
+# los ciclos, es decir, si el modelo no depende de t. Ibuprofeno, Loratadina y
+# Metformina (g) y Aspirina (f) tienen términos en t, así que su "ciclo
+# límite" se desplaza con el tiempo y sólo se puede aproximar con el detector;
+# en Ibuprofeno y Metformina la razón entre cambios sucesivos tiende a 1 y el
+# detector suele terminar en `max_dosis` con convergido=False.
+# Paracetamol es autónomo, pero su eliminación logarítmica del depósito
+# (dD/dt = -c log(D + 1)) sitúa el equilibrio en D ~ e^(dosis / (c intervalo)),
+# del orden de 1e10: un punto fijo mal condicionado (dΦ_D/dD ≈ 1) que ningún
+# régimen real alcanza, así que también queda para el detector.
+import numpy as np
+from scipy.integrate import odeint
+
+from .dosificacion import calcular_intervalo_dosificacion
+from .modelo import compilar_modelo
+
+MEDICAMENTOS_CON_CICLO_LIMITE = ("Amoxicilina",)
+
+
+def metricas_ciclo(t, C):
+    """Valle, pico, instante del pico y AUC (trapecios) de C sobre un ciclo."""
+    i_pico = int(np.argmax(C))
+    return {
+        'valle': float(np.min(C)),
+        'pico': float(C[i_pico]),
+        't_pico': float(t[i_pico]),
+        'auc': float(np.sum((C[1:] + C[:-1]) * np.diff(t)) / 2),
+    }
+
+
+# ----- Detector por ciclos -----
+# Cerca del ciclo límite valle y pico se acercan a su límite de forma
+# geométrica, x_k ≈ x* + c r^k, y el cambio entre dos ciclos seguidos
+# subestima la distancia al límite en un factor (1 - r) / r: con r ≈ 0.87
+# (Amoxicilina con insuficiencia renal) parar cuando el cambio es < 1e-3
+# deja el valle a un 0.35 % del estado estacionario. Con tres ciclos se
+# estima r y el límite por extrapolación de Aitken, y se para cuando la
+# distancia del último ciclo a ese límite es menor que `tol`.
+def _distancia_al_limite(x0, x1, x2):
+    # |x* - x2| / |x*| con x* = x2 + d2 r / (1 - r) (Aitken Δ²); inf si no
+    # hay tres ciclos o la sucesión no se contrae (r fuera de (-1, 1))
+    if x0 is None:
+        return np.inf
+    d1, d2 = x1 - x0, x2 - x1
+    if d2 == 0:
+        return 0.0
+    r = d2 / d1 if d1 != 0 else np.inf
+    if not abs(r) < 1:
+        return np.inf
+    limite = x2 + d2 * r / (1 - r)
+    return abs(limite - x2) / max(abs(limite), 1e-12)
+
+
+def simular_hasta_estado_estacionario(params, medicamento, intervalo=None, puntos_por_ciclo=150, dosis=100,
+                                      tol=1e-3, max_dosis=200):
+    """Simula ciclos hasta que el valle y el pico de C están a menos de `tol` (relativo) de su límite.
+
+    El límite de cada uno se estima con la extrapolación de Aitken de los
+    tres últimos ciclos. Devuelve `(t, sol, intervalo, metricas)`;
+    `metricas` describe el último ciclo e incluye `num_dosis` y `convergido`
+    (False si se alcanzó `max_dosis` sin converger).
+    """
+    if intervalo is None:
+        intervalo = calcular_intervalo_dosificacion(params, medicamento)
+    rhs, jac = compilar_modelo(params, medicamento)
+    y0 = np.array([0, dosis, params['V_d']], dtype=float)
+    t_list, sol_list = [], []
+    anteriores = [None, None]
+    convergido = False
+    for ciclo in range(max_dosis):
+        t = np.linspace(ciclo * intervalo, (ciclo + 1) * intervalo, puntos_por_ciclo)
+        sol = odeint(rhs, y0, t, Dfun=jac)
+        t_list.append(t)
+        sol_list.append(sol)
+        metricas = metricas_ciclo(t, sol[:, 0])
+        if anteriores[1] is not None:
+            distancia = max(_distancia_al_limite(*(a and a[m] for a in anteriores), metricas[m])
+                            for m in ('valle', 'pico'))
+            if distancia < tol:
+                convergido = True
+                break
+        anteriores = [anteriores[1], metricas]
+        y0 = sol[-1].copy()
+        y0[1] += dosis
+    metricas['num_dosis'] = len(t_list)
+    metricas['convergido'] = convergido
+    return np.concatenate(t_list), np.concatenate(sol_list, axis=0), intervalo, metricas
+
+
+# ----- Método de disparo -----
+def _mapa_ciclo(rhs, jac, y0, intervalo):
+    # Integra un ciclo junto con las ecuaciones variacionales dS/dt = J S,
+    # S(0) = I, para obtener Φ(y0) y su matriz de monodromía dΦ/dy0.
+    def aumentado(z, t):
+        y, S = z[:3], z[3:].reshape(3, 3)
+        return np.concatenate([rhs(y, t), (np.array(jac(y, t)) @ S).ravel()])
+
+    z = odeint(aumentado, np.concatenate([y0, np.eye(3).ravel()]), [0, intervalo], rtol=1e-11, atol=1e-11)[-1]
+    return z[:3], z[3:].reshape(3, 3)
+
+
+def resolver_ciclo_periodico(params, medicamento, intervalo=None, puntos_por_ciclo=150, dosis=100,
+                             tol=1e-10, max_iter=50):
+    """Encuentra el ciclo límite de un régimen periódico sin simular el transitorio.
+
+    Resuelve con Newton el estado tras la dosis y* = Φ(y*) + (0, dosis, 0)
+    y devuelve `(t, sol, intervalo, metricas)` de ese ciclo, con t en
+    [0, intervalo]. Sólo para `MEDICAMENTOS_CON_CICLO_LIMITE`.
+    """
+    if medicamento not in MEDICAMENTOS_CON_CICLO_LIMITE:
+        raise ValueError(f"{medicamento} no tiene un ciclo límite alcanzable; use simular_hasta_estado_estacionario")
+    if intervalo is None:
+        intervalo = calcular_intervalo_dosificacion(params, medicamento)
+    rhs, jac = compilar_modelo(params, medicamento)
+    bolo = np.array([0, dosis, 0], dtype=float)
+    y = np.array([0, dosis, params['V_d']], dtype=float)
+    for iteracion in range(max_iter):
+        fin, monodromia = _mapa_ciclo(rhs, jac, y, intervalo)
+        residuo = fin + bolo - y
+        if np.max(np.abs(residuo) / np.maximum(np.abs(y), 1.0)) < tol:
+            break
+        paso = np.linalg.solve(np.eye(3) - monodromia, residuo)
+        # Amortiguado para no salir del dominio del modelo (D > 0, V > 0)
+        while np.any((y + paso)[1:] <= 0):
+            paso /= 2
+        y = y + paso
+    else:
+        raise RuntimeError(f"El método de disparo no convergió en {max_iter} iteraciones")
+
+    t = np.linspace(0, intervalo, puntos_por_ciclo)
+    sol = odeint(rhs, y, t, Dfun=jac)
+    metricas = metricas_ciclo(t, sol[:, 0])
+    metricas['iteraciones'] = iteracion + 1
+    return t, sol, intervalo, metricas
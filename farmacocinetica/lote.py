@@ -0,0 +1,236 @@
+# Ejecución por lotes de escenarios de pacientes desde CSV o Parquet.
+#
+#   python -m farmacocinetica.lote pacientes.csv resumen.csv --modo multiple --trayectorias tray.csv
+#
+# Las filas se leen y simulan por bloques de tamaño fijo y cada bloque se
+# escribe (y se vacía a disco) antes de leer el siguiente, de modo que la
+# memoria no depende del tamaño de la entrada.
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from .dosificacion import INTERVALO_MAXIMO, calcular_intervalo_dosificacion_lote
+from .parametros import (lista_medicamentos, lista_generos, lista_comorbilidades, lista_genetica, lista_alergia,
+                         construir_parametros, parametros_a_arreglos, codificar)
+from .metricas import calcular_metricas
+from .poblacion import simular_dosis_multiples_lote
+
+COLUMNAS_NUMERICAS = ['masa', 'altura', 'edad']
+# Valor por defecto (el mismo que muestra la interfaz) si la columna falta o la celda está vacía
+COLUMNAS_CATEGORICAS = {
+    'genero': lista_generos[0],
+    'comorbilidad': lista_comorbilidades[0],
+    'genetica': lista_genetica[0],
+    'alergia': lista_alergia[0],
+}
+CATALOGOS = {
+    'genero': lista_generos,
+    'comorbilidad': lista_comorbilidades,
+    'genetica': lista_genetica,
+    'alergia': lista_alergia,
+}
+COLUMNAS_RESUMEN = ['paciente', 'medicamento', 'intervalo', 'cmax', 'tmax', 'auc', 'valle', 'razon_acumulacion']
+COLUMNAS_TRAYECTORIA = ['paciente', 't', 'C', 'D', 'V']
+
+
+def _es_parquet(ruta):
+    return os.path.splitext(ruta)[1].lower() in ('.parquet', '.pq')
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Leer o escribir Parquet requiere pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+# ----- Lectura por bloques -----
+def leer_bloques(ruta, tamano_bloque=1000):
+    """Genera bloques de filas como listas de diccionarios `{columna: valor}`."""
+    if _es_parquet(ruta):
+        pyarrow = _importar_pyarrow()
+        archivo = pyarrow.parquet.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque):
+            yield lote.to_pylist()
+        return
+
+    with open(ruta, newline='', encoding='utf-8') as f:
+        bloque = []
+        for fila in csv.DictReader(f):
+            bloque.append(fila)
+            if len(bloque) == tamano_bloque:
+                yield bloque
+                bloque = []
+        if bloque:
+            yield bloque
+
+
+# ----- Escritura incremental -----
+class EscritorTabla:
+    """Escribe columnas por bloques en CSV o Parquet, vaciando a disco tras cada bloque."""
+
+    def __init__(self, ruta, columnas):
+        self.ruta = ruta
+        self.columnas = columnas
+        self._parquet = _es_parquet(ruta)
+        self._escritor = None
+        if not self._parquet:
+            self._archivo = open(ruta, 'w', newline='', encoding='utf-8')
+            self._archivo.write(','.join(columnas) + '\n')
+
+    def escribir(self, datos):
+        if self._parquet:
+            pyarrow = _importar_pyarrow()
+            tabla = pyarrow.table({c: datos[c] for c in self.columnas})
+            if self._escritor is None:
+                self._escritor = pyarrow.parquet.ParquetWriter(self.ruta, tabla.schema)
+            self._escritor.write_table(tabla)
+            return
+        valores = [datos[c] for c in self.columnas]
+        if all(isinstance(v, np.ndarray) and v.dtype.kind in 'iuf' for v in valores):
+            # Bloques puramente numéricos (trayectorias): un solo formateo por bloque en
+            # lugar de una llamada por fila
+            formato = ','.join(['%.10g'] * len(valores)) + '\n'
+            self._archivo.write((formato * len(valores[0])) % tuple(np.column_stack(valores).ravel().tolist()))
+        else:
+            csv.writer(self._archivo).writerows(zip(*valores))
+        self._archivo.flush()
+
+    def cerrar(self):
+        if self._parquet:
+            if self._escritor is not None:
+                self._escritor.close()
+        else:
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# ----- Simulación de un bloque -----
+def _parametros_de_fila(fila, numero):
+    """Devuelve `(params, medicamento)` de una fila, o ValueError si algún valor no es válido."""
+    try:
+        numeros = [float(fila[c]) for c in COLUMNAS_NUMERICAS]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Fila {numero}: masa, altura y edad deben ser valores numéricos válidos") from None
+    medicamento = fila.get('medicamento')
+    if not medicamento:
+        raise ValueError(f"Fila {numero}: falta el medicamento")
+    if medicamento not in lista_medicamentos:
+        raise ValueError(f"Fila {numero}: medicamento {medicamento!r} no es válido; "
+                         f"debe ser uno de {', '.join(lista_medicamentos)}")
+    categorias = [fila.get(c) or defecto for c, defecto in COLUMNAS_CATEGORICAS.items()]
+    for columna, valor in zip(COLUMNAS_CATEGORICAS, categorias):
+        if valor not in CATALOGOS[columna]:
+            raise ValueError(f"Fila {numero}: {columna} {valor!r} no es válido; "
+                             f"debe ser uno de {', '.join(CATALOGOS[columna])}")
+    return construir_parametros(*numeros, *categorias), medicamento
+
+
+def _columna_umbral(umbral):
+    return f'tiempo_sobre_{umbral:g}'
+
+
+def simular_bloque(filas, primer_paciente=0, modo='multiple', num_dosis=5, puntos_por_ciclo=150,
+                   intervalo_maximo=INTERVALO_MAXIMO, umbrales=()):
+    """Simula un bloque de filas y devuelve `(resumen, t, sol)`.
+
+    En modo 'unica' cada paciente recibe una dosis y se integra 24 h con 500
+    puntos, como `simular_dosis_unica`; en modo 'multiple' se reproducen los
+    ciclos de `simular_dosis_multiples`. Las métricas son las de
+    `calcular_metricas`, más el tiempo sobre cada uno de los `umbrales`.
+    """
+    pacientes, medicamentos = zip(*[_parametros_de_fila(f, primer_paciente + i) for i, f in enumerate(filas)])
+    pacientes, medicamentos = list(pacientes), list(medicamentos)
+    arreglos = parametros_a_arreglos(pacientes, medicamentos)
+    intervalos = calcular_intervalo_dosificacion_lote(
+        arreglos['medicamento'], arreglos['comorbilidad'],
+        codificar([p['genetica'] for p in pacientes], lista_genetica), arreglos['masa'],
+        codificar([p['alergia'] for p in pacientes], lista_alergia), intervalo_maximo)
+    if modo == 'unica':
+        puntos_por_ciclo = 500
+        t, sol = simular_dosis_multiples_lote(arreglos, np.full(len(filas), 24.0), 1, puntos_por_ciclo)
+    else:
+        t, sol = simular_dosis_multiples_lote(arreglos, intervalos, num_dosis, puntos_por_ciclo)
+
+    metricas = calcular_metricas(t, sol, puntos_por_ciclo, umbrales)
+    resumen = {
+        'paciente': np.arange(primer_paciente, primer_paciente + len(filas)),
+        'medicamento': medicamentos,
+        'intervalo': intervalos,
+    }
+    for columna in COLUMNAS_RESUMEN[3:]:
+        resumen[columna] = metricas[columna]
+    for umbral in umbrales:
+        resumen[_columna_umbral(umbral)] = metricas['tiempo_sobre'][umbral]
+    return resumen, t, sol
+
+
+def ejecutar_lote(entrada, salida, trayectorias=None, tamano_bloque=1000, umbrales=(), **opciones):
+    """Procesa `entrada` bloque a bloque y devuelve el número de pacientes simulados."""
+    n_pacientes = 0
+    columnas = COLUMNAS_RESUMEN + [_columna_umbral(u) for u in umbrales]
+    escritor_tray = EscritorTabla(trayectorias, COLUMNAS_TRAYECTORIA) if trayectorias else None
+    try:
+        with EscritorTabla(salida, columnas) as escritor:
+            for filas in leer_bloques(entrada, tamano_bloque):
+                resumen, t, sol = simular_bloque(filas, n_pacientes, umbrales=umbrales, **opciones)
+                escritor.escribir(resumen)
+                if escritor_tray is not None:
+                    escritor_tray.escribir({
+                        'paciente': np.repeat(resumen['paciente'], t.shape[1]),
+                        't': t.ravel(),
+                        'C': sol[:, :, 0].ravel(),
+                        'D': sol[:, :, 1].ravel(),
+                        'V': sol[:, :, 2].ravel(),
+                    })
+                n_pacientes += len(filas)
+    finally:
+        if escritor_tray is not None:
+            escritor_tray.cerrar()
+    return n_pacientes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m farmacocinetica.lote',
+        description="Simula escenarios de pacientes leídos de un CSV o Parquet con columnas "
+                    "masa, altura, edad, genero, comorbilidad, genetica, alergia y medicamento.")
+    parser.add_argument('entrada', help="archivo .csv o .parquet con un paciente por fila")
+    parser.add_argument('salida', help="archivo .csv o .parquet para las métricas por paciente")
+    parser.add_argument('--trayectorias', help="archivo .csv o .parquet para las trayectorias (C, D, V)")
+    parser.add_argument('--modo', choices=['unica', 'multiple'], default='multiple',
+                        help="dosis única (24 h) o dosis múltiples (por defecto)")
+    parser.add_argument('--num-dosis', type=int, default=5)
+    parser.add_argument('--puntos-por-ciclo', type=int, default=150)
+    parser.add_argument('--intervalo-maximo', type=float, default=INTERVALO_MAXIMO,
+                        help="tope del intervalo de dosificación en horas")
+    parser.add_argument('--umbral', type=float, action='append', default=[],
+                        help="agrega una columna con el tiempo (h) con C por encima del umbral; repetible")
+    parser.add_argument('--tamano-bloque', type=int, default=1000,
+                        help="pacientes leídos y simulados por bloque")
+    args = parser.parse_args(argv)
+
+    try:
+        n_pacientes = ejecutar_lote(args.entrada, args.salida, args.trayectorias, args.tamano_bloque,
+                                    args.umbral, modo=args.modo, num_dosis=args.num_dosis,
+                                    puntos_por_ciclo=args.puntos_por_ciclo,
+                                    intervalo_maximo=args.intervalo_maximo)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{n_pacientes} pacientes simulados -> {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# ----- Mallas de salida adaptativas -----
+# Las mallas uniformes (500 puntos en dosis única, 150 por ciclo en dosis
+# múltiples) gastan puntos en las colas planas y pueden quedarse cortas en el
+# pico de absorción. En modo adaptativo se resuelve sobre una malla uniforme
+# FACTOR_REFINAMIENTO veces más fina que el presupuesto y se conservan sólo
+# los puntos necesarios para que la interpolación lineal entre ellos
+# reproduzca la solución fina con error ≤ tol, relativo al máximo de cada
+# componente, sin superar el presupuesto. Los extremos (instantes de dosis) y
+# el pico de C se conservan siempre; en una malla común a muchos ciclos los
+# picos se resumen en a lo sumo MAX_PICOS cuantiles de su posición.
+#
+# Con dosis múltiples todos los ciclos usan la misma malla normalizada, así
+# que la salida sigue teniendo el mismo número de puntos por ciclo y las
+# métricas por ciclo y las gráficas funcionan sin cambios: sólo la malla deja
+# de ser uniforme.
+import heapq
+
+import numpy as np
+
+FACTOR_REFINAMIENTO = 8
+TOLERANCIA_MALLA = 1e-3
+MAX_PICOS = 5
+
+
+def seleccionar_puntos(t, Y, presupuesto, tol=TOLERANCIA_MALLA, obligatorios=()):
+    """Índices crecientes de la malla fina `t` que conservar.
+
+    `Y` tiene forma (len(t), ...): todas las columnas se controlan a la vez,
+    cada una relativa a su máximo absoluto. Parte de los extremos y de
+    `obligatorios` y agrega, de a uno, el punto con mayor error de
+    interpolación lineal hasta que ninguno supera `tol` o se llega a
+    `presupuesto` puntos. Los obligatorios cuentan dentro del presupuesto:
+    si no caben se conserva una selección equiespaciada de ellos.
+    """
+    if presupuesto < 2:
+        raise ValueError("El presupuesto de la malla debe ser de al menos 2 puntos")
+    t = np.asarray(t, dtype=float)
+    Y = np.asarray(Y, dtype=float).reshape(len(t), -1)
+    escala = np.max(np.abs(Y), axis=0)
+    Y = Y / np.where(escala > 0, escala, 1.0)
+
+    def peor(i, j):
+        # Punto interior de (i, j) con mayor error de la interpolación lineal entre i y j
+        w = ((t[i + 1:j] - t[i]) / (t[j] - t[i]))[:, None]
+        error = np.max(np.abs(Y[i] + w * (Y[j] - Y[i]) - Y[i + 1:j]), axis=1)
+        k = int(np.argmax(error))
+        return -error[k], i, j, i + 1 + k
+
+    obligatorios = sorted({int(i) for i in obligatorios} - {0, len(t) - 1})
+    if len(obligatorios) > presupuesto - 2:
+        obligatorios = [obligatorios[i] for i in
+                        np.unique(np.linspace(0, len(obligatorios) - 1, presupuesto - 2).round().astype(int))]
+    elegidos = sorted({0, len(t) - 1, *obligatorios})
+    pendientes = [peor(i, j) for i, j in zip(elegidos[:-1], elegidos[1:]) if j - i > 1]
+    heapq.heapify(pendientes)
+    elegidos = set(elegidos)
+    while pendientes and len(elegidos) < presupuesto:
+        error, i, j, k = heapq.heappop(pendientes)
+        if -error <= tol:
+            break
+        elegidos.add(k)
+        for a, b in ((i, k), (k, j)):
+            if b - a > 1:
+                heapq.heappush(pendientes, peor(a, b))
+    assert len(elegidos) <= presupuesto
+    return np.array(sorted(elegidos))
+
+
+def malla_ciclo(sol_ciclos, presupuesto, tol=TOLERANCIA_MALLA):
+    """Índices comunes a todos los ciclos de `sol_ciclos` (M, F, 3), muestreados en F puntos uniformes.
+
+    Los M ciclos pueden ser de uno o de varios pacientes. Son obligatorios
+    los cuantiles 0, 1/4, ..., 1 (MAX_PICOS) de la posición del pico de C de
+    cada ciclo; los demás picos quedan sujetos al control de error como
+    cualquier otro punto.
+    """
+    f = sol_ciclos.shape[1]
+    picos = np.quantile(np.argmax(sol_ciclos[..., 0], axis=1), np.linspace(0, 1, MAX_PICOS), method='nearest')
+    return seleccionar_puntos(np.linspace(0, 1, f), sol_ciclos.transpose(1, 0, 2), presupuesto, tol, picos)
@@ -0,0 +1,113 @@
+# ----- Métricas farmacocinéticas -----
+# Reducciones vectorizadas sobre la concentración C de una simulación: se
+# aceptan tanto `(t, sol)` de un paciente, con t de forma (T,) y sol (T, 3),
+# como una cohorte con t (N, T) o (T,) y sol (N, T, 3). Para dosis múltiples
+# se indica `puntos_por_ciclo`, con la malla de `simular_dosis_multiples`: un
+# bloque de puntos por ciclo que incluye ambos extremos.
+import numpy as np
+
+
+def tiempo_sobre_umbral(t, C, umbral, dt=None):
+    """Tiempo con C > umbral, interpolando linealmente los cruces entre puntos de la malla."""
+    t, C = np.atleast_2d(t), np.atleast_2d(C)
+    if dt is None:
+        dt = np.diff(t, axis=-1)
+    arriba = C > umbral
+    # Tramos enteramente por encima: se suman sin temporales; sólo los pocos
+    # tramos que cruzan el umbral se interpolan uno a uno
+    tiempo = np.sum(dt, axis=-1, where=arriba[:, 1:] & arriba[:, :-1])
+    cruces = np.flatnonzero(arriba[:, 1:] != arriba[:, :-1])
+    fila, j = np.divmod(cruces, dt.shape[1])
+    c0, c1 = C[fila, j], C[fila, j + 1]
+    fraccion = (np.maximum(c0, c1) - umbral) / np.abs(c1 - c0)
+    tiempo += np.bincount(fila, weights=fraccion * dt[fila, j], minlength=len(tiempo))
+    return tiempo
+
+
+def _pesos_trapecio(t):
+    # Σ_j (C_j + C_j+1)(t_j+1 - t_j) = Σ_j C_j (t_j+1 - t_j-1), con t_-1 = t_0 y t_T = t_T-1.
+    # Entre ciclos el punto final de uno y el inicial del siguiente coinciden en t,
+    # así que cada peso queda dentro de su ciclo y la suma por bloques da el área
+    # de cada ciclo sin mezclarlos.
+    w = np.empty(t.shape)
+    np.subtract(t[..., 2:], t[..., :-2], out=w[..., 1:-1])
+    w[..., 0] = t[..., 1] - t[..., 0]
+    w[..., -1] = t[..., -1] - t[..., -2]
+    return w
+
+
+def _metricas_bloque(t, C, puntos_por_ciclo, umbrales, salida, filas):
+    n, T = C.shape
+    i_max = np.argmax(C, axis=1)
+    w = _pesos_trapecio(t)
+    forma_ciclos = (n, T // puntos_por_ciclo, puntos_por_ciclo)
+    salida['auc_ciclo'][filas] = np.einsum('nkp,nkp->nk', C.reshape(forma_ciclos),
+                                           np.broadcast_to(w, C.shape).reshape(forma_ciclos)) / 2
+    t = np.broadcast_to(t, C.shape)
+    salida['cmax'][filas] = C[np.arange(n), i_max]
+    salida['tmax'][filas] = t[np.arange(n), i_max]
+    salida['valle_ciclo'][filas] = C[:, puntos_por_ciclo - 1::puntos_por_ciclo]
+    if umbrales:
+        dt = np.diff(t, axis=1)
+        for umbral in umbrales:
+            salida['tiempo_sobre'][umbral][filas] = tiempo_sobre_umbral(t, C, umbral, dt)
+
+
+def calcular_metricas(t, sol, puntos_por_ciclo=None, umbrales=(), tamano_bloque=1024):
+    """Devuelve un diccionario de métricas de C por paciente.
+
+      cmax, tmax         máximo de C y el instante en que se alcanza
+      auc                área bajo C (trapecios) en toda la simulación
+      auc_ciclo          área de cada ciclo de dosificación, forma (N, ciclos)
+      valle              C al final del último ciclo (antes de la siguiente dosis)
+      valle_ciclo        C al final de cada ciclo
+      razon_acumulacion  auc del último ciclo / auc del primero
+      tiempo_sobre,      {umbral: tiempo con C por encima / por debajo del umbral}
+      tiempo_bajo
+
+    Sin `puntos_por_ciclo` toda la malla cuenta como un único ciclo. Para un
+    solo paciente los valores son escalares (o vectores por ciclo). Los
+    pacientes se reducen de `tamano_bloque` en `tamano_bloque` para que los
+    temporales quepan en caché; `sol` puede ser un `np.memmap`.
+    """
+    sol = np.asarray(sol) if not isinstance(sol, np.memmap) else sol
+    un_paciente = sol.ndim == 2
+    if un_paciente:
+        sol = sol[None]
+    n, T = sol.shape[:2]
+    t = np.asarray(t, dtype=float)
+    if puntos_por_ciclo is None:
+        puntos_por_ciclo = T
+    ciclos = T // puntos_por_ciclo
+
+    salida = {
+        'cmax': np.empty(n),
+        'tmax': np.empty(n),
+        'auc_ciclo': np.empty((n, ciclos)),
+        'valle_ciclo': np.empty((n, ciclos)),
+        'tiempo_sobre': {umbral: np.empty(n) for umbral in umbrales},
+    }
+    for inicio in range(0, n, tamano_bloque):
+        filas = slice(inicio, min(inicio + tamano_bloque, n))
+        C = np.ascontiguousarray(sol[filas, :, 0], dtype=float)
+        # Con una malla común (t de forma (T,)) los pesos se calculan una vez por bloque
+        _metricas_bloque(t if t.ndim == 1 else t[filas], C, puntos_por_ciclo, umbrales, salida, filas)
+
+    auc_ciclo = salida['auc_ciclo']
+    duracion = t[..., -1] - t[..., 0]
+    metricas = {
+        'cmax': salida['cmax'],
+        'tmax': salida['tmax'],
+        'auc': auc_ciclo.sum(axis=1),
+        'auc_ciclo': auc_ciclo,
+        'valle': salida['valle_ciclo'][:, -1],
+        'valle_ciclo': salida['valle_ciclo'],
+        'razon_acumulacion': np.divide(auc_ciclo[:, -1], auc_ciclo[:, 0], out=np.full(n, np.nan),
+                                       where=auc_ciclo[:, 0] > 0),
+        'tiempo_sobre': salida['tiempo_sobre'],
+        'tiempo_bajo': {umbral: duracion - sobre for umbral, sobre in salida['tiempo_sobre'].items()},
+    }
+    if un_paciente:
+        return {clave: ({u: v[0] for u, v in valor.items()} if isinstance(valor, dict) else valor[0])
+                for clave, valor in metricas.items()}
+    return metricas
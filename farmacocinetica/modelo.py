@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+
+
+# ----- Funciones modelo f y g -----
+def funcion_f(C, t, D, V, params, medicamento):
+    if medicamento == "Ibuprofeno":
+        return (params['k_a'] * D / V) * (1 / (1 + 0.1 * params['masa'] / 70 + 0.1 * (1 if params['genero'] == "Hombre" else 0)))
+    elif medicamento == "Paracetamol":
+        return params['k_a'] * D ** 0.75 / V
+    elif medicamento == "Aspirina":
+        return params['k_a'] * (D / V) * np.exp(-0.05 * t)
+    elif medicamento == "Amoxicilina":
+        return params['k_a'] * D / V * (1 + 0.02 * params['edad'])
+    elif medicamento == "Metformina":
+        return params['k_a'] * D / V
+    elif medicamento == "Loratadina":
+        return params['k_a'] * D / V * np.exp(-0.03 * t)
+    else:
+        return 0
+
+def funcion_g(D, t, params, medicamento):
+    if medicamento == "Ibuprofeno":
+        return D / (t + 1) * (1 + 0.05 * params['edad'] / 50)
+    elif medicamento == "Paracetamol":
+        return np.log(D + 1) * (1 + 0.1 * params['genetica_factor'])
+    elif medicamento == "Aspirina":
+        return np.sqrt(D)
+    elif medicamento == "Amoxicilina":
+        return D / (params['V_d'] * (1 + 0.1 * params['genetica_factor']))
+    elif medicamento == "Metformina":
+        return D * np.exp(-params['k_e'] * t)
+    elif medicamento == "Loratadina":
+        return D / (t + 1) * (1 + 0.05 * params['alergia_factor'])
+    else:
+        return 0
+
+def k_e_efectiva(params, medicamento):
+    k_e = params['k_e']
+    if params['comorbilidad'] == "Insuficiencia renal":
+        if medicamento in ["Metformina", "Amoxicilina"]:
+            k_e *= 0.5
+    if params['comorbilidad'] == "Insuficiencia hepática":
+        if medicamento in ["Paracetamol", "Ibuprofeno"]:
+            k_e *= 0.7
+    return k_e
+
+def ecuaciones(y, t, params, medicamento):
+    C, D, V = y
+    f = funcion_f(C, t, D, V, params, medicamento)
+    g = funcion_g(D, t, params, medicamento)
+    k_e = k_e_efectiva(params, medicamento)
+    dC_dt = f - k_e * C
+    dD_dt = -params['k_a'] * g
+    dV_dt = params['k_a'] * D - k_e * V
+    return [dC_dt, dD_dt, dV_dt]
+
+
+# ----- Modelo compilado -----
+# Cada constructor recibe los coeficientes ya resueltos y devuelve el lado
+# derecho y su jacobiano analítico (J[i][j] = d(dy_i/dt)/dy_j) como cierres
+# sin cadenas ni búsquedas en diccionarios.
+#
+#   dC/dt = f(t, D, V) - k_e C,   dD/dt = -k_a g(t, D),   dV/dt = k_a D - k_e V
+
+def _compilar_ibuprofeno(params, k_a, k_e):
+    cf = k_a / (1 + 0.1 * params['masa'] / 70 + 0.1 * (1 if params['genero'] == "Hombre" else 0))
+    cg = k_a * (1 + 0.05 * params['edad'] / 50)
+
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [cf * D / V - k_e * C, -cg * D / (t + 1), k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        return [[-k_e, cf / V, -cf * D / (V * V)],
+                [0.0, -cg / (t + 1), 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_paracetamol(params, k_a, k_e):
+    cg = k_a * (1 + 0.1 * params['genetica_factor'])
+
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [k_a * D ** 0.75 / V - k_e * C, -cg * np.log(D + 1), k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        return [[-k_e, 0.75 * k_a * D ** -0.25 / V, -k_a * D ** 0.75 / (V * V)],
+                [0.0, -cg / (D + 1), 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_aspirina(params, k_a, k_e):
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [k_a * (D / V) * math.exp(-0.05 * t) - k_e * C, -k_a * np.sqrt(D), k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        e = k_a * math.exp(-0.05 * t)
+        return [[-k_e, e / V, -e * D / (V * V)],
+                [0.0, -0.5 * k_a / np.sqrt(D), 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_amoxicilina(params, k_a, k_e):
+    cf = k_a * (1 + 0.02 * params['edad'])
+    cg = k_a / (params['V_d'] * (1 + 0.1 * params['genetica_factor']))
+
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [cf * D / V - k_e * C, -cg * D, k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        return [[-k_e, cf / V, -cf * D / (V * V)],
+                [0.0, -cg, 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_metformina(params, k_a, k_e):
+    k_e_g = params['k_e']  # g usa la k_e sin ajuste por comorbilidad
+
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [k_a * D / V - k_e * C, -k_a * D * math.exp(-k_e_g * t), k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        return [[-k_e, k_a / V, -k_a * D / (V * V)],
+                [0.0, -k_a * math.exp(-k_e_g * t), 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_loratadina(params, k_a, k_e):
+    cg = k_a * (1 + 0.05 * params['alergia_factor'])
+
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [k_a * D / V * math.exp(-0.03 * t) - k_e * C, -cg * D / (t + 1), k_a * D - k_e * V]
+
+    def jac(y, t):
+        C, D, V = y.tolist()
+        e = k_a * math.exp(-0.03 * t)
+        return [[-k_e, e / V, -e * D / (V * V)],
+                [0.0, -cg / (t + 1), 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+def _compilar_sin_modelo(params, k_a, k_e):
+    def rhs(y, t):
+        C, D, V = y.tolist()
+        return [-k_e * C, 0.0, k_a * D - k_e * V]
+
+    def jac(y, t):
+        return [[-k_e, 0.0, 0.0],
+                [0.0, 0.0, 0.0],
+                [0.0, k_a, -k_e]]
+    return rhs, jac
+
+_constructores = {
+    "Ibuprofeno": _compilar_ibuprofeno,
+    "Paracetamol": _compilar_paracetamol,
+    "Aspirina": _compilar_aspirina,
+    "Amoxicilina": _compilar_amoxicilina,
+    "Metformina": _compilar_metformina,
+    "Loratadina": _compilar_loratadina,
+}
+
+def compilar_modelo(params, medicamento):
+    """Resuelve medicamento y comorbilidad una sola vez.
+
+    Devuelve `(rhs, jac)` listos para `odeint(rhs, y0, t, Dfun=jac)`; `rhs`
+    reproduce `ecuaciones(y, t, params, medicamento)`.
+    """
+    constructor = _constructores.get(medicamento, _compilar_sin_modelo)
+    return constructor(params, float(params['k_a']), float(k_e_efectiva(params, medicamento)))
@@ -0,0 +1,157 @@
+# ----- Diseños de muestreo de cohortes -----
+# `muestrear_covariables` sortea cada covariable de forma independiente
+# (Monte Carlo simple). Los diseños de este módulo generan la cohorte completa
+# en una sola llamada a partir de puntos del hipercubo unitario [0, 1)^7, uno
+# por covariable, y la devuelven con el mismo formato de columnas:
+#
+#   'aleatorio'      el mismo sorteo que `muestrear_covariables`
+#   'lhs'            hipercubo latino: cada covariable cubre sus n estratos de
+#                    probabilidad, y las categorías quedan casi equilibradas
+#   'sobol'          secuencia de Sobol aleatorizada (scipy.stats.qmc); rinde
+#                    mejor con n potencia de 2
+#   'estratificado'  asignación proporcional sobre las celdas de las categorías
+#                    de `estratos` y un hipercubo latino dentro de cada celda
+#
+# Los intervalos de confianza de `estimar_poblacion` salen de réplicas
+# independientes del diseño (cuasi Monte Carlo aleatorizado): la varianza
+# entre réplicas es válida para cualquier diseño y para los cuantiles, donde
+# la fórmula de Monte Carlo simple sobrestimaría el error de LHS o Sobol.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cohorte import Cohorte
+from .dosificacion import INTERVALO_MAXIMO
+from .metricas import calcular_metricas
+from .parametros import lista_generos, lista_comorbilidades, lista_genetica, lista_alergia
+from .poblacion import muestrear_covariables
+
+DISENOS = ('aleatorio', 'lhs', 'sobol', 'estratificado')
+COVARIABLES = ('masa', 'altura', 'edad', 'genero', 'comorbilidad', 'genetica', 'alergia')
+NIVELES = {'genero': len(lista_generos), 'comorbilidad': len(lista_comorbilidades),
+           'genetica': len(lista_genetica), 'alergia': len(lista_alergia)}
+ESTRATOS = ('comorbilidad', 'genetica', 'alergia')
+METRICAS = ('cmax', 'tmax', 'auc', 'valle', 'intervalo')
+CUANTILES = (0.05, 0.5, 0.95)
+
+
+def covariables_desde_unitarios(u):
+    """Covariables con los rangos de `muestrear_covariables` a partir de puntos `u` de forma (n, 7)."""
+    columnas = {
+        'masa': 50 + 50 * u[:, 0],
+        'altura': 1.5 + 0.5 * u[:, 1],
+        'edad': np.minimum(np.floor(18 + 62 * u[:, 2]), 79),
+    }
+    for j, clave in enumerate(COVARIABLES[3:], start=3):
+        columnas[clave] = np.minimum(u[:, j] * NIVELES[clave], NIVELES[clave] - 1).astype(np.int8)
+    return columnas
+
+
+def _lhs_por_grupo(rng, grupo, d):
+    # Un hipercubo latino independiente dentro de cada grupo, sin bucle por
+    # grupo: un orden aleatorio dentro de cada grupo da el estrato de cada punto
+    n = len(grupo)
+    conteo = np.bincount(grupo)
+    inicio = np.concatenate([[0], np.cumsum(conteo)[:-1]])
+    u = np.empty((n, d))
+    rango = np.empty(n)
+    for j in range(d):
+        orden = np.lexsort((rng.random(n), grupo))
+        rango[orden] = np.arange(n) - inicio[grupo[orden]]
+        u[:, j] = (rango + rng.random(n)) / conteo[grupo]
+    return u
+
+
+def _celdas_proporcionales(rng, n_pacientes, n_celdas):
+    # Asignación proporcional (todas las celdas tienen la misma probabilidad);
+    # el resto de la división se reparte entre celdas sorteadas sin reposición
+    por_celda = np.full(n_celdas, n_pacientes // n_celdas)
+    por_celda[rng.choice(n_celdas, n_pacientes % n_celdas, replace=False)] += 1
+    return np.repeat(np.arange(n_celdas), por_celda)
+
+
+def muestrear_diseno(rng, n_pacientes, diseno='lhs', estratos=ESTRATOS):
+    """Sortea las covariables de `n_pacientes` con el diseño indicado (ver DISENOS).
+
+    Devuelve un diccionario de columnas como `muestrear_covariables`, que
+    `Cohorte.desde_covariables` acepta sin cambios.
+    """
+    if diseno == 'aleatorio':
+        return muestrear_covariables(rng, n_pacientes)
+    d = len(COVARIABLES)
+    if diseno == 'lhs':
+        return covariables_desde_unitarios(_lhs_por_grupo(rng, np.zeros(n_pacientes, dtype=int), d))
+    if diseno == 'sobol':
+        from scipy.stats import qmc
+
+        sobol = qmc.Sobol(d, scramble=True, seed=rng)
+        m = int(np.log2(n_pacientes)) if n_pacientes > 0 else 0
+        u = sobol.random_base2(m) if 2 ** m == n_pacientes else sobol.random(n_pacientes)
+        return covariables_desde_unitarios(u)
+    if diseno == 'estratificado':
+        niveles = [NIVELES[c] for c in estratos]
+        celda = _celdas_proporcionales(rng, n_pacientes, int(np.prod(niveles)))
+        columnas = covariables_desde_unitarios(_lhs_por_grupo(rng, celda, d))
+        for clave, codigo in zip(estratos, np.unravel_index(celda, niveles)):
+            columnas[clave] = codigo.astype(np.int8)
+        # Las celdas salen en orden; se mezclan para que cualquier prefijo de la cohorte sea representativo
+        orden = rng.permutation(n_pacientes)
+        return {clave: valor[orden] for clave, valor in columnas.items()}
+    raise ValueError(f"Diseño desconocido: {diseno}")
+
+
+def _metricas_replica(medicamento, semilla, n_pacientes, diseno, estratos, num_dosis, puntos_por_ciclo,
+                      intervalo_maximo, cuantiles):
+    # Se ejecuta en el proceso trabajador: devuelve sólo los estadísticos de la réplica
+    covariables = muestrear_diseno(np.random.default_rng(semilla), n_pacientes, diseno, estratos)
+    cohorte = Cohorte.desde_covariables(covariables, medicamento)
+    cohorte.calcular_intervalos(intervalo_maximo)
+    cohorte.simular(num_dosis, puntos_por_ciclo)
+    metricas = calcular_metricas(cohorte.t, cohorte.sol, puntos_por_ciclo)
+    metricas['intervalo'] = cohorte.intervalos
+    return {clave: np.concatenate([[np.mean(metricas[clave])], np.quantile(metricas[clave], cuantiles)])
+            for clave in METRICAS}
+
+
+def estimar_poblacion(medicamento, n_pacientes=1000, diseno='lhs', replicas=10, semilla=42, n_procesos=1,
+                      estratos=ESTRATOS, num_dosis=5, puntos_por_ciclo=150, intervalo_maximo=INTERVALO_MAXIMO,
+                      cuantiles=CUANTILES, confianza=0.95):
+    """Estima la media y los cuantiles de las métricas poblacionales con intervalos de confianza.
+
+    Los `n_pacientes` se reparten en `replicas` cohortes independientes del
+    mismo diseño, cada una con su semilla derivada de `semilla` con
+    `np.random.SeedSequence`. Cada estadístico se estima como el promedio de
+    sus valores por réplica y el intervalo usa la t de Student con
+    `replicas - 1` grados de libertad. Devuelve un diccionario
+
+      {métrica: {'media' o cuantil: {'estimacion', 'error', 'inferior', 'superior'}}}
+
+    para cmax, tmax, auc y valle (ver `calcular_metricas`) y el intervalo de
+    dosificación. `n_procesos` funciona como en `simular_poblacion_paralela`.
+    """
+    from scipy.stats import t as t_student
+
+    if replicas < 2:
+        raise ValueError("Se necesitan al menos 2 réplicas para estimar el error")
+    tamanos = [n_pacientes // replicas + (r < n_pacientes % replicas) for r in range(replicas)]
+    semillas = np.random.SeedSequence(semilla).spawn(replicas)
+    argumentos = [(medicamento, s, n, diseno, estratos, num_dosis, puntos_por_ciclo, intervalo_maximo, cuantiles)
+                  for s, n in zip(semillas, tamanos)]
+    if n_procesos == 1:
+        por_replica = [_metricas_replica(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            por_replica = list(ejecutor.map(_metricas_replica, *zip(*argumentos)))
+
+    factor = t_student.ppf((1 + confianza) / 2, replicas - 1)
+    nombres = ('media',) + tuple(cuantiles)
+    resultado = {}
+    for clave in METRICAS:
+        valores = np.array([r[clave] for r in por_replica])
+        estimacion = valores.mean(axis=0)
+        error = valores.std(axis=0, ddof=1) / np.sqrt(replicas)
+        resultado[clave] = {
+            nombre: {'estimacion': e, 'error': s, 'inferior': e - factor * s, 'superior': e + factor * s}
+            for nombre, e, s in zip(nombres, estimacion, error)
+        }
+    return resultado
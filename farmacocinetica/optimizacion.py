@@ -0,0 +1,191 @@
+# ----- Optimización del régimen de dosificación -----
+# `calcular_intervalo_dosificacion` aplica factores fijos a una tabla y la
+# dosis es siempre 100; nada comprueba las concentraciones resultantes. Aquí
+# se buscan, para cada paciente, la dosis y el intervalo que mantienen C del
+# último ciclo dentro de una ventana terapéutica [c_min, c_max]:
+#
+#   - los intervalos candidatos son los habituales (INTERVALOS_CANDIDATOS)
+#     hasta `intervalo_maximo`, más el de la regla si no coincide con ninguno;
+#   - cada candidato parte de DOSIS_REFERENCIA * intervalo / intervalo de la
+#     regla, es decir, de la misma dosis por hora que el régimen actual;
+#   - la dosis se ajusta con un modelo sustituto de cada candidato: la media
+#     geométrica de valle y pico sigue aproximadamente una potencia de la
+#     dosis, log C = a + b log dosis. La primera ronda supone b = 1 y las
+#     siguientes estiman b con la secante entre las dos últimas simulaciones
+#     del candidato. La dosis propuesta lleva esa media al centro de la
+#     ventana en escala logarítmica, sqrt(c_min c_max);
+#   - en varios modelos V crece en proporción a D y C del último ciclo casi no
+#     depende de la dosis (b ≈ 0 en Ibuprofeno, Amoxicilina o Metformina con
+#     10 dosis). Extrapolar con esa pendiente lleva la dosis a dosis_min o
+#     dosis_max sin acercar C a la ventana, así que si |b| < UMBRAL_EXPONENTE
+#     el candidato se marca como no sensible y conserva su dosis inicial;
+#   - en cada ronda se simulan juntos, como un solo lote, los candidatos de
+#     todos los pacientes cuya dosis todavía cambia más de `tol`; los demás ya
+#     no se vuelven a simular.
+#
+# Suele bastar con 2 a 4 rondas, frente a las decenas de dosis por intervalo
+# de una búsqueda en malla. Valle y pico se miden en el último de `num_dosis`
+# ciclos: varios modelos dependen de t y no tienen un ciclo límite exacto (ver
+# `estado_estacionario`), así que la ventana se comprueba en ese ciclo.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cohorte import Cohorte
+from .dosificacion import INTERVALO_MINIMO, INTERVALO_MAXIMO, calcular_intervalo_dosificacion_lote
+from .poblacion import simular_dosis_multiples_lote
+
+INTERVALOS_CANDIDATOS = (4, 6, 8, 12, 24)
+DOSIS_REFERENCIA = 100
+# Con |b| < 0.1 duplicar la dosis cambia C menos de un 7 %
+UMBRAL_EXPONENTE = 0.1
+
+
+def _valle_pico(arreglos, intervalos, dosis, num_dosis, puntos_por_ciclo):
+    # Se ejecuta en el proceso trabajador: sólo devuelve valle y pico del último ciclo
+    _, sol = simular_dosis_multiples_lote(arreglos, intervalos, num_dosis, puntos_por_ciclo, dosis)
+    C = sol[:, -puntos_por_ciclo:, 0]
+    return C.min(axis=1), C.max(axis=1)
+
+
+def _exponente(dosis, dosis_anterior, C, C_anterior):
+    # Pendiente de log C frente a log dosis entre las dos últimas simulaciones
+    # de cada candidato; 1 (escalado lineal) si todavía no hay dos. Puede ser
+    # negativa: en Paracetamol más dosis da menos C.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        b = np.log(C / C_anterior) / np.log(dosis / dosis_anterior)
+    return np.where(np.isfinite(b), np.clip(b, -3, 3), 1.0)
+
+
+def optimizar_regimen_cohorte(cohorte, c_min, c_max, intervalos=INTERVALOS_CANDIDATOS, dosis_min=10,
+                              dosis_max=2000, paso_dosis=None, num_dosis=10, puntos_por_ciclo=50,
+                              intervalo_maximo=INTERVALO_MAXIMO, tol=0.01, max_rondas=6, n_procesos=1,
+                              tamano_fragmento=1024, progreso=None):
+    """Busca para cada paciente de `cohorte` la dosis y el intervalo que mantienen C en [c_min, c_max].
+
+    Entre los candidatos cuyo último ciclo queda dentro de la ventana se
+    elige el de intervalo más largo (menos tomas al día); si ninguno entra, el
+    que menos se sale de ella en escala logarítmica. Los candidatos en los que
+    la dosis no mueve C (|b| < UMBRAL_EXPONENTE) conservan la dosis inicial
+    (DOSIS_REFERENCIA en el intervalo de la regla, la misma dosis por hora en
+    los demás) y quedan con 'sensible' en False. Las dosis se limitan a
+    [dosis_min, dosis_max] y, si se indica `paso_dosis`, se redondean a sus
+    múltiplos antes de simularlas. `max_rondas` cuenta también la primera
+    simulación de cada candidato. Los candidatos se simulan en fragmentos de
+    `tamano_fragmento` filas, repartidos entre `n_procesos` procesos si es
+    mayor que 1. Si se pasa `progreso`, se llama como `progreso(ronda, total)`
+    tras cada ronda. Devuelve
+
+      {'dosis', 'intervalo', 'valle', 'pico', 'dentro', 'sensible', 'intervalo_regla': (N,),
+       'candidatos': {'intervalo', 'dosis', 'valle', 'pico', 'dentro', 'sensible': (N, K)},
+       'simulaciones': int, 'rondas': int}
+
+    donde los valores de cada candidato corresponden siempre a su última
+    dosis simulada.
+    """
+    if not 0 < c_min < c_max:
+        raise ValueError("La ventana terapéutica debe cumplir 0 < c_min < c_max")
+    n = len(cohorte)
+    regla = calcular_intervalo_dosificacion_lote(cohorte.medicamento, cohorte.comorbilidad, cohorte.genetica,
+                                                 cohorte.masa, cohorte.alergia, intervalo_maximo)
+    fijos = np.array([i for i in intervalos if INTERVALO_MINIMO <= i <= intervalo_maximo], dtype=float)
+    tau = np.column_stack([np.broadcast_to(fijos, (n, len(fijos))), regla])
+    k = tau.shape[1]
+    # El intervalo de la regla sólo se simula si no es ya uno de los fijos
+    activo = np.ones((n, k), dtype=bool)
+    activo[:, -1] = ~np.isin(regla, fijos)
+    tau, activo = tau.ravel(), activo.ravel()
+    paciente = np.repeat(np.arange(n), k)
+
+    def ajustar(d):
+        d = np.clip(d, dosis_min, dosis_max)
+        if paso_dosis:
+            d = np.maximum(np.round(d / paso_dosis), 1) * paso_dosis
+        return d
+
+    arreglos = cohorte.arreglos()
+    ejecutor = ProcessPoolExecutor(max_workers=n_procesos) if n_procesos != 1 else None
+
+    def evaluar(filas):
+        fragmentos = [filas[i:i + tamano_fragmento] for i in range(0, len(filas), tamano_fragmento)]
+        argumentos = [({c: v[paciente[f]] for c, v in arreglos.items()}, tau[f], dosis[f], num_dosis,
+                       puntos_por_ciclo) for f in fragmentos]
+        resultados = list((ejecutor.map if ejecutor else map)(_valle_pico, *zip(*argumentos)))
+        valle[filas] = np.concatenate([r[0] for r in resultados])
+        pico[filas] = np.concatenate([r[1] for r in resultados])
+
+    dosis = ajustar(DOSIS_REFERENCIA * tau / regla[paciente])
+    valle = np.full(len(tau), np.nan)
+    pico = np.full(len(tau), np.nan)
+    sensible = np.ones(len(tau), dtype=bool)
+    centro = np.sqrt(c_min * c_max)
+    try:
+        pendientes = activo.copy()
+        evaluar(np.flatnonzero(pendientes))
+        simulaciones = int(pendientes.sum())
+        if progreso is not None:
+            progreso(1, max_rondas)
+        dosis_inicial, valle_inicial, pico_inicial = dosis.copy(), valle.copy(), pico.copy()
+        dosis_anterior, valle_anterior, pico_anterior = dosis.copy(), valle.copy(), pico.copy()
+        rondas = 1
+        while rondas < max_rondas:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                medio = np.sqrt(valle * pico)
+                b = _exponente(dosis, dosis_anterior, medio, np.sqrt(valle_anterior * pico_anterior))
+                insensibles = pendientes & (np.abs(b) < UMBRAL_EXPONENTE)
+                dosis[insensibles] = dosis_inicial[insensibles]
+                valle[insensibles], pico[insensibles] = valle_inicial[insensibles], pico_inicial[insensibles]
+                sensible[insensibles] = False
+                propuesta = ajustar(dosis * (centro / np.maximum(medio, 1e-12)) ** (1 / b))
+                pendientes &= ~insensibles & (np.abs(np.log(propuesta / dosis)) > tol)
+            if not pendientes.any():
+                break
+            filas = np.flatnonzero(pendientes)
+            dosis_anterior[filas] = dosis[filas]
+            valle_anterior[filas], pico_anterior[filas] = valle[filas], pico[filas]
+            dosis[filas] = propuesta[filas]
+            evaluar(filas)
+            simulaciones += len(filas)
+            rondas += 1
+            if progreso is not None:
+                progreso(rondas, max_rondas)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    tau, dosis, valle, pico, activo, sensible = (x.reshape(n, k) for x in (tau, dosis, valle, pico, activo,
+                                                                           sensible))
+    dentro = activo & (valle >= c_min) & (pico <= c_max)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exceso = np.maximum(np.log(c_min / valle), 0) + np.maximum(np.log(pico / c_max), 0)
+    exceso = np.where(activo & np.isfinite(exceso), exceso, np.inf)
+    eleccion = np.where(dentro.any(axis=1), np.argmax(np.where(dentro, tau, -np.inf), axis=1),
+                        np.argmin(exceso, axis=1))
+    filas = np.arange(n)
+    return {
+        'dosis': dosis[filas, eleccion],
+        'intervalo': tau[filas, eleccion],
+        'valle': valle[filas, eleccion],
+        'pico': pico[filas, eleccion],
+        'dentro': dentro[filas, eleccion],
+        'sensible': sensible[filas, eleccion],
+        'intervalo_regla': regla,
+        'candidatos': {'intervalo': tau, 'dosis': dosis, 'valle': valle, 'pico': pico, 'dentro': dentro,
+                       'sensible': sensible},
+        'simulaciones': simulaciones,
+        'rondas': rondas,
+    }
+
+
+def optimizar_regimen(params, medicamento, c_min, c_max, **opciones):
+    """Versión de `optimizar_regimen_cohorte` para un paciente `params`.
+
+    Devuelve los mismos campos con valores escalares; los de 'candidatos'
+    tienen un valor por intervalo candidato.
+    """
+    resultado = optimizar_regimen_cohorte(Cohorte.desde_pacientes([params], medicamento), c_min, c_max,
+                                          **opciones)
+    for clave in ('dosis', 'intervalo', 'valle', 'pico', 'dentro', 'sensible', 'intervalo_regla'):
+        resultado[clave] = resultado[clave][0].item()
+    resultado['candidatos'] = {clave: valor[0] for clave, valor in resultado['candidatos'].items()}
+    return resultado
@@ -0,0 +1,68 @@
+import numpy as np
+
+# ----- Catálogos de categorías -----
+# El orden de cada lista define el código entero usado en los arreglos.
+lista_medicamentos = ["Ibuprofeno", "Paracetamol", "Aspirina", "Amoxicilina", "Metformina", "Loratadina"]
+lista_generos = ["Hombre", "Mujer"]
+lista_comorbilidades = ["Sin comorbilidad", "Diabetes", "Insuficiencia renal", "Insuficiencia hepática", "Hipertensión", "Asma"]
+lista_genetica = ["Metabolizador normal", "Metabolizador rápido", "Metabolizador lento", "No identificado"]
+lista_alergia = ["Sin alergia", "Alergia leve", "Alergia moderada", "Alergia severa"]
+
+# Factores del modelo por categoría (0 para las que no figuran)
+factor_genetica = {"Metabolizador rápido": 0.2, "Metabolizador lento": -0.2}
+factor_alergia = {"Alergia leve": 0.1, "Alergia moderada": 0.2, "Alergia severa": 0.3}
+
+
+def codificar(valores, catalogo):
+    """Convierte una secuencia de etiquetas en códigos enteros del catálogo (-1 si no existe)."""
+    indice = {nombre: i for i, nombre in enumerate(catalogo)}
+    return np.array([indice.get(v, -1) for v in valores], dtype=np.int8)
+
+
+def parametros_a_arreglos(pacientes, medicamento):
+    """Apila una lista de diccionarios `params` en columnas NumPy.
+
+    `medicamento` puede ser un nombre común a todos los pacientes o una
+    secuencia con un nombre por paciente.
+    """
+    n = len(pacientes)
+    if isinstance(medicamento, str):
+        medicamento = [medicamento] * n
+
+    def columna(clave):
+        return np.array([p[clave] for p in pacientes], dtype=float)
+
+    return {
+        'medicamento': codificar(medicamento, lista_medicamentos),
+        'masa': columna('masa'),
+        'edad': columna('edad'),
+        'es_hombre': np.array([p['genero'] == "Hombre" for p in pacientes], dtype=float),
+        'comorbilidad': codificar([p['comorbilidad'] for p in pacientes], lista_comorbilidades),
+        'genetica_factor': columna('genetica_factor'),
+        'alergia_factor': columna('alergia_factor'),
+        'V_d': columna('V_d'),
+        'k_a': columna('k_a'),
+        'k_e': columna('k_e'),
+    }
+
+
+def construir_parametros(masa, altura, edad, genero, comorbilidad, genetica, alergia):
+    """Arma el diccionario `params` de un paciente como lo hacen las interfaces."""
+    imc = masa / (altura ** 2)
+    genetica_factor = factor_genetica.get(genetica, 0)
+    alergia_factor = factor_alergia.get(alergia, 0)
+    return {
+        'masa': masa,
+        'altura': altura,
+        'imc': imc,
+        'edad': edad,
+        'genero': genero,
+        'comorbilidad': comorbilidad,
+        'genetica': genetica,
+        'genetica_factor': genetica_factor,
+        'alergia': alergia,
+        'alergia_factor': alergia_factor,
+        'V_d': 0.6 * masa,
+        'k_a': 0.5 * (1 + 0.01 * imc),
+        'k_e': 0.3 * (1 - 0.01 * imc)
+    }
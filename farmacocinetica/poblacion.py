@@ -0,0 +1,284 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.integrate import odeint
+
+from .dosificacion import calcular_intervalo_dosificacion_lote
+from .malla import FACTOR_REFINAMIENTO, TOLERANCIA_MALLA, malla_ciclo
+from .parametros import (lista_medicamentos, lista_generos, lista_comorbilidades, lista_genetica,
+                         lista_alergia, construir_parametros, parametros_a_arreglos, codificar)
+from .simulacion import simular_dosis_multiples
+
+IBUPROFENO, PARACETAMOL, ASPIRINA, AMOXICILINA, METFORMINA, LORATADINA = range(len(lista_medicamentos))
+INSUFICIENCIA_RENAL = lista_comorbilidades.index("Insuficiencia renal")
+INSUFICIENCIA_HEPATICA = lista_comorbilidades.index("Insuficiencia hepática")
+
+
+# ----- Coeficientes por paciente -----
+def preparar_coeficientes(arreglos):
+    """Completa las columnas de `parametros_a_arreglos` con los términos que no dependen del estado.
+
+    Resuelve una sola vez el ajuste de k_e por comorbilidad y agrupa a los
+    pacientes por medicamento, de modo que el lado derecho no compara cadenas.
+    """
+    coef = dict(arreglos)
+    medicamento = coef['medicamento']
+    comorbilidad = coef['comorbilidad']
+
+    k_e = coef['k_e'].copy()
+    renal = (comorbilidad == INSUFICIENCIA_RENAL) & np.isin(medicamento, [METFORMINA, AMOXICILINA])
+    hepatica = (comorbilidad == INSUFICIENCIA_HEPATICA) & np.isin(medicamento, [PARACETAMOL, IBUPROFENO])
+    k_e[renal] *= 0.5
+    k_e[hepatica] *= 0.7
+    coef['k_e_efectiva'] = k_e
+
+    codigos = np.unique(medicamento)
+    if len(codigos) == 1:
+        coef['grupos'] = [(int(codigos[0]), slice(None))]
+    else:
+        coef['grupos'] = [(int(c), np.flatnonzero(medicamento == c)) for c in codigos]
+    return coef
+
+
+# ----- Funciones modelo f y g vectorizadas -----
+def funcion_f_lote(C, t, D, V, coef):
+    f = np.zeros_like(D)
+    k_a = coef['k_a']
+    for codigo, i in coef['grupos']:
+        if codigo == IBUPROFENO:
+            f[i] = (k_a[i] * D[i] / V[i]) * (1 / (1 + 0.1 * coef['masa'][i] / 70 + 0.1 * coef['es_hombre'][i]))
+        elif codigo == PARACETAMOL:
+            f[i] = k_a[i] * D[i] ** 0.75 / V[i]
+        elif codigo == ASPIRINA:
+            f[i] = k_a[i] * (D[i] / V[i]) * np.exp(-0.05 * t[i])
+        elif codigo == AMOXICILINA:
+            f[i] = k_a[i] * D[i] / V[i] * (1 + 0.02 * coef['edad'][i])
+        elif codigo == METFORMINA:
+            f[i] = k_a[i] * D[i] / V[i]
+        elif codigo == LORATADINA:
+            f[i] = k_a[i] * D[i] / V[i] * np.exp(-0.03 * t[i])
+    return f
+
+
+def funcion_g_lote(D, t, coef):
+    g = np.zeros_like(D)
+    for codigo, i in coef['grupos']:
+        if codigo == IBUPROFENO:
+            g[i] = D[i] / (t[i] + 1) * (1 + 0.05 * coef['edad'][i] / 50)
+        elif codigo == PARACETAMOL:
+            g[i] = np.log(D[i] + 1) * (1 + 0.1 * coef['genetica_factor'][i])
+        elif codigo == ASPIRINA:
+            g[i] = np.sqrt(D[i])
+        elif codigo == AMOXICILINA:
+            g[i] = D[i] / (coef['V_d'][i] * (1 + 0.1 * coef['genetica_factor'][i]))
+        elif codigo == METFORMINA:
+            g[i] = D[i] * np.exp(-coef['k_e'][i] * t[i])
+        elif codigo == LORATADINA:
+            g[i] = D[i] / (t[i] + 1) * (1 + 0.05 * coef['alergia_factor'][i])
+    return g
+
+
+def ecuaciones_lote(Y, t, coef):
+    """Lado derecho de `ecuaciones` para un estado apilado Y de forma (N, 3) y tiempos t de forma (N,)."""
+    C, D, V = Y[:, 0], Y[:, 1], Y[:, 2]
+    f = funcion_f_lote(C, t, D, V, coef)
+    g = funcion_g_lote(D, t, coef)
+    k_e = coef['k_e_efectiva']
+    dY = np.empty_like(Y)
+    dY[:, 0] = f - k_e * C
+    dY[:, 1] = -coef['k_a'] * g
+    dY[:, 2] = coef['k_a'] * D - k_e * V
+    return dY
+
+
+def _ecuaciones_escaladas(y, s, t_inicio, intervalos, coef):
+    # Cada paciente recorre su ciclo en tiempo normalizado s ∈ [0, 1]: t = t_inicio + intervalo * s
+    t = t_inicio + intervalos * s
+    return (ecuaciones_lote(y.reshape(-1, 3), t, coef) * intervalos[:, None]).ravel()
+
+
+def _sub_coeficientes(coef, i):
+    sub = {k: v[i] for k, v in coef.items() if isinstance(v, np.ndarray)}
+    return preparar_coeficientes(sub)
+
+
+# ------ Simulación periódica por lotes ------
+def _tiempos_ciclos(intervalos, num_dosis, puntos_por_ciclo, malla=None):
+    # Misma malla que `simular_dosis_multiples`: un linspace por ciclo con t_total acumulado,
+    # o la malla normalizada `malla` (valores en [0, 1]) escalada a cada ciclo
+    t = np.empty((len(intervalos), num_dosis * puntos_por_ciclo))
+    t_total = np.zeros_like(intervalos)
+    for ciclo in range(num_dosis):
+        columnas = slice(ciclo * puntos_por_ciclo, (ciclo + 1) * puntos_por_ciclo)
+        if malla is None:
+            t[:, columnas] = np.linspace(t_total, t_total + intervalos, puntos_por_ciclo, axis=1)
+        else:
+            t[:, columnas] = t_total[:, None] + intervalos[:, None] * malla
+        t_total = t_total + intervalos
+    return t
+
+
+def simular_dosis_multiples_lote(arreglos, intervalos, num_dosis=5, puntos_por_ciclo=150,
+                                 dosis=100, tamano_bloque=4096, salida=None, progreso=None, malla=None):
+    """Equivalente por lotes de `simular_dosis_multiples` para N pacientes a la vez.
+
+    Devuelve `t` de forma (N, num_dosis * puntos_por_ciclo) y `sol` de forma
+    (N, num_dosis * puntos_por_ciclo, 3). Los estados de hasta `tamano_bloque`
+    pacientes se integran juntos en una sola llamada a odeint; el jacobiano es
+    diagonal por bloques de 3x3, así que se declara con bandas ml = mu = 2.
+
+    `dosis` es un valor común o uno por paciente. Con `malla` (valores
+    crecientes de 0 a 1, p. ej. de `malla_adaptativa_lote`) cada ciclo se
+    muestrea en esos instantes relativos en lugar de `puntos_por_ciclo`
+    puntos uniformes.
+
+    `salida` permite escribir `sol` en un arreglo ya reservado (p. ej. float32);
+    la integración se hace siempre en float64.
+
+    Si se pasa `progreso`, se llama como `progreso(hechos, total)` tras cada
+    ciclo de cada bloque, contando pacientes x ciclos.
+    """
+    intervalos = np.asarray(intervalos, dtype=float)
+    n = len(intervalos)
+    dosis = np.broadcast_to(np.asarray(dosis, dtype=float), (n,))
+    if malla is not None:
+        puntos_por_ciclo = len(malla)
+    t = _tiempos_ciclos(intervalos, num_dosis, puntos_por_ciclo, malla)
+    sol = np.empty((n, num_dosis * puntos_por_ciclo, 3)) if salida is None else salida
+    s = np.linspace(0, 1, puntos_por_ciclo) if malla is None else np.asarray(malla, dtype=float)
+
+    for inicio in range(0, n, tamano_bloque):
+        bloque = slice(inicio, min(inicio + tamano_bloque, n))
+        coef = _sub_coeficientes(arreglos, bloque)
+        intervalos_bloque = intervalos[bloque]
+        dosis_bloque = dosis[bloque]
+        y0 = np.column_stack([np.zeros_like(intervalos_bloque),
+                              dosis_bloque,
+                              coef['V_d']])
+        t_total = np.zeros_like(intervalos_bloque)
+        for ciclo in range(num_dosis):
+            columnas = slice(ciclo * puntos_por_ciclo, (ciclo + 1) * puntos_por_ciclo)
+            sol_segmento = odeint(_ecuaciones_escaladas, y0.ravel(), s,
+                                  args=(t_total, intervalos_bloque, coef), ml=2, mu=2)
+            sol_segmento = sol_segmento.reshape(puntos_por_ciclo, -1, 3).transpose(1, 0, 2)
+            sol[bloque, columnas] = sol_segmento
+            y0 = sol_segmento[:, -1, :].copy()
+            y0[:, 1] += dosis_bloque  # Nueva dosis
+            t_total = t_total + intervalos_bloque
+            if progreso is not None:
+                progreso(inicio * num_dosis + (ciclo + 1) * len(intervalos_bloque), n * num_dosis)
+    return t, sol
+
+
+def malla_adaptativa_lote(arreglos, intervalos, num_dosis=5, presupuesto=150, dosis=100, tol=TOLERANCIA_MALLA,
+                          pilotos=64):
+    """Malla normalizada por ciclo, común a toda una cohorte, para `simular_dosis_multiples_lote`.
+
+    Se simulan sobre una malla fina `pilotos` pacientes repartidos a lo largo
+    de la cohorte y se eligen, como en `malla.malla_ciclo`, a lo sumo
+    `presupuesto` puntos que reproducen todos sus ciclos con error ≤ `tol`. La
+    cota sólo se comprueba en los pilotos.
+    """
+    intervalos = np.asarray(intervalos, dtype=float)
+    n = len(intervalos)
+    elegidos = np.unique(np.linspace(0, n - 1, min(pilotos, n)).astype(int))
+    sub = {k: v[elegidos] for k, v in arreglos.items() if isinstance(v, np.ndarray)}
+    finos = FACTOR_REFINAMIENTO * presupuesto
+    _, sol = simular_dosis_multiples_lote(sub, intervalos[elegidos], num_dosis, finos,
+                                          np.broadcast_to(np.asarray(dosis, dtype=float), (n,))[elegidos])
+    return np.linspace(0, 1, finos)[malla_ciclo(sol.reshape(-1, finos, 3), presupuesto, tol)]
+
+
+# ------ Simulación poblacional ------
+def simular_poblacion(medicamento, n_pacientes=100, vectorizado=True):
+    np.random.seed(42)
+    pacientes = []
+    resultados = []
+    for _ in range(n_pacientes):
+        masa = np.random.uniform(50, 100)
+        altura = np.random.uniform(1.5, 2.0)
+        edad = np.random.randint(18, 80)
+        genero = np.random.choice(lista_generos)
+        comorbilidad = np.random.choice(lista_comorbilidades)
+        genetica = np.random.choice(lista_genetica)
+        alergia = np.random.choice(lista_alergia)
+        params = construir_parametros(masa, altura, edad, genero, comorbilidad, genetica, alergia)
+        pacientes.append(params)
+        if not vectorizado:
+            resultados.append(simular_dosis_multiples(params, medicamento))
+    if vectorizado:
+        # Todos los pacientes se integran juntos como un único sistema apilado (N, 3)
+        intervalos = calcular_intervalo_dosificacion_lote(
+            medicamento, codificar([p['comorbilidad'] for p in pacientes], lista_comorbilidades),
+            codificar([p['genetica'] for p in pacientes], lista_genetica), [p['masa'] for p in pacientes],
+            codificar([p['alergia'] for p in pacientes], lista_alergia))
+        t, sol = simular_dosis_multiples_lote(parametros_a_arreglos(pacientes, medicamento), intervalos)
+        resultados = list(zip(t, sol, intervalos))
+    return pacientes, resultados
+
+
+# ------ Simulación poblacional en paralelo ------
+def muestrear_covariables(rng, n_pacientes):
+    """Sortea las covariables de `n_pacientes` con los mismos rangos que `simular_poblacion`.
+
+    Las categorías se devuelven como códigos enteros sobre los catálogos de `parametros`.
+    """
+    return {
+        'masa': rng.uniform(50, 100, n_pacientes),
+        'altura': rng.uniform(1.5, 2.0, n_pacientes),
+        'edad': rng.integers(18, 80, n_pacientes).astype(float),
+        'genero': rng.integers(0, len(lista_generos), n_pacientes).astype(np.int8),
+        'comorbilidad': rng.integers(0, len(lista_comorbilidades), n_pacientes).astype(np.int8),
+        'genetica': rng.integers(0, len(lista_genetica), n_pacientes).astype(np.int8),
+        'alergia': rng.integers(0, len(lista_alergia), n_pacientes).astype(np.int8),
+    }
+
+
+def _simular_fragmento(medicamento, semilla, n_pacientes, num_dosis, puntos_por_ciclo):
+    # Se ejecuta en el proceso trabajador: solo devuelve arreglos, nunca diccionarios por paciente.
+    covariables = muestrear_covariables(np.random.default_rng(semilla), n_pacientes)
+    pacientes = [
+        construir_parametros(masa, altura, edad, lista_generos[g], lista_comorbilidades[c],
+                             lista_genetica[gen], lista_alergia[a])
+        for masa, altura, edad, g, c, gen, a in zip(
+            covariables['masa'], covariables['altura'], covariables['edad'], covariables['genero'],
+            covariables['comorbilidad'], covariables['genetica'], covariables['alergia'])
+    ]
+    intervalos = calcular_intervalo_dosificacion_lote(medicamento, covariables['comorbilidad'], covariables['genetica'],
+                                                      covariables['masa'], covariables['alergia'])
+    _, sol = simular_dosis_multiples_lote(parametros_a_arreglos(pacientes, medicamento), intervalos,
+                                          num_dosis, puntos_por_ciclo)
+    return covariables, intervalos, sol
+
+
+def simular_poblacion_paralela(medicamento, n_pacientes=100, semilla=42, n_procesos=None,
+                               tamano_fragmento=1024, num_dosis=5, puntos_por_ciclo=150):
+    """Simula una cohorte repartida en fragmentos entre varios procesos.
+
+    La cohorte se divide siempre en fragmentos de `tamano_fragmento` pacientes
+    y cada fragmento recibe su propia semilla derivada de `semilla` con
+    `np.random.SeedSequence`, así que el resultado es idéntico bit a bit con
+    cualquier `n_procesos` (None usa todos los núcleos, 1 no crea procesos).
+
+    Devuelve `(covariables, t, sol, intervalos)` con `covariables` como dict
+    de columnas, `t` de forma (N, T) y `sol` de forma (N, T, 3). Con
+    `n_pacientes` = 0 los arreglos están vacíos (N = 0).
+    """
+    if n_pacientes < 0:
+        raise ValueError("n_pacientes no puede ser negativo")
+    tamanos = [min(tamano_fragmento, n_pacientes - inicio) for inicio in range(0, n_pacientes, tamano_fragmento)]
+    # Una cohorte vacía se simula como un fragmento vacío, que da las columnas y formas de siempre
+    tamanos = tamanos or [0]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    argumentos = [(medicamento, s, n, num_dosis, puntos_por_ciclo) for s, n in zip(semillas, tamanos)]
+
+    if n_procesos == 1 or n_pacientes == 0:
+        fragmentos = [_simular_fragmento(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            fragmentos = list(ejecutor.map(_simular_fragmento, *zip(*argumentos)))
+
+    covariables = {clave: np.concatenate([f[0][clave] for f in fragmentos]) for clave in fragmentos[0][0]}
+    intervalos = np.concatenate([f[1] for f in fragmentos])
+    sol = np.concatenate([f[2] for f in fragmentos])
+    return covariables, _tiempos_ciclos(intervalos, num_dosis, puntos_por_ciclo), sol, intervalos
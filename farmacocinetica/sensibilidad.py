@@ -0,0 +1,193 @@
+# Análisis de sensibilidad global de las métricas frente a las covariables.
+#
+#   python -m farmacocinetica.sensibilidad Ibuprofeno --metodo sobol -n 1024
+#
+# Las covariables (masa, altura, edad, género, comorbilidad, genética y
+# alergia) se recorren en el hipercubo unitario con los mismos rangos que
+# `muestrear_covariables` (ver `muestreo.covariables_desde_unitarios`). Las
+# categorías entran como un único factor cada una: genética y alergia
+# determinan genetica_factor y alergia_factor.
+#
+# Todas las filas de las matrices de muestras se simulan juntas como una sola
+# cohorte, repartida en fragmentos entre procesos si se pide. En Sobol las
+# matrices base A y B se simulan una sola vez y se reutilizan para todos los
+# índices; de cada matriz AB_i sólo se simulan las filas que difieren de A
+# (para un factor categórico con k niveles, en 1/k de las filas el nivel de B
+# coincide con el de A y el resultado de A sirve tal cual).
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cohorte import Cohorte
+from .dosificacion import INTERVALO_MAXIMO
+from .metricas import calcular_metricas
+from .muestreo import COVARIABLES, covariables_desde_unitarios
+
+SALIDAS = ('cmax', 'auc', 'valle', 'intervalo')
+
+
+def _evaluar_fragmento(medicamento, u, num_dosis, puntos_por_ciclo, intervalo_maximo):
+    # Se ejecuta en el proceso trabajador: devuelve una columna por salida
+    cohorte = Cohorte.desde_covariables(covariables_desde_unitarios(u), medicamento)
+    cohorte.calcular_intervalos(intervalo_maximo)
+    cohorte.simular(num_dosis, puntos_por_ciclo)
+    metricas = calcular_metricas(cohorte.t, cohorte.sol, puntos_por_ciclo)
+    metricas['intervalo'] = cohorte.intervalos
+    return np.column_stack([metricas[s] for s in SALIDAS])
+
+
+def evaluar_salidas(medicamento, u, n_procesos=1, tamano_fragmento=1024, num_dosis=5, puntos_por_ciclo=150,
+                    intervalo_maximo=INTERVALO_MAXIMO):
+    """Métricas de SALIDAS, forma (n, len(SALIDAS)), para los puntos `u` de forma (n, 7) del hipercubo."""
+    fragmentos = [u[i:i + tamano_fragmento] for i in range(0, len(u), tamano_fragmento)]
+    argumentos = [(medicamento, f, num_dosis, puntos_por_ciclo, intervalo_maximo) for f in fragmentos]
+    if n_procesos == 1:
+        resultados = [_evaluar_fragmento(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            resultados = list(ejecutor.map(_evaluar_fragmento, *zip(*argumentos)))
+    return np.concatenate(resultados) if resultados else np.empty((0, len(SALIDAS)))
+
+
+def _mismos_pacientes(a, b):
+    # Filas de dos matrices del hipercubo que dan exactamente las mismas covariables
+    ca, cb = covariables_desde_unitarios(a), covariables_desde_unitarios(b)
+    return np.logical_and.reduce([ca[c] == cb[c] for c in COVARIABLES])
+
+
+def _indices_sobol(fA, fB, fAB):
+    # Estimadores de Saltelli (2010) para el primer orden y de Jansen para el total
+    varianza = np.var(np.concatenate([fA, fB], axis=-2), axis=-2)
+    S1 = np.mean(fB[..., None, :, :] * (fAB - fA[..., None, :, :]), axis=-2) / varianza[..., None, :]
+    ST = 0.5 * np.mean((fA[..., None, :, :] - fAB) ** 2, axis=-2) / varianza[..., None, :]
+    return S1, ST
+
+
+def analisis_sobol(medicamento, n_base=1024, semilla=42, remuestreos=200, confianza=0.95, **opciones):
+    """Índices de Sobol de primer orden (S1) y totales (ST) de cada covariable para cada salida.
+
+    Usa el esquema de Saltelli con matrices base A y B de `n_base` puntos de
+    una secuencia de Sobol aleatorizada: como mucho n_base * (7 + 2)
+    simulaciones. Los intervalos de confianza se obtienen remuestreando las
+    filas (bootstrap) `remuestreos` veces. `opciones` se pasan a
+    `evaluar_salidas`. Devuelve
+
+      {'factores': COVARIABLES, 'simulaciones': int,
+       salida: {'S1', 'ST', 'S1_inferior', 'S1_superior', 'ST_inferior', 'ST_superior'}}
+
+    con un valor por factor en cada arreglo.
+    """
+    from scipy.stats import qmc
+
+    d = len(COVARIABLES)
+    rng = np.random.default_rng(semilla)
+    m = int(np.ceil(np.log2(max(n_base, 2))))
+    base = qmc.Sobol(2 * d, scramble=True, seed=rng).random_base2(m)[:n_base]
+    A, B = base[:, :d], base[:, d:]
+
+    AB = np.repeat(A[None], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    repetidas = np.array([_mismos_pacientes(AB[i], A) for i in range(d)])
+
+    nuevas = AB[~repetidas]
+    f = evaluar_salidas(medicamento, np.concatenate([A, B, nuevas]), **opciones)
+    fA, fB = f[:n_base], f[n_base:2 * n_base]
+    fAB = np.repeat(fA[None], d, axis=0)
+    fAB[~repetidas] = f[2 * n_base:]
+
+    S1, ST = _indices_sobol(fA, fB, fAB)
+    filas = rng.integers(0, n_base, (remuestreos, n_base))
+    S1_b, ST_b = _indices_sobol(fA[filas], fB[filas], fAB[:, filas].transpose(1, 0, 2, 3))
+    cola = 100 * (1 - confianza) / 2
+    S1_lim = np.percentile(S1_b, [cola, 100 - cola], axis=0)
+    ST_lim = np.percentile(ST_b, [cola, 100 - cola], axis=0)
+
+    resultado = {'factores': COVARIABLES, 'simulaciones': len(f)}
+    for k, salida in enumerate(SALIDAS):
+        resultado[salida] = {
+            'S1': S1[:, k], 'ST': ST[:, k],
+            'S1_inferior': S1_lim[0, :, k], 'S1_superior': S1_lim[1, :, k],
+            'ST_inferior': ST_lim[0, :, k], 'ST_superior': ST_lim[1, :, k],
+        }
+    return resultado
+
+
+def analisis_morris(medicamento, trayectorias=100, niveles=4, semilla=42, **opciones):
+    """Efectos elementales de Morris (mu*, mu, sigma) de cada covariable para cada salida.
+
+    Cada trayectoria parte de un punto de una malla de `niveles` valores por
+    factor y mueve un factor a la vez, en orden aleatorio, un paso
+    delta = niveles / (2 (niveles - 1)): trayectorias * (7 + 1) simulaciones
+    en un solo lote. `opciones` se pasan a `evaluar_salidas`. Devuelve
+
+      {'factores': COVARIABLES, 'simulaciones': int, salida: {'mu_estrella', 'mu', 'sigma'}}
+    """
+    d = len(COVARIABLES)
+    rng = np.random.default_rng(semilla)
+    delta = niveles / (2 * (niveles - 1))
+    inicio = rng.integers(0, niveles, (trayectorias, d)) / (niveles - 1)
+    # Se sube desde los niveles bajos y se baja desde los altos, así el paso no sale de [0, 1]
+    signo = np.where(inicio + delta <= 1, 1.0, -1.0)
+    orden = np.argsort(rng.random((trayectorias, d)), axis=1)
+
+    puntos = np.repeat(inicio[:, None, :], d + 1, axis=1)
+    filas = np.arange(trayectorias)
+    for paso in range(d):
+        j = orden[:, paso]
+        puntos[:, paso + 1:, :][filas, :, j] += (signo[filas, j] * delta)[:, None]
+    # El extremo superior del hipercubo es abierto
+    puntos = np.minimum(puntos, np.nextafter(1, 0))
+
+    f = evaluar_salidas(medicamento, puntos.reshape(-1, d), **opciones).reshape(trayectorias, d + 1, -1)
+    efectos = np.empty((trayectorias, d, f.shape[-1]))
+    for paso in range(d):
+        j = orden[:, paso]
+        efectos[filas, j] = (f[:, paso + 1] - f[:, paso]) / (signo[filas, j] * delta)[:, None]
+
+    resultado = {'factores': COVARIABLES, 'simulaciones': trayectorias * (d + 1)}
+    for k, salida in enumerate(SALIDAS):
+        resultado[salida] = {
+            'mu_estrella': np.mean(np.abs(efectos[:, :, k]), axis=0),
+            'mu': np.mean(efectos[:, :, k], axis=0),
+            'sigma': np.std(efectos[:, :, k], axis=0, ddof=1),
+        }
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m farmacocinetica.sensibilidad',
+        description="Análisis de sensibilidad global (Sobol o Morris) de Cmax, AUC, valle e intervalo "
+                    "de dosificación frente a las covariables del paciente.")
+    parser.add_argument('medicamento')
+    parser.add_argument('--metodo', choices=['sobol', 'morris'], default='sobol')
+    parser.add_argument('-n', type=int, default=1024,
+                        help="puntos base (Sobol) o trayectorias (Morris)")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--procesos', type=int, default=1, help="procesos para las simulaciones")
+    parser.add_argument('--num-dosis', type=int, default=5)
+    parser.add_argument('--puntos-por-ciclo', type=int, default=150)
+    args = parser.parse_args(argv)
+
+    opciones = dict(semilla=args.semilla, n_procesos=args.procesos, num_dosis=args.num_dosis,
+                    puntos_por_ciclo=args.puntos_por_ciclo)
+    if args.metodo == 'sobol':
+        resultado = analisis_sobol(args.medicamento, args.n, **opciones)
+        columnas = ['S1', 'ST']
+    else:
+        resultado = analisis_morris(args.medicamento, args.n, **opciones)
+        columnas = ['mu_estrella', 'sigma']
+
+    print(f"{args.medicamento}: {resultado['simulaciones']} simulaciones")
+    for salida in SALIDAS:
+        print(f"\n{salida:<14}" + "".join(f"{c:>12}" for c in columnas))
+        for i, factor in enumerate(resultado['factores']):
+            print(f"  {factor:<12}" + "".join(f"{resultado[salida][c][i]:>12.4f}" for c in columnas))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import numpy as np
+from scipy.integrate import odeint
+
+from .dosificacion import calcular_intervalo_dosificacion
+from .estado_estacionario import simular_hasta_estado_estacionario
+from .malla import FACTOR_REFINAMIENTO, TOLERANCIA_MALLA, seleccionar_puntos, malla_ciclo
+from .modelo import compilar_modelo
+
+
+# ------ Simulación de dosis única ------
+# Con adaptativa=True `puntos` es el máximo de puntos de una malla no uniforme
+# con error de interpolación ≤ tol_malla (ver `malla`).
+def simular_dosis_unica(params, medicamento, t_final=24, puntos=500, dosis=100, adaptativa=False,
+                        tol_malla=TOLERANCIA_MALLA):
+    if adaptativa:
+        t, sol = simular_dosis_unica(params, medicamento, t_final, FACTOR_REFINAMIENTO * puntos, dosis)
+        indices = seleccionar_puntos(t, sol, puntos, tol_malla, [np.argmax(sol[:, 0])])
+        return t[indices], sol[indices]
+    t = np.linspace(0, t_final, puntos)
+    y0 = [0, dosis, params['V_d']]
+    rhs, jac = compilar_modelo(params, medicamento)
+    sol = odeint(rhs, y0, t, Dfun=jac)
+    return t, sol
+
+# ------ Regímenes con eventos de dosis ------
+def _mallas_por_dosis(tiempos_dosis, t_final, t_eval, puntos_por_ciclo):
+    # Una malla por tramo entre dosis, del instante de la dosis k al de la k+1
+    # (o t_final), y los índices de esa malla que forman parte de la salida.
+    limites = list(tiempos_dosis[1:]) + [t_final]
+    mallas, seleccion = [], []
+    for k, (inicio, fin) in enumerate(zip(tiempos_dosis, limites)):
+        if t_eval is None:
+            malla = np.linspace(inicio, fin, puntos_por_ciclo)
+            indices = np.arange(puntos_por_ciclo)
+        else:
+            # En un instante de dosis la salida es el estado justo después de la dosis
+            ultimo = k == len(tiempos_dosis) - 1
+            puntos = t_eval[(t_eval >= inicio) & ((t_eval <= fin) if ultimo else (t_eval < fin))]
+            malla = np.unique(np.concatenate([[inicio], puntos, [fin]]))
+            indices = np.searchsorted(malla, puntos)
+        mallas.append(malla)
+        seleccion.append(indices)
+    return mallas, seleccion
+
+
+def _integrar_lsoda(rhs, jac, y0, dosis, mallas):
+    # El bolo es un salto del estado y la historia de LSODA (orden y derivadas
+    # de Nordsieck) deja de valer: tras cada bolo se vuelve a entrar en odeint
+    # con el estado nuevo. Mantener un único integrador a través de las dosis
+    # no ahorra trabajo en este modelo: DOP853 conservando el paso entre
+    # dosis, o una sola llamada a odeint con las dosis como `tcrit` sobre el
+    # estado sin los bolos, evalúan el RHS más veces que este reinicio.
+    sol_segmentos = []
+    y = np.array(y0, dtype=float)
+    for k, malla in enumerate(mallas):
+        y[1] += dosis[k]
+        sol_k = odeint(rhs, y, malla, Dfun=jac)
+        sol_segmentos.append(sol_k)
+        y = sol_k[-1].copy()
+    return sol_segmentos
+
+
+def simular_regimen(params, medicamento, tiempos_dosis, dosis=100, t_final=None, t_eval=None,
+                    puntos_por_ciclo=150):
+    """Simula un régimen de dosis orales (bolos sobre D) en instantes arbitrarios.
+
+    `tiempos_dosis` es creciente y `dosis` un valor o uno por administración.
+    La simulación termina en `t_final` (por defecto, un intervalo después de la
+    última dosis). Sin `t_eval` la salida usa `puntos_por_ciclo` puntos por
+    tramo entre dosis, como `simular_dosis_multiples`; con `t_eval` se evalúa en
+    esos instantes. Cada tramo se integra con odeint.
+
+    `t_final` no puede ser anterior a la última dosis ni `t_eval` salir de
+    [primera dosis, t_final]. Devuelve `(t, sol)`.
+    """
+    tiempos_dosis = np.asarray(tiempos_dosis, dtype=float)
+    dosis = np.broadcast_to(np.asarray(dosis, dtype=float), tiempos_dosis.shape)
+    if np.any(np.diff(tiempos_dosis) <= 0):
+        raise ValueError("Los tiempos de dosis deben ser estrictamente crecientes")
+    if t_final is None:
+        ultimo_intervalo = tiempos_dosis[-1] - tiempos_dosis[-2] if len(tiempos_dosis) > 1 else 24
+        t_final = tiempos_dosis[-1] + ultimo_intervalo
+    if t_final < tiempos_dosis[-1]:
+        raise ValueError(f"t_final ({t_final:g} h) es anterior a la última dosis ({tiempos_dosis[-1]:g} h)")
+    if t_eval is not None:
+        t_eval = np.sort(np.asarray(t_eval, dtype=float))
+        if len(t_eval) and (t_eval[0] < tiempos_dosis[0] or t_eval[-1] > t_final):
+            raise ValueError(f"t_eval debe estar entre la primera dosis ({tiempos_dosis[0]:g} h) "
+                             f"y t_final ({t_final:g} h)")
+    mallas, seleccion = _mallas_por_dosis(tiempos_dosis, t_final, t_eval, puntos_por_ciclo)
+
+    rhs, jac = compilar_modelo(params, medicamento)
+    sol_segmentos = _integrar_lsoda(rhs, jac, [0, 0, params['V_d']], dosis, mallas)
+
+    t = np.concatenate([m[i] for m, i in zip(mallas, seleccion)])
+    sol = np.concatenate([s[i] for s, i in zip(sol_segmentos, seleccion)], axis=0)
+    return t, sol
+
+# ------ Simulación periódica ------
+# Con estado_estacionario=True se ignora num_dosis: se simulan ciclos hasta que
+# el valle y el pico convergen (o hasta max_dosis), ver `estado_estacionario`.
+# Con adaptativa=True todos los ciclos comparten una malla no uniforme de a lo
+# sumo `puntos_por_ciclo` puntos; el número real es len(t) // ciclos.
+def simular_dosis_multiples(params, medicamento, num_dosis=5, puntos_por_ciclo=150, intervalo=None, dosis=100,
+                            estado_estacionario=False, tol=1e-3, max_dosis=200, adaptativa=False,
+                            tol_malla=TOLERANCIA_MALLA):
+    if adaptativa:
+        finos = FACTOR_REFINAMIENTO * puntos_por_ciclo
+        t, sol, intervalo = simular_dosis_multiples(params, medicamento, num_dosis, finos, intervalo, dosis,
+                                                    estado_estacionario, tol, max_dosis)
+        ciclos = sol.reshape(-1, finos, 3)
+        indices = malla_ciclo(ciclos, puntos_por_ciclo, tol_malla)
+        return t.reshape(-1, finos)[:, indices].ravel(), ciclos[:, indices].reshape(-1, 3), intervalo
+    if intervalo is None:
+        intervalo = calcular_intervalo_dosificacion(params, medicamento)
+    if estado_estacionario:
+        t, sol, intervalo, _ = simular_hasta_estado_estacionario(params, medicamento, intervalo, puntos_por_ciclo,
+                                                                 dosis, tol, max_dosis)
+        return t, sol, intervalo
+    tiempos_dosis = []
+    t_total = 0
+    for ciclo in range(num_dosis):
+        tiempos_dosis.append(t_total)
+        t_total += intervalo
+    t, sol = simular_regimen(params, medicamento, tiempos_dosis, dosis, t_total, puntos_por_ciclo=puntos_por_ciclo)
+    return t, sol, intervalo
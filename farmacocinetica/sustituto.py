@@ -0,0 +1,314 @@
+# ----- Modelo sustituto (emulador) de la simulación de dosis múltiples -----
+#
+#   python -m farmacocinetica.sustituto Ibuprofeno sustituto_ibuprofeno.npz --procesos 4
+#
+# Para puntuar millones de pacientes ni siquiera el motor por lotes es lo
+# bastante rápido. Un `Sustituto` guarda, para un medicamento, tablas de
+# Cmax, AUC, valle y la curva C(t) completa de `Cohorte.simular` sobre una
+# malla regular de masa, altura y edad, y predice por interpolación
+# multilineal: unas pocas operaciones por paciente, sin integrar el modelo.
+#
+# Las categorías (género, comorbilidad, genética y alergia) no se
+# interpolan. Cada combinación usa la tabla de su grupo: dos combinaciones van
+# al mismo grupo si dan el mismo lado derecho del modelo y el mismo intervalo
+# de dosificación en unos pacientes de prueba. Así, por ejemplo, la alergia
+# sólo multiplica las tablas de Loratadina. El intervalo de la regla salta en
+# MASA_BAJA y MASA_ALTA, y con él toda la curva, así que la masa se divide en
+# tramos con intervalo constante y cada tramo tiene su propia malla.
+#
+# Al entrenar, la cota de error se mide contra el modelo en pacientes
+# sorteados dentro del dominio: es una cota empírica, no garantizada. Los
+# pacientes fuera del dominio entrenado (o con categorías desconocidas) se
+# simulan con el modelo.
+import argparse
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cohorte import Cohorte, CATEGORIAS
+from .dosificacion import INTERVALO_MAXIMO, MASA_BAJA, MASA_ALTA, calcular_intervalo_dosificacion_lote
+from .metricas import calcular_metricas
+from .parametros import lista_medicamentos
+from .poblacion import preparar_coeficientes, ecuaciones_lote, _tiempos_ciclos
+
+# Forma parte del archivo: cambiarla invalida los sustitutos entrenados con
+# versiones anteriores del modelo.
+VERSION_SUSTITUTO = 1
+
+SALIDAS = ('cmax', 'auc', 'valle')
+CONTINUAS = ('masa', 'altura', 'edad')
+CATEGORICAS = tuple(CATEGORIAS)
+# Los rangos de `muestrear_covariables`
+DOMINIO = {'masa': (50.0, 100.0), 'altura': (1.5, 2.0), 'edad': (18.0, 79.0)}
+NODOS = {'masa': 9, 'altura': 5, 'edad': 7}
+
+# Pacientes (masa, altura, edad) y estados (C, D, V, t) de prueba para agrupar categorías
+_SONDAS_PACIENTE = ((70.0, 1.75, 40.0), (95.0, 1.6, 65.0))
+_SONDAS_ESTADO = ((1.0, 50.0, 40.0, 1.0), (0.5, 10.0, 80.0, 7.0))
+
+
+def _agrupar_categorias(medicamento, intervalo_maximo):
+    # Devuelve el grupo de cada combinación, con forma (niveles de cada
+    # categoría), y la combinación representante de cada grupo
+    niveles = [len(CATEGORIAS[c]) for c in CATEGORICAS]
+    combinaciones = np.array(list(itertools.product(*map(range, niveles))), dtype=np.int8)
+    k = len(combinaciones)
+    firma = []
+    for masa, altura, edad in _SONDAS_PACIENTE:
+        columnas = {'masa': np.full(k, masa), 'altura': np.full(k, altura), 'edad': np.full(k, edad)}
+        columnas.update(zip(CATEGORICAS, combinaciones.T))
+        cohorte = Cohorte.desde_covariables(columnas, medicamento)
+        coef = preparar_coeficientes(cohorte.arreglos())
+        for C, D, V, t in _SONDAS_ESTADO:
+            firma.append(ecuaciones_lote(np.tile([C, D, V], (k, 1)), np.full(k, t), coef))
+        firma.append(calcular_intervalo_dosificacion_lote(cohorte.medicamento, cohorte.comorbilidad,
+                                                          cohorte.genetica, cohorte.masa, cohorte.alergia,
+                                                          intervalo_maximo)[:, None])
+    _, representantes, grupo = np.unique(np.hstack(firma), axis=0, return_index=True, return_inverse=True)
+    return grupo.reshape(niveles), combinaciones[representantes]
+
+
+def _tramos_masa(inferior, superior):
+    # Tramos de masa con intervalo constante; los extremos abiertos se acercan con nextafter
+    tramos = []
+    if inferior < MASA_BAJA:
+        tramos.append((inferior, min(superior, np.nextafter(MASA_BAJA, -np.inf))))
+    if inferior <= MASA_ALTA and superior >= MASA_BAJA:
+        tramos.append((max(inferior, MASA_BAJA), min(superior, MASA_ALTA)))
+    if superior > MASA_ALTA:
+        tramos.append((max(inferior, np.nextafter(MASA_ALTA, np.inf)), superior))
+    return np.array(tramos, dtype=float)
+
+
+def _coordenadas(x, inferior, superior, n):
+    # Celda y peso del nodo superior de x en una malla uniforme de n nodos sobre [inferior, superior]
+    ancho = np.where(superior > inferior, superior - inferior, 1.0)
+    u = (x - inferior) / ancho * (n - 1)
+    i = np.clip(np.floor(u).astype(np.intp), 0, n - 2)
+    return i, u - i
+
+
+def _simular_fragmento(medicamento, covariables, num_dosis, puntos_por_ciclo, dosis, intervalo_maximo):
+    # Se ejecuta en el proceso trabajador: SALIDAS (n, 3) y C (n, T) en float32
+    cohorte = Cohorte.desde_covariables(covariables, medicamento)
+    cohorte.calcular_intervalos(intervalo_maximo)
+    cohorte.simular(num_dosis, puntos_por_ciclo, dosis)
+    metricas = calcular_metricas(cohorte.t, cohorte.sol, puntos_por_ciclo)
+    return np.column_stack([metricas[s] for s in SALIDAS]), cohorte.sol[:, :, 0].astype(np.float32)
+
+
+class Sustituto:
+    """Tablas de interpolación de un medicamento; se crea con `entrenar_sustituto` o `Sustituto.cargar`.
+
+    `metadatos` guarda el medicamento, el dominio, los nodos, las opciones de
+    simulación y `error`: {salida o 'curva': {'max', 'p99'}}, el error
+    relativo medido al entrenar (para la curva, max |ΔC| / max C).
+    """
+
+    def __init__(self, metadatos, grupo, tramos, metricas, curvas):
+        self.metadatos = metadatos
+        self.medicamento = metadatos['medicamento']
+        self.grupo = grupo
+        self.tramos = tramos
+        self.metricas = metricas
+        self.curvas = curvas
+
+    @property
+    def error(self):
+        return self.metadatos.get('error')
+
+    def dentro_del_dominio(self, cohorte):
+        """Máscara de los pacientes de `cohorte` que el sustituto puede predecir sin simular."""
+        dentro = np.ones(len(cohorte), dtype=bool)
+        for c in CONTINUAS:
+            inferior, superior = self.metadatos['dominio'][c]
+            valores = getattr(cohorte, c)
+            dentro &= (valores >= inferior) & (valores <= superior)
+        for c in CATEGORICAS:
+            codigos = getattr(cohorte, c)
+            dentro &= (codigos >= 0) & (codigos < len(CATEGORIAS[c]))
+        return dentro
+
+    def _interpolar(self, tabla, cohorte, filas):
+        g = self.grupo[tuple(getattr(cohorte, c)[filas] for c in CATEGORICAS)]
+        masa = cohorte.masa[filas]
+        s = np.searchsorted(self.tramos[:, 0], masa, side='right') - 1
+        nodos = self.metadatos['nodos']
+        coordenadas = [_coordenadas(masa, self.tramos[s, 0], self.tramos[s, 1], nodos['masa'])]
+        for c in CONTINUAS[1:]:
+            inferior, superior = self.metadatos['dominio'][c]
+            coordenadas.append(_coordenadas(getattr(cohorte, c)[filas], inferior, superior, nodos[c]))
+        (i0, w0), (i1, w1), (i2, w2) = coordenadas
+        resultado = 0
+        for a, b, c in itertools.product((0, 1), repeat=3):
+            w = (w0 if a else 1 - w0) * (w1 if b else 1 - w1) * (w2 if c else 1 - w2)
+            resultado = resultado + w.astype(tabla.dtype)[:, None] * tabla[g, s, i0 + a, i1 + b, i2 + c]
+        return resultado
+
+    def predecir(self, cohorte, curvas=False):
+        """Predice SALIDAS (y con `curvas`, C en la malla de `Cohorte.t`) para una `cohorte` sin simular.
+
+        Devuelve {'cmax', 'auc', 'valle', 'intervalo', 'exacto'} y, con
+        `curvas`, 't' y 'C' de forma (N, T). `exacto` marca los pacientes
+        fuera del dominio, que se simulan con el modelo.
+        """
+        if np.any(cohorte.medicamento != lista_medicamentos.index(self.medicamento)):
+            raise ValueError(f"El sustituto es de {self.medicamento}")
+        m = self.metadatos
+        n = len(cohorte)
+        intervalos = calcular_intervalo_dosificacion_lote(cohorte.medicamento, cohorte.comorbilidad,
+                                                          cohorte.genetica, cohorte.masa, cohorte.alergia,
+                                                          m['intervalo_maximo'])
+        exacto = ~self.dentro_del_dominio(cohorte)
+        valores = np.empty((n, len(SALIDAS)))
+        C = np.empty((n, m['num_dosis'] * m['puntos_por_ciclo']), dtype=np.float32) if curvas else None
+
+        filas = np.flatnonzero(~exacto)
+        if len(filas):
+            valores[filas] = self._interpolar(self.metricas, cohorte, filas)
+            if curvas:
+                C[filas] = self._interpolar(self.curvas, cohorte, filas)
+        filas = np.flatnonzero(exacto)
+        if len(filas):
+            columnas = {c: getattr(cohorte, c)[filas] for c in CONTINUAS + CATEGORICAS}
+            valores[filas], C_exacta = _simular_fragmento(self.medicamento, columnas, m['num_dosis'],
+                                                          m['puntos_por_ciclo'], m['dosis'],
+                                                          m['intervalo_maximo'])
+            if curvas:
+                C[filas] = C_exacta
+
+        resultado = {s: valores[:, k] for k, s in enumerate(SALIDAS)}
+        resultado.update(intervalo=intervalos, exacto=exacto)
+        if curvas:
+            resultado['t'] = _tiempos_ciclos(intervalos, m['num_dosis'], m['puntos_por_ciclo'])
+            resultado['C'] = C
+        return resultado
+
+    def guardar(self, ruta):
+        """Guarda el sustituto en un único archivo .npz."""
+        np.savez(ruta, metadatos=np.array(json.dumps(self.metadatos, ensure_ascii=False)), grupo=self.grupo,
+                 tramos=self.tramos, metricas=self.metricas, curvas=self.curvas)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            metadatos = json.loads(str(datos['metadatos']))
+            if metadatos.get('version') != VERSION_SUSTITUTO:
+                raise ValueError(f"{ruta} se entrenó con otra versión del modelo; vuelva a entrenarlo")
+            return cls(metadatos, datos['grupo'], datos['tramos'], datos['metricas'], datos['curvas'])
+
+
+def _simular(medicamento, covariables, opciones, n_procesos, tamano_fragmento, avance):
+    n = len(covariables['masa'])
+    fragmentos = [slice(i, i + tamano_fragmento) for i in range(0, n, tamano_fragmento)]
+    argumentos = [(medicamento, {c: v[f] for c, v in covariables.items()}) + opciones for f in fragmentos]
+    if n_procesos == 1:
+        resultados = (_simular_fragmento(*args) for args in argumentos)
+        return [avance(r) for r in resultados]
+    with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+        return [avance(r) for r in ejecutor.map(_simular_fragmento, *zip(*argumentos))]
+
+
+def entrenar_sustituto(medicamento, dominio=DOMINIO, nodos=NODOS, num_dosis=5, puntos_por_ciclo=150, dosis=100,
+                       intervalo_maximo=INTERVALO_MAXIMO, n_validacion=500, semilla=42, n_procesos=1,
+                       tamano_fragmento=1024, progreso=None):
+    """Simula la malla de un medicamento y devuelve su `Sustituto` con el error medido.
+
+    Cada grupo de categorías y tramo de masa tiene una malla uniforme de
+    `nodos[c]` valores (al menos 2) de cada covariable continua sobre
+    `dominio[c]`. El error se mide en `n_validacion` pacientes sorteados de
+    forma uniforme en el dominio. `n_procesos` funciona como en
+    `simular_poblacion_paralela`; `progreso(hechos, total)` cuenta pacientes.
+    """
+    if medicamento not in lista_medicamentos:
+        raise ValueError(f"Medicamento desconocido: {medicamento}")
+    if min(nodos[c] for c in CONTINUAS) < 2:
+        raise ValueError("Cada covariable continua necesita al menos 2 nodos")
+    grupo, representantes = _agrupar_categorias(medicamento, intervalo_maximo)
+    tramos = _tramos_masa(*dominio['masa'])
+    forma = (len(representantes), len(tramos)) + tuple(nodos[c] for c in CONTINUAS)
+
+    g, s, im, ia, ie = np.indices(forma).reshape(len(forma), -1)
+    covariables = {
+        'masa': tramos[s, 0] + (tramos[s, 1] - tramos[s, 0]) * im / (nodos['masa'] - 1),
+        'altura': np.linspace(*dominio['altura'], nodos['altura'])[ia],
+        'edad': np.linspace(*dominio['edad'], nodos['edad'])[ie],
+    }
+    covariables.update((c, representantes[g, j]) for j, c in enumerate(CATEGORICAS))
+
+    total = len(g) + n_validacion
+    hechos = 0
+
+    def avance(resultado):
+        nonlocal hechos
+        hechos += len(resultado[0])
+        if progreso is not None:
+            progreso(hechos, total)
+        return resultado
+
+    opciones = (num_dosis, puntos_por_ciclo, dosis, intervalo_maximo)
+    resultados = _simular(medicamento, covariables, opciones, n_procesos, tamano_fragmento, avance)
+    metricas = np.concatenate([r[0] for r in resultados]).reshape(forma + (len(SALIDAS),))
+    curvas = np.concatenate([r[1] for r in resultados]).reshape(forma + (-1,))
+    metadatos = {
+        'version': VERSION_SUSTITUTO, 'medicamento': medicamento,
+        'dominio': {c: [float(v) for v in dominio[c]] for c in CONTINUAS},
+        'nodos': {c: int(nodos[c]) for c in CONTINUAS},
+        'num_dosis': num_dosis, 'puntos_por_ciclo': puntos_por_ciclo, 'dosis': dosis,
+        'intervalo_maximo': intervalo_maximo, 'simulaciones': len(g),
+    }
+    sustituto = Sustituto(metadatos, grupo, tramos, metricas, curvas)
+
+    if n_validacion:
+        rng = np.random.default_rng(semilla)
+        validacion = {c: dominio[c][0] + (dominio[c][1] - dominio[c][0]) * rng.random(n_validacion)
+                      for c in CONTINUAS}
+        validacion.update((c, rng.integers(0, len(CATEGORIAS[c]), n_validacion).astype(np.int8))
+                          for c in CATEGORICAS)
+        resultados = _simular(medicamento, validacion, opciones, n_procesos, tamano_fragmento, avance)
+        referencia = np.concatenate([r[0] for r in resultados])
+        C_referencia = np.concatenate([r[1] for r in resultados])
+        prediccion = sustituto.predecir(Cohorte.desde_covariables(validacion, medicamento), curvas=True)
+        errores = {s: np.abs(prediccion[s] - referencia[:, k]) / np.maximum(np.abs(referencia[:, k]), 1e-12)
+                   for k, s in enumerate(SALIDAS)}
+        errores['curva'] = (np.max(np.abs(prediccion['C'] - C_referencia), axis=1)
+                            / np.maximum(np.max(C_referencia, axis=1), 1e-12))
+        metadatos['error'] = {clave: {'max': float(np.max(e)), 'p99': float(np.quantile(e, 0.99))}
+                              for clave, e in errores.items()}
+    return sustituto
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m farmacocinetica.sustituto',
+        description="Entrena el modelo sustituto de un medicamento y lo guarda en un archivo .npz.")
+    parser.add_argument('medicamento')
+    parser.add_argument('ruta', help="archivo .npz de salida")
+    for c in CONTINUAS:
+        parser.add_argument(f'--nodos-{c}', type=int, default=NODOS[c])
+    parser.add_argument('--num-dosis', type=int, default=5)
+    parser.add_argument('--puntos-por-ciclo', type=int, default=150)
+    parser.add_argument('--validacion', type=int, default=500, help="pacientes para medir el error")
+    parser.add_argument('--procesos', type=int, default=1, help="procesos para las simulaciones")
+    args = parser.parse_args(argv)
+
+    nodos = {c: getattr(args, f'nodos_{c}') for c in CONTINUAS}
+    sustituto = entrenar_sustituto(args.medicamento, nodos=nodos, num_dosis=args.num_dosis,
+                                   puntos_por_ciclo=args.puntos_por_ciclo, n_validacion=args.validacion,
+                                   n_procesos=args.procesos)
+    sustituto.guardar(args.ruta)
+    print(f"{args.medicamento}: {sustituto.metadatos['simulaciones']} simulaciones, "
+          f"{sustituto.metricas.shape[0]} grupos de categorías x {len(sustituto.tramos)} tramos de masa "
+          f"-> {args.ruta}")
+    if sustituto.error:
+        print(f"\n{'salida':<8}{'error máx.':>12}{'p99':>12}")
+        for clave, e in sustituto.error.items():
+            print(f"{clave:<8}{e['max']:>12.2e}{e['p99']:>12.2e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# ----- Tareas en segundo plano -----
+# Las interfaces ejecutan las simulaciones en un hilo para que el bucle de Tk
+# siga respondiendo. La función recibe `progreso(hechos, total)`, que anota el
+# avance y, si se pidió cancelar, lanza TareaCancelada para interrumpirla en
+# el siguiente punto de control. El hilo nunca toca la interfaz: ésta consulta
+# el estado de la tarea periódicamente (p. ej. con `after`).
+import threading
+
+
+class TareaCancelada(Exception):
+    """La tarea se interrumpió con `Tarea.cancelar`."""
+
+
+class Tarea:
+    """Ejecuta `funcion(progreso=...)` en un hilo aparte.
+
+    Al terminar, `resultado` guarda lo devuelto por la función o `error` la
+    excepción que lanzó (TareaCancelada si se canceló).
+    """
+
+    def __init__(self, funcion):
+        self.hechos = 0
+        self.total = None
+        self.resultado = None
+        self.error = None
+        self._cancelar = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, args=(funcion,), daemon=True)
+        self._hilo.start()
+
+    def _ejecutar(self, funcion):
+        try:
+            self.resultado = funcion(progreso=self.progreso)
+        except Exception as e:
+            self.error = e
+
+    def progreso(self, hechos, total):
+        self.hechos, self.total = hechos, total
+        if self._cancelar.is_set():
+            raise TareaCancelada()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def terminada(self):
+        return not self._hilo.is_alive()
+
+    @property
+    def cancelacion_pedida(self):
+        return self._cancelar.is_set()
+
+    @property
+    def cancelada(self):
+        return isinstance(self.error, TareaCancelada)
+
+    @property
+    def fraccion(self):
+        """Avance entre 0 y 1, o None si la función todavía no informó un total."""
+        return self.hechos / self.total if self.total else None
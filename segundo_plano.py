@@ -0,0 +1,105 @@
+# Ejecución de simulaciones fuera del hilo de Tk y seguimiento de recursos,
+# compartidos por Farmacinetica.py y Simulaciones.py. Como las interfaces, no
+# importa tkinter hasta que se usa.
+import os
+import weakref
+
+from farmacocinetica import Tarea
+
+# Figuras de matplotlib creadas por las ventanas de resultados; una figura sale
+# del conjunto cuando ya nadie la referencia
+figuras_vivas = weakref.WeakSet()
+
+# Las tareas que terminan antes de este tiempo no llegan a mostrar la ventana de progreso
+RETARDO_PROGRESO_MS = 300
+INTERVALO_REVISION_MS = 50
+
+def ejecutar_en_segundo_plano(root, titulo, funcion, al_terminar, botones=(), cancelable=True):
+    """Ejecuta `funcion(progreso=...)` en una `Tarea` y llama a `al_terminar(resultado)` desde el bucle de Tk.
+
+    Mientras la tarea corre, `botones` quedan deshabilitados y, pasados
+    RETARDO_PROGRESO_MS, se muestra una ventana con barra de progreso y un
+    botón Cancelar. Si la función falla, el error se muestra con messagebox;
+    si se cancela, no se llama a `al_terminar`. Las funciones que nunca llaman
+    a `progreso` no se pueden interrumpir: con `cancelable=False` la ventana
+    no ofrece Cancelar ni se cierra.
+    """
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+
+    tarea = Tarea(funcion)
+    for boton in botones:
+        boton.config(state=tk.DISABLED)
+    dialogo = {}
+
+    def cancelar():
+        tarea.cancelar()
+        dialogo['etiqueta'].config(text="Cancelando...")
+        dialogo['cancelar'].config(state=tk.DISABLED)
+
+    def mostrar_dialogo():
+        ventana = tk.Toplevel(root)
+        ventana.title(titulo)
+        ventana.resizable(False, False)
+        ventana.transient(root)
+        ventana.protocol("WM_DELETE_WINDOW", cancelar if cancelable else lambda: None)
+        dialogo['ventana'] = ventana
+        dialogo['etiqueta'] = ttk.Label(ventana, text="Simulando...")
+        dialogo['etiqueta'].pack(padx=20, pady=(15, 5))
+        dialogo['barra'] = ttk.Progressbar(ventana, length=300, mode='indeterminate')
+        dialogo['barra'].pack(padx=20, pady=5 if cancelable else (5, 15))
+        dialogo['barra'].start(10)
+        if cancelable:
+            dialogo['cancelar'] = ttk.Button(ventana, text="Cancelar", command=cancelar)
+            dialogo['cancelar'].pack(pady=(5, 15))
+
+    def actualizar_dialogo():
+        fraccion = tarea.fraccion
+        if fraccion is None or tarea.cancelacion_pedida:
+            return
+        barra = dialogo['barra']
+        if str(barra.cget('mode')) != 'determinate':
+            barra.stop()
+            barra.config(mode='determinate', maximum=100)
+        barra.config(value=100 * fraccion)
+        dialogo['etiqueta'].config(text=f"Simulando... {100 * fraccion:.0f} %")
+
+    def revisar(esperado=0):
+        if not tarea.terminada:
+            esperado += INTERVALO_REVISION_MS
+            if not dialogo and esperado >= RETARDO_PROGRESO_MS:
+                mostrar_dialogo()
+            if dialogo:
+                actualizar_dialogo()
+            root.after(INTERVALO_REVISION_MS, revisar, esperado)
+            return
+        if dialogo:
+            dialogo['ventana'].destroy()
+        for boton in botones:
+            boton.config(state=tk.NORMAL)
+        if tarea.cancelada:
+            return
+        if tarea.error is not None:
+            messagebox.showerror("Error", f"La simulación falló: {tarea.error}")
+            return
+        al_terminar(tarea.resultado)
+
+    root.after(INTERVALO_REVISION_MS, revisar)
+    return tarea
+
+def memoria_proceso_mb():
+    """Memoria residente del proceso en MB, o None si no se puede medir.
+
+    Usa psutil si está instalado y, si no, /proc/self/statm (Linux).
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
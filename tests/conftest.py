@@ -0,0 +1,62 @@
+# Pruebas de regresión numérica del núcleo `farmacocinetica`. Los caminos
+# rápidos (lotes, procesos, caché) se comparan con
+# `simular_dosis_unica` / `simular_dosis_multiples` o con odeint a
+# tolerancias estrictas.
+#
+#   python -m pytest tests
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.integrate import odeint
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmacocinetica import construir_parametros, compilar_modelo
+
+# Combinaciones que recorren todas las categorías y los extremos de masa del intervalo de dosificación
+COVARIABLES = [
+    (70, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal", "Sin alergia"),
+    (45, 1.55, 72, "Mujer", "Insuficiencia renal", "Metabolizador lento", "Alergia leve"),
+    (95, 1.90, 41, "Hombre", "Insuficiencia hepática", "Metabolizador rápido", "Alergia severa"),
+    (62, 1.68, 55, "Mujer", "Sin comorbilidad", "Metabolizador rápido", "Alergia moderada"),
+]
+
+
+@pytest.fixture
+def paciente():
+    return construir_parametros(*COVARIABLES[0])
+
+
+@pytest.fixture
+def pacientes():
+    return [construir_parametros(*c) for c in COVARIABLES]
+
+
+def referencia_odeint(params, medicamento, t, tiempos_dosis=(0.0,), dosis=100, tol=1e-12):
+    """C, D, V en `t` con odeint a tolerancia `tol`, reiniciando en cada dosis (bolo sobre D).
+
+    `dosis` es un valor común o uno por administración.
+    """
+    rhs, jac = compilar_modelo(params, medicamento)
+    t = np.asarray(t, dtype=float)
+    limites = list(tiempos_dosis[1:]) + [np.inf]
+    dosis = np.broadcast_to(np.asarray(dosis, dtype=float), (len(tiempos_dosis),))
+    sol = np.empty((len(t), 3))
+    y = np.array([0.0, 0.0, params['V_d']])
+    for inicio, fin, cantidad in zip(tiempos_dosis, limites, dosis):
+        y[1] += cantidad
+        dentro = (t >= inicio) & (t < fin)
+        malla = np.concatenate([[inicio], t[dentro], [] if np.isinf(fin) else [fin]])
+        tramo = odeint(rhs, y, malla, Dfun=jac, rtol=tol, atol=tol)
+        sol[dentro] = tramo[1:1 + np.count_nonzero(dentro)]
+        y = tramo[-1].copy()
+    return sol
+
+
+def diferencia_relativa(a, b):
+    """Máxima diferencia absoluta por columna, relativa al máximo de esa columna en `b`."""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    escala = np.max(np.abs(b), axis=tuple(range(b.ndim - 1)))
+    return np.max(np.abs(a - b) / np.where(escala > 0, escala, 1.0))
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import (AlmacenTrayectorias, crear_almacen, simular_poblacion_en_disco,
+                             simular_poblacion_paralela)
+
+OPCIONES = dict(n_pacientes=150, semilla=11, tamano_fragmento=64, num_dosis=3, puntos_por_ciclo=40)
+
+
+@pytest.mark.parametrize('n_procesos', [1, 2])
+def test_almacen_igual_a_la_simulacion_en_memoria(tmp_path, n_procesos):
+    almacen = simular_poblacion_en_disco("Paracetamol", str(tmp_path / "cohorte"), n_procesos=n_procesos,
+                                         dtype=np.float64, **OPCIONES)
+    covariables, t, sol, intervalos = simular_poblacion_paralela("Paracetamol", n_procesos=1, **OPCIONES)
+    assert isinstance(almacen.sol, np.memmap) and not almacen.sol.flags.writeable
+    np.testing.assert_array_equal(almacen.sol, sol)
+    np.testing.assert_array_equal(almacen.intervalos, intervalos)
+    for columna, valores in covariables.items():
+        np.testing.assert_array_equal(almacen.covariables[columna], valores)
+    t_fragmento, sol_fragmento = almacen.fragmento(20, 90)
+    np.testing.assert_array_equal(t_fragmento, t[20:90])
+    np.testing.assert_array_equal(sol_fragmento, sol[20:90])
+
+
+def test_float32_y_reapertura(tmp_path):
+    ruta = str(tmp_path / "cohorte")
+    simular_poblacion_en_disco("Amoxicilina", ruta, n_procesos=1, **OPCIONES)
+    _, _, sol, _ = simular_poblacion_paralela("Amoxicilina", n_procesos=1, **OPCIONES)
+    almacen = AlmacenTrayectorias(ruta)
+    assert almacen.sol.dtype == np.float32 and len(almacen) == OPCIONES['n_pacientes']
+    np.testing.assert_array_equal(almacen.sol, sol.astype(np.float32))
+    assert almacen.metadatos['medicamento'] == "Amoxicilina"
+    assert almacen.metadatos['semilla'] == OPCIONES['semilla']
+    cohorte = almacen.cohorte(10, 30)
+    assert len(cohorte) == 20
+    np.testing.assert_array_equal(cohorte.intervalos, almacen.intervalos[10:30])
+    assert cohorte.calcular_intervalos().tolist() == almacen.intervalos[10:30].tolist()
+
+
+def test_crear_almacen_reserva_los_archivos(tmp_path):
+    almacen = crear_almacen(str(tmp_path / "vacio"), 5, "Aspirina", num_dosis=2, puntos_por_ciclo=10)
+    assert almacen.sol.shape == (5, 20, 3)
+    almacen.sol[1] = 1.0
+    almacen.flush()
+    assert AlmacenTrayectorias(str(tmp_path / "vacio")).sol[1].sum() == 60
+
+
+def test_medicamento_desconocido(tmp_path):
+    with pytest.raises(ValueError):
+        simular_poblacion_en_disco("Desconocido", str(tmp_path / "x"), n_pacientes=1)
+    assert not (tmp_path / "x").exists()
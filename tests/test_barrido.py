@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+import pytest
+
+from farmacocinetica import BarridoDosisUnica, construir_parametros, simular_dosis_unica
+
+PASOS = {'masa': 0.5, 'altura': 0.01, 'edad': 1}
+
+
+def paciente(masa, comorbilidad="Sin comorbilidad"):
+    return construir_parametros(masa, 1.75, 30, "Hombre", comorbilidad, "Metabolizador normal", "Sin alergia")
+
+
+def test_la_celda_simulada_coincide_con_simular_dosis_unica():
+    barrido = BarridoDosisUnica(PASOS)
+    assert barrido.consultar(paciente(70), "Ibuprofeno") is None
+    t, sol = barrido.simular(paciente(70), "Ibuprofeno")
+    t_directo, sol_directa = simular_dosis_unica(paciente(70), "Ibuprofeno")
+    np.testing.assert_array_equal(t, t_directo)
+    np.testing.assert_array_equal(sol, sol_directa)
+    # Una masa dentro de la misma celda devuelve la misma solución
+    assert barrido.consultar(paciente(70.1), "Ibuprofeno")[1] is sol
+    assert barrido.estimar(paciente(70.1), "Ibuprofeno")[1] is sol
+    with pytest.raises(ValueError):
+        sol[0, 0] = 1.0
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Paracetamol", "Metformina"])
+def test_vista_previa_entre_vecinas_cerca_de_la_exacta(medicamento):
+    barrido = BarridoDosisUnica(PASOS)
+    barrido.simular(paciente(69), medicamento)
+    barrido.simular(paciente(71), medicamento)
+    _, previa = barrido.estimar(paciente(70), medicamento)
+    _, sol = simular_dosis_unica(paciente(70), medicamento)
+    assert np.max(np.abs(previa[:, 0] - sol[:, 0])) / np.max(sol[:, 0]) < 0.01
+    assert barrido.consultar(paciente(70), medicamento) is None  # la vista previa no se guarda
+
+
+def test_sin_vecinas_no_hay_vista_previa():
+    barrido = BarridoDosisUnica(PASOS)
+    assert barrido.estimar(paciente(70), "Ibuprofeno") is None
+    barrido.simular(paciente(70), "Ibuprofeno")
+    # Otro medicamento, otra categoría o una celda fuera del radio no sirven de vecinas
+    assert barrido.estimar(paciente(71), "Loratadina") is None
+    assert barrido.estimar(paciente(71, "Insuficiencia renal"), "Ibuprofeno") is None
+    assert barrido.estimar(paciente(90), "Ibuprofeno") is None
+    assert barrido.estimar(paciente(71), "Ibuprofeno") is not None
+
+
+def test_desalojo_lru():
+    barrido = BarridoDosisUnica(PASOS, max_entradas=2)
+    barrido.simular(paciente(60), "Ibuprofeno")
+    barrido.simular(paciente(61), "Ibuprofeno")
+    barrido.consultar(paciente(60), "Ibuprofeno")
+    barrido.simular(paciente(62), "Ibuprofeno")
+    assert len(barrido) == 2
+    assert barrido.consultar(paciente(61), "Ibuprofeno") is None
+    assert barrido.consultar(paciente(60), "Ibuprofeno") is not None
+    # La celda desalojada tampoco entra en la vista previa
+    _, previa = barrido.estimar(paciente(61), "Ibuprofeno")
+    _, sol_60 = barrido.consultar(paciente(60), "Ibuprofeno")
+    _, sol_62 = barrido.consultar(paciente(62), "Ibuprofeno")
+    np.testing.assert_allclose(previa, (sol_60 + sol_62) / 2)
+
+
+def test_simular_en_otro_hilo_mientras_se_estima():
+    barrido = BarridoDosisUnica(PASOS)
+    barrido.simular(paciente(60.5), "Amoxicilina")
+    masas = np.arange(50, 60.5, 0.5)
+    hilo = threading.Thread(target=lambda: [barrido.simular(paciente(m), "Amoxicilina") for m in masas])
+    hilo.start()
+    while hilo.is_alive():
+        assert barrido.estimar(paciente(60), "Amoxicilina") is not None
+    hilo.join()
+    assert len(barrido) == len(masas) + 1
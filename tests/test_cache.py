@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import COVARIABLES
+from farmacocinetica import CacheSimulaciones, construir_parametros, simular_dosis_unica, simular_dosis_multiples
+
+
+def test_acierto_devuelve_el_mismo_resultado_que_sin_cache(paciente):
+    cache = CacheSimulaciones()
+    t, sol = cache.simular_dosis_unica(paciente, "Ibuprofeno")
+    t_directo, sol_directa = simular_dosis_unica(paciente, "Ibuprofeno")
+    np.testing.assert_array_equal(t, t_directo)
+    np.testing.assert_array_equal(sol, sol_directa)
+    assert cache.simular_dosis_unica(dict(paciente), "Ibuprofeno")[1] is sol
+    assert cache.estadisticas()['aciertos'] == 1
+    assert cache.estadisticas()['fallos'] == 1
+
+
+def test_resultados_de_solo_lectura(paciente):
+    t, sol, intervalo = CacheSimulaciones().simular_dosis_multiples(paciente, "Aspirina")
+    assert intervalo == simular_dosis_multiples(paciente, "Aspirina")[2]
+    with pytest.raises(ValueError):
+        sol[0, 0] = 1.0
+
+
+def test_opciones_medicamento_y_funcion_forman_parte_de_la_clave(paciente):
+    cache = CacheSimulaciones()
+    cache.simular_dosis_unica(paciente, "Ibuprofeno")
+    cache.simular_dosis_unica(paciente, "Ibuprofeno", dosis=200)
+    cache.simular_dosis_unica(paciente, "Loratadina")
+    cache.simular_dosis_multiples(paciente, "Ibuprofeno")
+    assert cache.estadisticas()['fallos'] == 4
+    assert cache.estadisticas()['aciertos'] == 0
+
+
+def test_desalojo_lru_por_entradas():
+    cache = CacheSimulaciones(max_entradas=2)
+    a, b, c = (construir_parametros(*covariables) for covariables in COVARIABLES[:3])
+    cache.simular_dosis_unica(a, "Ibuprofeno")
+    cache.simular_dosis_unica(b, "Ibuprofeno")
+    cache.simular_dosis_unica(a, "Ibuprofeno")  # a pasa a ser la más reciente
+    cache.simular_dosis_unica(c, "Ibuprofeno")  # desaloja b
+    assert cache.estadisticas()['desalojos'] == 1
+    cache.simular_dosis_unica(a, "Ibuprofeno")
+    assert cache.estadisticas()['aciertos'] == 2
+    cache.simular_dosis_unica(b, "Ibuprofeno")
+    assert cache.estadisticas()['fallos'] == 4
+
+
+def test_desalojo_por_bytes(paciente):
+    t, sol = simular_dosis_unica(paciente, "Ibuprofeno")
+    cache = CacheSimulaciones(max_bytes=int(1.5 * (t.nbytes + sol.nbytes)))
+    cache.simular_dosis_unica(paciente, "Ibuprofeno")
+    cache.simular_dosis_unica(paciente, "Paracetamol")
+    assert cache.estadisticas()['entradas'] == 1
+    assert cache.estadisticas()['bytes'] <= cache.max_bytes
+
+
+def test_cuantizacion_comparte_la_celda(paciente):
+    cache = CacheSimulaciones(cuantizacion={'masa': 0.5, 'edad': 1})
+    cerca = construir_parametros(70.2, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal",
+                                 "Sin alergia")
+    _, sol = cache.simular_dosis_unica(cerca, "Ibuprofeno")
+    assert cache.simular_dosis_unica(paciente, "Ibuprofeno")[1] is sol
+    # El resultado es el del paciente redondeado a la celda, no el del primero que la ocupó
+    np.testing.assert_array_equal(sol, simular_dosis_unica(paciente, "Ibuprofeno")[1])
+
+
+def test_nivel_en_disco_sobrevive_a_una_cache_nueva(paciente, tmp_path):
+    primera = CacheSimulaciones(directorio=str(tmp_path))
+    t, sol, intervalo = primera.simular_dosis_multiples(paciente, "Metformina")
+    assert len(os.listdir(tmp_path)) == 1
+
+    segunda = CacheSimulaciones(directorio=str(tmp_path))
+    t_disco, sol_disco, intervalo_disco = segunda.simular_dosis_multiples(paciente, "Metformina")
+    assert segunda.estadisticas()['aciertos_disco'] == 1
+    assert segunda.estadisticas()['fallos'] == 0
+    np.testing.assert_array_equal(t_disco, t)
+    np.testing.assert_array_equal(sol_disco, sol)
+    assert intervalo_disco == intervalo
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from conftest import COVARIABLES
+from farmacocinetica import Cohorte, construir_parametros, simular_cohorte, simular_dosis_multiples_lote
+
+# Columnas por paciente: masa, altura, edad y seis derivadas en float64, cinco códigos int8
+BYTES_COLUMNAS = 9 * 8 + 5
+
+
+def test_ida_y_vuelta_por_pacientes(pacientes):
+    cohorte = Cohorte.desde_pacientes(pacientes, "Amoxicilina")
+    for i, params in enumerate(pacientes):
+        vuelta = cohorte.paciente(i)
+        assert vuelta == params
+        assert type(vuelta['edad']) is int
+    assert Cohorte.desde_pacientes([cohorte.paciente(i) for i in range(len(cohorte))], "Amoxicilina").paciente(2) \
+        == pacientes[2]
+
+
+def test_edad_entera_aunque_la_columna_sea_float():
+    cohorte = simular_cohorte("Ibuprofeno", 20, num_dosis=1, puntos_por_ciclo=10)
+    assert cohorte.edad.dtype == np.float64
+    edades = [cohorte.paciente(i)['edad'] for i in range(len(cohorte))]
+    assert all(type(e) is int for e in edades)
+    np.testing.assert_array_equal(edades, cohorte.edad)
+
+
+def test_arreglos_reproducen_la_simulacion_por_pacientes(pacientes):
+    cohorte = Cohorte.desde_pacientes(pacientes, "Metformina")
+    sol = cohorte.simular(num_dosis=3, puntos_por_ciclo=40)
+    _, directa = simular_dosis_multiples_lote(cohorte.arreglos(), cohorte.intervalos, 3, 40)
+    np.testing.assert_array_equal(sol, directa)
+
+
+def test_nbytes_cuenta_columnas_y_trayectorias():
+    n, num_dosis, puntos = 50, 4, 30
+    cohorte = Cohorte.desde_pacientes([construir_parametros(*COVARIABLES[i % 4]) for i in range(n)], "Aspirina")
+    assert cohorte.nbytes == n * BYTES_COLUMNAS
+    cohorte.calcular_intervalos()
+    assert cohorte.nbytes == n * (BYTES_COLUMNAS + 8)
+    cohorte.simular(num_dosis, puntos)
+    assert cohorte.nbytes == n * (BYTES_COLUMNAS + 8 + num_dosis * puntos * 3 * 8)
+    cohorte.simular(num_dosis, puntos, dtype=np.float32)
+    assert cohorte.nbytes == n * (BYTES_COLUMNAS + 8 + num_dosis * puntos * 3 * 4)
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Loratadina"])
+def test_trayectorias_float32(medicamento):
+    doble = simular_cohorte(medicamento, 40, num_dosis=3, puntos_por_ciclo=50)
+    simple = simular_cohorte(medicamento, 40, num_dosis=3, puntos_por_ciclo=50, dtype=np.float32)
+    assert simple.sol.dtype == np.float32 and simple.sol.shape == doble.sol.shape
+    np.testing.assert_array_equal(simple.sol, doble.sol.astype(np.float32))
+    np.testing.assert_array_equal(simple.t, doble.t)
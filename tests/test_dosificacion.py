@@ -0,0 +1,36 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from farmacocinetica import (calcular_intervalo_dosificacion, calcular_intervalo_dosificacion_lote,
+                             lista_medicamentos, lista_comorbilidades, lista_genetica, lista_alergia)
+from farmacocinetica.dosificacion import MASA_BAJA, MASA_ALTA
+from farmacocinetica.parametros import codificar
+
+DESCONOCIDO = "Desconocido"
+# Los umbrales de masa son estrictos: MASA_BAJA y MASA_ALTA no llevan ajuste
+MASAS = [30.0, np.nextafter(MASA_BAJA, 0), MASA_BAJA, np.nextafter(MASA_BAJA, np.inf), 70.0,
+         np.nextafter(MASA_ALTA, 0), MASA_ALTA, np.nextafter(MASA_ALTA, np.inf), 150.0]
+
+
+@pytest.mark.parametrize('intervalo_maximo', [24, 48])
+def test_lote_igual_a_la_version_escalar_en_todas_las_combinaciones(intervalo_maximo):
+    combinaciones = list(itertools.product(lista_medicamentos + [DESCONOCIDO], lista_comorbilidades + [DESCONOCIDO],
+                                           lista_genetica + [DESCONOCIDO], lista_alergia + [DESCONOCIDO], MASAS))
+    medicamento, comorbilidad, genetica, alergia, masa = zip(*combinaciones)
+    lote = calcular_intervalo_dosificacion_lote(codificar(medicamento, lista_medicamentos),
+                                                codificar(comorbilidad, lista_comorbilidades),
+                                                codificar(genetica, lista_genetica), np.array(masa),
+                                                codificar(alergia, lista_alergia), intervalo_maximo)
+    escalar = [calcular_intervalo_dosificacion({'comorbilidad': c, 'genetica': g, 'masa': x, 'alergia': a}, m,
+                                               intervalo_maximo)
+               for m, c, g, a, x in combinaciones]
+    np.testing.assert_array_equal(lote, escalar)
+
+
+def test_medicamento_por_nombre_y_masa_en_los_umbrales():
+    masa = np.array([MASA_BAJA, MASA_ALTA, 49.9, 90.1])
+    ceros = np.zeros(len(masa), dtype=np.int8)
+    lote = calcular_intervalo_dosificacion_lote("Metformina", ceros, ceros, masa, ceros)
+    np.testing.assert_array_equal(lote, [12, 12, 12 * 1.05, 12 * 0.95])
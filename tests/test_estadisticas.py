@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import Distribucion, calcular_metricas, simular_poblacion_paralela, simular_poblacion_resumen
+from farmacocinetica.estadisticas import bordes_logaritmicos, interpolar_en_malla
+
+# Un intervalo de los bordes por defecto abarca un 2.3 % del valor
+ANCHO_INTERVALO = 0.025
+Q = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def test_cuantiles_y_momentos_en_flujo_iguales_a_numpy():
+    valores = np.random.default_rng(0).lognormal(0, 1.5, 20000)
+    distribucion = Distribucion(bordes_logaritmicos())
+    for fragmento in np.array_split(valores, 7):
+        distribucion.agregar(fragmento)
+    resumen = distribucion.resumen(Q)
+    assert resumen['n'] == len(valores)
+    assert resumen['media'] == pytest.approx(valores.mean(), rel=1e-12)
+    assert resumen['desviacion'] == pytest.approx(valores.std(ddof=1), rel=1e-12)
+    assert resumen['minimo'] == valores.min() and resumen['maximo'] == valores.max()
+    for q in Q:
+        assert resumen['cuantiles'][q] == pytest.approx(np.quantile(valores, q), rel=ANCHO_INTERVALO)
+
+
+def test_combinar_no_depende_del_reparto():
+    valores = np.random.default_rng(1).uniform(0.1, 50, (3000, 4))
+    valores[::11, 2] = np.nan
+    una = Distribucion(bordes_logaritmicos(), forma=(4,))
+    una.agregar(valores)
+    partes = [Distribucion(bordes_logaritmicos(), forma=(4,)) for _ in range(3)]
+    for parte, fragmento in zip(partes, np.array_split(valores, [100, 2500])):
+        parte.agregar(fragmento)
+    combinada = partes[0].combinar(partes[1]).combinar(partes[2])
+    np.testing.assert_array_equal(combinada.conteos, una.conteos)
+    np.testing.assert_array_equal(combinada.n, np.sum(~np.isnan(valores), axis=0))
+    np.testing.assert_allclose(combinada.media, np.nanmean(valores, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(combinada.desviacion, np.nanstd(valores, axis=0, ddof=1), rtol=1e-10)
+    for q, valor in combinada.cuantiles((0.1, 0.9)).items():
+        np.testing.assert_allclose(valor, np.nanquantile(valores, q, axis=0), rtol=ANCHO_INTERVALO)
+
+
+def test_columna_sin_datos_da_nan():
+    distribucion = Distribucion(bordes_logaritmicos(), forma=(2,))
+    distribucion.agregar(np.array([[1.0, np.nan], [2.0, np.nan]]))
+    cuantiles = distribucion.cuantiles((0.5,))[0.5]
+    assert np.isfinite(cuantiles[0]) and np.isnan(cuantiles[1])
+
+
+def test_resumen_igual_a_las_trayectorias_completas():
+    opciones = dict(n_pacientes=400, semilla=5, tamano_fragmento=128, num_dosis=3, puntos_por_ciclo=60)
+    resumen = simular_poblacion_resumen("Amoxicilina", n_procesos=1, puntos_malla=100, cuantiles=Q, **opciones)
+    _, t, sol, intervalos = simular_poblacion_paralela("Amoxicilina", n_procesos=1, **opciones)
+    metricas = calcular_metricas(t, sol, 60)
+    for clave in ('cmax', 'auc', 'valle'):
+        assert resumen[clave]['n'] == 400
+        assert resumen[clave]['media'] == pytest.approx(metricas[clave].mean(), rel=1e-12)
+        for q in Q:
+            assert resumen[clave]['cuantiles'][q] == pytest.approx(np.quantile(metricas[clave], q),
+                                                                   rel=ANCHO_INTERVALO)
+    C = interpolar_en_malla(sol[:, :, 0], intervalos, 3, 60, resumen['t'])
+    np.testing.assert_array_equal(resumen['n'], np.sum(~np.isnan(C), axis=0))
+    # Al final de la malla quedan pocos pacientes y los cuantiles de la muestra
+    # dependen de la regla de interpolación entre ellos; se comparan los
+    # instantes a los que llega toda la cohorte
+    completos = resumen['n'] == 400
+    assert completos.sum() > 20
+    for q in (0.05, 0.5, 0.95):
+        np.testing.assert_allclose(resumen['bandas'][q][completos], np.quantile(C[:, completos], q, axis=0),
+                                   rtol=ANCHO_INTERVALO, atol=1e-9)
+
+
+def test_resumen_no_depende_del_numero_de_procesos():
+    opciones = dict(n_pacientes=300, semilla=2, tamano_fragmento=64, num_dosis=2, puntos_por_ciclo=40,
+                    puntos_malla=50)
+    uno = simular_poblacion_resumen("Ibuprofeno", n_procesos=1, **opciones)
+    dos = simular_poblacion_resumen("Ibuprofeno", n_procesos=2, **opciones)
+    for q, banda in uno['bandas'].items():
+        np.testing.assert_array_equal(banda, dos['bandas'][q])
+    assert uno['cmax']['media'] == dos['cmax']['media']
@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import COVARIABLES
+from farmacocinetica import construir_parametros, simular_hasta_estado_estacionario, resolver_ciclo_periodico
+from farmacocinetica.estado_estacionario import _distancia_al_limite
+
+CON_INSUFICIENCIA_RENAL = (70, 1.75, 30, "Hombre", "Insuficiencia renal", "Metabolizador normal", "Sin alergia")
+
+
+@pytest.mark.parametrize('covariables', COVARIABLES + [CON_INSUFICIENCIA_RENAL])
+@pytest.mark.parametrize('tol', [1e-3, 1e-5])
+def test_detector_cerca_del_ciclo_limite(covariables, tol):
+    params = construir_parametros(*covariables)
+    _, _, _, detectado = simular_hasta_estado_estacionario(params, "Amoxicilina", tol=tol, max_dosis=400)
+    _, _, _, exacto = resolver_ciclo_periodico(params, "Amoxicilina")
+    assert detectado['convergido']
+    # El límite se extrapola de ciclos que no son exactamente geométricos
+    assert detectado['valle'] == pytest.approx(exacto['valle'], rel=2 * tol)
+    assert detectado['pico'] == pytest.approx(exacto['pico'], rel=2 * tol)
+
+
+def test_distancia_exacta_en_una_sucesion_geometrica():
+    x = [2 + 0.5 * 0.9 ** k for k in range(3)]
+    assert _distancia_al_limite(*x) == pytest.approx(0.5 * 0.9 ** 2 / 2)
+    assert _distancia_al_limite(None, *x[1:]) == float('inf')
+    # Sin contracción no hay límite que estimar
+    assert _distancia_al_limite(1.0, 2.0, 3.0) == float('inf')
@@ -0,0 +1,57 @@
+import csv
+
+import numpy as np
+import pytest
+
+from conftest import COVARIABLES
+from farmacocinetica import construir_parametros, simular_dosis_multiples, calcular_metricas
+from farmacocinetica.lote import ejecutar_lote, main
+
+ENCABEZADO = ['masa', 'altura', 'edad', 'genero', 'comorbilidad', 'genetica', 'alergia', 'medicamento']
+
+
+def escribir_csv(ruta, filas):
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(ENCABEZADO)
+        escritor.writerows(filas)
+
+
+def test_resumen_igual_a_la_simulacion_escalar(tmp_path):
+    entrada, salida = tmp_path / 'pacientes.csv', tmp_path / 'resumen.csv'
+    medicamentos = ["Ibuprofeno", "Metformina", "Loratadina", "Paracetamol"]
+    escribir_csv(entrada, [list(c) + [m] for c, m in zip(COVARIABLES, medicamentos)])
+    assert ejecutar_lote(str(entrada), str(salida), tamano_bloque=3) == len(COVARIABLES)
+    with open(salida, newline='', encoding='utf-8') as f:
+        resumen = list(csv.DictReader(f))
+    for fila, covariables, medicamento in zip(resumen, COVARIABLES, medicamentos):
+        t, sol, intervalo = simular_dosis_multiples(construir_parametros(*covariables), medicamento)
+        metricas = calcular_metricas(t, sol, 150)
+        assert fila['medicamento'] == medicamento
+        assert float(fila['intervalo']) == pytest.approx(intervalo)
+        for columna in ('cmax', 'auc', 'valle', 'razon_acumulacion'):
+            assert float(fila[columna]) == pytest.approx(metricas[columna], rel=1e-6)
+
+
+def test_celdas_categoricas_vacias_usan_los_valores_por_defecto(tmp_path):
+    entrada, salida = tmp_path / 'pacientes.csv', tmp_path / 'resumen.csv'
+    escribir_csv(entrada, [[70, 1.75, 30, '', '', '', '', "Aspirina"]])
+    ejecutar_lote(str(entrada), str(salida))
+    with open(salida, newline='', encoding='utf-8') as f:
+        fila = next(csv.DictReader(f))
+    _, sol, _ = simular_dosis_multiples(construir_parametros(*COVARIABLES[0]), "Aspirina")
+    assert float(fila['cmax']) == pytest.approx(np.max(sol[:, 0]), rel=1e-6)
+
+
+@pytest.mark.parametrize('fila, mensaje', [
+    ([70, 1.75, 30, "Hombre", '', '', '', "Foo"], "Fila 1: medicamento 'Foo'"),
+    ([70, 1.75, 30, "Hombre", '', '', '', ''], "Fila 1: falta el medicamento"),
+    ([70, 1.75, 30, "Mujr", '', '', '', "Aspirina"], "Fila 1: genero 'Mujr'"),
+    ([70, 1.75, 30, "Hombre", "Gripe", '', '', "Aspirina"], "Fila 1: comorbilidad 'Gripe'"),
+    (['setenta', 1.75, 30, "Hombre", '', '', '', "Aspirina"], "Fila 1: masa, altura y edad"),
+])
+def test_filas_invalidas_terminan_con_error(tmp_path, capsys, fila, mensaje):
+    entrada, salida = tmp_path / 'pacientes.csv', tmp_path / 'resumen.csv'
+    escribir_csv(entrada, [list(COVARIABLES[0]) + ["Ibuprofeno"], fila])
+    assert main([str(entrada), str(salida)]) == 1
+    assert mensaje in capsys.readouterr().err
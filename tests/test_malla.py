@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import (TOLERANCIA_MALLA, seleccionar_puntos, simular_dosis_unica, simular_dosis_multiples,
+                             simular_cohorte)
+
+
+def test_los_obligatorios_cuentan_dentro_del_presupuesto():
+    t = np.linspace(0, 1, 1000)
+    indices = seleccionar_puntos(t, np.sin(20 * t), 10, obligatorios=range(1, 999, 3))
+    assert len(indices) == 10
+    assert indices[0] == 0 and indices[-1] == 999 and np.all(np.diff(indices) > 0)
+
+
+def test_presupuesto_menor_que_dos_se_rechaza():
+    with pytest.raises(ValueError):
+        seleccionar_puntos(np.linspace(0, 1, 10), np.zeros(10), 1)
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Paracetamol", "Loratadina"])
+@pytest.mark.parametrize('presupuesto', [150, 40])
+def test_malla_de_cohorte_no_supera_el_presupuesto(medicamento, presupuesto):
+    cohorte = simular_cohorte(medicamento, 300, puntos_por_ciclo=presupuesto, adaptativa=True)
+    assert cohorte.puntos_por_ciclo == len(cohorte.malla) <= presupuesto
+    assert cohorte.sol.shape == (300, 5 * cohorte.puntos_por_ciclo, 3)
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Metformina"])
+def test_dosis_unica_adaptativa_dentro_de_la_tolerancia(paciente, medicamento):
+    t_fino, sol_fina = simular_dosis_unica(paciente, medicamento, puntos=4000)
+    t, sol = simular_dosis_unica(paciente, medicamento, adaptativa=True)
+    assert len(t) <= 500
+    C = sol_fina[:, 0]
+    assert np.max(np.abs(np.interp(t_fino, t, sol[:, 0]) - C)) / np.max(C) < 2 * TOLERANCIA_MALLA
+    assert np.max(sol[:, 0]) == pytest.approx(np.max(C), rel=1e-3)
+
+
+def test_dosis_multiples_adaptativa_usa_menos_puntos(paciente):
+    t, sol, _ = simular_dosis_multiples(paciente, "Amoxicilina", puntos_por_ciclo=150, adaptativa=True)
+    assert len(t) % 5 == 0 and len(t) // 5 <= 150
+    assert len(t) < 5 * 150
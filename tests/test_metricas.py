@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import (calcular_metricas, tiempo_sobre_umbral, simular_dosis_unica, simular_dosis_multiples,
+                             simular_cohorte)
+
+
+def test_dosis_unica_igual_a_numpy(paciente):
+    t, sol = simular_dosis_unica(paciente, "Metformina")
+    C = sol[:, 0]
+    metricas = calcular_metricas(t, sol)
+    assert metricas['cmax'] == C.max() and metricas['tmax'] == t[np.argmax(C)]
+    assert metricas['auc'] == pytest.approx(np.trapezoid(C, t), rel=1e-12)
+    assert metricas['valle'] == C[-1]
+    assert metricas['razon_acumulacion'] == 1.0
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Amoxicilina", "Loratadina"])
+def test_ciclos_iguales_a_numpy(pacientes, medicamento):
+    for params in pacientes:
+        t, sol, _ = simular_dosis_multiples(params, medicamento, num_dosis=4, puntos_por_ciclo=60)
+        metricas = calcular_metricas(t, sol, 60)
+        bloques_t, bloques_C = t.reshape(4, 60), sol[:, 0].reshape(4, 60)
+        auc_ciclo = [np.trapezoid(C, tc) for tc, C in zip(bloques_t, bloques_C)]
+        np.testing.assert_allclose(metricas['auc_ciclo'], auc_ciclo, rtol=1e-12)
+        assert metricas['auc'] == pytest.approx(np.sum(auc_ciclo), rel=1e-12)
+        np.testing.assert_array_equal(metricas['valle_ciclo'], bloques_C[:, -1])
+        assert metricas['razon_acumulacion'] == pytest.approx(auc_ciclo[-1] / auc_ciclo[0])
+
+
+def test_cohorte_por_bloques_y_memmap(tmp_path):
+    cohorte = simular_cohorte("Paracetamol", 70, num_dosis=3, puntos_por_ciclo=30)
+    t = cohorte.t
+    completa = calcular_metricas(t, cohorte.sol, 30, umbrales=(1.0,))
+    por_bloques = calcular_metricas(t, cohorte.sol, 30, umbrales=(1.0,), tamano_bloque=16)
+    mapa = np.lib.format.open_memmap(str(tmp_path / "sol.npy"), mode='w+', dtype=float, shape=cohorte.sol.shape)
+    mapa[:] = cohorte.sol
+    desde_disco = calcular_metricas(t, mapa, 30, umbrales=(1.0,))
+    for clave in ('cmax', 'tmax', 'auc', 'auc_ciclo', 'valle_ciclo'):
+        np.testing.assert_array_equal(por_bloques[clave], completa[clave])
+        np.testing.assert_array_equal(desde_disco[clave], completa[clave])
+    for i in (0, 33, 69):
+        uno = calcular_metricas(t[i], cohorte.sol[i], 30, umbrales=(1.0,))
+        assert uno['auc'] == pytest.approx(completa['auc'][i], rel=1e-12)
+        assert uno['tiempo_sobre'][1.0] == pytest.approx(completa['tiempo_sobre'][1.0][i])
+    duracion = t[:, -1] - t[:, 0]
+    np.testing.assert_allclose(completa['tiempo_sobre'][1.0] + completa['tiempo_bajo'][1.0], duracion)
+
+
+def test_tiempo_sobre_umbral_con_cruces_interpolados():
+    t = np.array([0.0, 1.0, 2.0, 4.0, 5.0])
+    C = np.array([0.0, 2.0, 2.0, 0.0, 3.0])
+    # Por encima de 1: de 0.5 a 3 y de 4 + 1/3 a 5
+    assert tiempo_sobre_umbral(t, C, 1.0)[0] == pytest.approx(2.5 + 2 / 3)
+    fino = np.linspace(0, 5, 2_000_001)
+    assert tiempo_sobre_umbral(t, C, 1.0)[0] == pytest.approx(np.mean(np.interp(fino, t, C) > 1.0) * 5, abs=1e-5)
+    assert tiempo_sobre_umbral(t, C, 5.0)[0] == 0.0
+    assert tiempo_sobre_umbral(t, C + 10, 5.0)[0] == 5.0
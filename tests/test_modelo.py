@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import lista_medicamentos, ecuaciones, compilar_modelo
+
+ESTADOS = [(0.0, 100.0, 42.0, 0.0), (1.3, 55.0, 60.0, 3.7), (0.4, 0.8, 80.0, 40.0)]
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos + ["Desconocido"])
+@pytest.mark.parametrize('C, D, V, t', ESTADOS)
+def test_rhs_compilado_igual_a_ecuaciones(pacientes, medicamento, C, D, V, t):
+    y = np.array([C, D, V])
+    for p in pacientes:
+        rhs, _ = compilar_modelo(p, medicamento)
+        np.testing.assert_allclose(rhs(y, t), ecuaciones(y, t, p, medicamento), rtol=1e-13, atol=1e-15)
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+@pytest.mark.parametrize('C, D, V, t', ESTADOS)
+def test_jacobiano_igual_a_diferencias_finitas(pacientes, medicamento, C, D, V, t):
+    y = np.array([C, D, V])
+    for p in pacientes:
+        rhs, jac = compilar_modelo(p, medicamento)
+        numerico = np.empty((3, 3))
+        for j in range(3):
+            h = 1e-6 * max(abs(y[j]), 1.0)
+            arriba, abajo = y.copy(), y.copy()
+            arriba[j] += h
+            abajo[j] -= h
+            numerico[:, j] = (np.array(rhs(arriba, t)) - np.array(rhs(abajo, t))) / (2 * h)
+        np.testing.assert_allclose(jac(y, t), numerico, rtol=1e-6, atol=1e-8)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import (DISENOS, Cohorte, calcular_metricas, muestrear_covariables, muestrear_diseno,
+                             estimar_poblacion)
+from farmacocinetica.muestreo import NIVELES
+
+OPCIONES = dict(num_dosis=2, puntos_por_ciclo=30)
+
+
+@pytest.mark.parametrize('diseno', DISENOS)
+def test_mismo_formato_y_rangos_que_muestrear_covariables(diseno):
+    referencia = muestrear_covariables(np.random.default_rng(0), 256)
+    columnas = muestrear_diseno(np.random.default_rng(0), 256, diseno)
+    assert columnas.keys() == referencia.keys()
+    for clave, valor in columnas.items():
+        assert valor.shape == (256,) and valor.dtype == referencia[clave].dtype
+    assert np.all((50 <= columnas['masa']) & (columnas['masa'] < 100))
+    assert np.all((1.5 <= columnas['altura']) & (columnas['altura'] < 2.0))
+    assert np.all((18 <= columnas['edad']) & (columnas['edad'] <= 79)) and np.all(columnas['edad'] % 1 == 0)
+    for clave, niveles in NIVELES.items():
+        assert np.all((0 <= columnas[clave]) & (columnas[clave] < niveles))
+
+
+def test_lhs_cubre_cada_estrato_una_vez():
+    n = 240  # múltiplo de todos los niveles
+    columnas = muestrear_diseno(np.random.default_rng(1), n, 'lhs')
+    for clave, (minimo, ancho) in {'masa': (50, 50), 'altura': (1.5, 0.5)}.items():
+        estratos = np.floor((columnas[clave] - minimo) / ancho * n).astype(int)
+        np.testing.assert_array_equal(np.sort(estratos), np.arange(n))
+    for clave, niveles in NIVELES.items():
+        np.testing.assert_array_equal(np.bincount(columnas[clave], minlength=niveles), n // niveles)
+
+
+def test_sobol_equilibra_las_categorias_binarias():
+    columnas = muestrear_diseno(np.random.default_rng(2), 256, 'sobol')
+    for clave in ('genero', 'genetica', 'alergia'):
+        np.testing.assert_array_equal(np.bincount(columnas[clave]), 256 // NIVELES[clave])
+
+
+def test_estratificado_reparte_las_celdas_por_igual():
+    columnas = muestrear_diseno(np.random.default_rng(3), 1000, 'estratificado')
+    celdas = np.ravel_multi_index([columnas[c] for c in ('comorbilidad', 'genetica', 'alergia')], (6, 4, 4))
+    conteo = np.bincount(celdas, minlength=96)
+    assert conteo.min() == 1000 // 96 and conteo.max() == 1000 // 96 + 1
+    # Mezclado: la primera mitad ya cubre casi todas las celdas
+    assert len(np.unique(celdas[:500])) > 90
+
+
+def test_diseno_desconocido_y_replicas_insuficientes():
+    with pytest.raises(ValueError):
+        muestrear_diseno(np.random.default_rng(0), 10, 'otro')
+    with pytest.raises(ValueError):
+        estimar_poblacion("Ibuprofeno", 100, replicas=1)
+
+
+@pytest.mark.parametrize('diseno', ['aleatorio', 'lhs'])
+def test_intervalos_de_confianza_cubren_la_referencia(diseno):
+    referencia = Cohorte.desde_covariables(muestrear_diseno(np.random.default_rng(99), 20000, 'lhs'),
+                                           "Amoxicilina")
+    referencia.calcular_intervalos()
+    referencia.simular(**OPCIONES)
+    metricas = calcular_metricas(referencia.t, referencia.sol, OPCIONES['puntos_por_ciclo'])
+    resultado = estimar_poblacion("Amoxicilina", 2000, diseno, replicas=10, semilla=4, **OPCIONES)
+    for clave in ('cmax', 'auc'):
+        for nombre, exacto in (('media', metricas[clave].mean()), (0.5, np.median(metricas[clave]))):
+            r = resultado[clave][nombre]
+            assert r['error'] > 0 and r['inferior'] < r['estimacion'] < r['superior']
+            assert r['inferior'] <= exacto <= r['superior']
+
+
+def test_lhs_reduce_el_error_de_la_media():
+    errores = {diseno: estimar_poblacion("Amoxicilina", 2000, diseno, replicas=10, semilla=5,
+                                         **OPCIONES)['auc']['media']['error']
+               for diseno in ('aleatorio', 'lhs')}
+    assert errores['lhs'] < errores['aleatorio']
+
+
+def test_replicas_no_dependen_del_numero_de_procesos():
+    uno = estimar_poblacion("Loratadina", 512, 'sobol', replicas=2, n_procesos=1, **OPCIONES)
+    dos = estimar_poblacion("Loratadina", 512, 'sobol', replicas=2, n_procesos=2, **OPCIONES)
+    assert uno['cmax'][0.5] == dos['cmax'][0.5]
@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_el_nucleo_no_importa_la_interfaz():
+    codigo = ("import sys, farmacocinetica, farmacocinetica.lote, farmacocinetica.sensibilidad, "
+              "farmacocinetica.sustituto; "
+              "print(sorted(m for m in sys.modules if m.split('.')[0] in ('tkinter', 'matplotlib')))")
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == '[]'
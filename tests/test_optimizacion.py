@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from farmacocinetica import (construir_parametros, calcular_intervalo_dosificacion, simular_dosis_multiples,
+                             optimizar_regimen)
+from farmacocinetica.optimizacion import DOSIS_REFERENCIA
+
+PACIENTE_PESADO = (110, 1.75, 30, "Hombre", "Sin comorbilidad", "Metabolizador normal", "Sin alergia")
+
+
+def valle_pico(params, medicamento, dosis, intervalo, num_dosis, puntos_por_ciclo=50):
+    _, sol, _ = simular_dosis_multiples(params, medicamento, num_dosis, puntos_por_ciclo, intervalo, dosis)
+    C = sol[-puntos_por_ciclo:, 0]
+    return C.min(), C.max()
+
+
+# Metformina con dos dosis (el V_d inicial todavía pesa en V) y Paracetamol,
+# donde más dosis da menos C
+@pytest.mark.parametrize('medicamento, num_dosis', [("Metformina", 2), ("Paracetamol", 10)])
+def test_dosis_sensible_entra_en_la_ventana(medicamento, num_dosis):
+    params = construir_parametros(*PACIENTE_PESADO)
+    intervalo = calcular_intervalo_dosificacion(params, medicamento)
+    valle, pico = valle_pico(params, medicamento, 300, intervalo, num_dosis)
+    c_min, c_max = 0.9 * valle, 1.1 * pico
+    r = optimizar_regimen(params, medicamento, c_min, c_max, num_dosis=num_dosis)
+    assert r['sensible'] and r['dentro']
+    assert 10 < r['dosis'] < 2000
+    valle_r, pico_r = valle_pico(params, medicamento, r['dosis'], r['intervalo'], num_dosis)
+    np.testing.assert_allclose([valle_r, pico_r], [r['valle'], r['pico']], rtol=1e-5)
+    assert c_min <= valle_r and pico_r <= c_max
+
+
+@pytest.mark.parametrize('medicamento', ["Ibuprofeno", "Amoxicilina"])
+def test_dosis_insensible_conserva_la_dosis_inicial(paciente, medicamento):
+    intervalo_regla = calcular_intervalo_dosificacion(paciente, medicamento)
+    r = optimizar_regimen(paciente, medicamento, 0.5, 2.0)
+    candidatos = r['candidatos']
+    simulados = np.isfinite(candidatos['valle'])  # el intervalo de la regla no se simula si ya es candidato
+    assert not candidatos['sensible'][simulados].any()
+    np.testing.assert_allclose(candidatos['dosis'], DOSIS_REFERENCIA * candidatos['intervalo'] / intervalo_regla)
+    assert not r['sensible'] and 10 < r['dosis'] < 2000
+    # Una simulación inicial y una de prueba por candidato
+    assert r['rondas'] == 2 and r['simulaciones'] <= 2 * len(candidatos['dosis'])
+
+
+def test_la_dosis_no_mueve_c_en_los_modelos_insensibles(paciente):
+    intervalo = calcular_intervalo_dosificacion(paciente, "Ibuprofeno")
+    extremos = [valle_pico(paciente, "Ibuprofeno", dosis, intervalo, 10) for dosis in (10, 2000)]
+    np.testing.assert_allclose(extremos[0], extremos[1], rtol=1e-3)
+
+
+def test_ventana_invalida_se_rechaza(paciente):
+    with pytest.raises(ValueError):
+        optimizar_regimen(paciente, "Metformina", 2.0, 1.0)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from conftest import diferencia_relativa
+from farmacocinetica import (lista_generos, lista_comorbilidades, lista_genetica, lista_alergia,
+                             construir_parametros, simular_dosis_multiples, simular_poblacion_paralela)
+
+
+def test_resultado_no_depende_del_numero_de_procesos():
+    un_proceso = simular_poblacion_paralela("Paracetamol", 300, semilla=7, n_procesos=1, tamano_fragmento=64)
+    dos_procesos = simular_poblacion_paralela("Paracetamol", 300, semilla=7, n_procesos=2, tamano_fragmento=64)
+    covariables_1, t_1, sol_1, intervalos_1 = un_proceso
+    covariables_2, t_2, sol_2, intervalos_2 = dos_procesos
+    for clave in covariables_1:
+        np.testing.assert_array_equal(covariables_1[clave], covariables_2[clave])
+    np.testing.assert_array_equal(t_1, t_2)
+    np.testing.assert_array_equal(sol_1, sol_2)
+    np.testing.assert_array_equal(intervalos_1, intervalos_2)
+
+
+def test_semillas_distintas_dan_cohortes_distintas():
+    covariables_1, *_ = simular_poblacion_paralela("Paracetamol", 50, semilla=1, n_procesos=1)
+    covariables_2, *_ = simular_poblacion_paralela("Paracetamol", 50, semilla=2, n_procesos=1)
+    assert not np.array_equal(covariables_1['masa'], covariables_2['masa'])
+
+
+def test_fragmentos_coinciden_con_simulacion_escalar():
+    covariables, t, sol, intervalos = simular_poblacion_paralela("Metformina", 40, semilla=3, n_procesos=1,
+                                                                 tamano_fragmento=16)
+    for i in range(0, 40, 13):
+        params = construir_parametros(covariables['masa'][i], covariables['altura'][i], covariables['edad'][i],
+                                      lista_generos[covariables['genero'][i]],
+                                      lista_comorbilidades[covariables['comorbilidad'][i]],
+                                      lista_genetica[covariables['genetica'][i]],
+                                      lista_alergia[covariables['alergia'][i]])
+        t_i, sol_i, intervalo = simular_dosis_multiples(params, "Metformina")
+        assert intervalo == intervalos[i]
+        np.testing.assert_allclose(t[i], t_i, rtol=1e-12)
+        assert diferencia_relativa(sol[i], sol_i) < 1e-6
+
+
+def test_cohorte_vacia():
+    covariables, t, sol, intervalos = simular_poblacion_paralela("Aspirina", 0, num_dosis=3, puntos_por_ciclo=20)
+    completa, *_ = simular_poblacion_paralela("Aspirina", 5, n_procesos=1)
+    assert covariables.keys() == completa.keys()
+    for clave, valores in covariables.items():
+        assert valores.shape == (0,) and valores.dtype == completa[clave].dtype
+    assert t.shape == (0, 60) and sol.shape == (0, 60, 3) and intervalos.shape == (0,)
+    with pytest.raises(ValueError):
+        simular_poblacion_paralela("Aspirina", -1)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from conftest import diferencia_relativa
+from farmacocinetica import (lista_medicamentos, calcular_intervalo_dosificacion, parametros_a_arreglos,
+                             simular_dosis_multiples, simular_dosis_multiples_lote, simular_poblacion)
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+def test_lote_coincide_con_simulacion_escalar(pacientes, medicamento):
+    intervalos = [calcular_intervalo_dosificacion(p, medicamento) for p in pacientes]
+    t, sol = simular_dosis_multiples_lote(parametros_a_arreglos(pacientes, medicamento), intervalos)
+    for i, p in enumerate(pacientes):
+        t_i, sol_i, intervalo = simular_dosis_multiples(p, medicamento)
+        assert intervalo == intervalos[i]
+        np.testing.assert_allclose(t[i], t_i, rtol=1e-12)
+        assert diferencia_relativa(sol[i], sol_i) < 1e-6
+
+
+def test_lote_con_un_medicamento_y_una_dosis_por_paciente(pacientes):
+    medicamentos = lista_medicamentos[:len(pacientes)]
+    dosis = [100, 50, 200, 80]
+    intervalos = [calcular_intervalo_dosificacion(p, m) for p, m in zip(pacientes, medicamentos)]
+    _, sol = simular_dosis_multiples_lote(parametros_a_arreglos(pacientes, medicamentos), intervalos,
+                                          num_dosis=3, dosis=dosis, tamano_bloque=2)
+    for i, (p, m) in enumerate(zip(pacientes, medicamentos)):
+        _, sol_i, _ = simular_dosis_multiples(p, m, num_dosis=3, dosis=dosis[i])
+        assert diferencia_relativa(sol[i], sol_i) < 1e-6
+
+
+def test_salida_float32_reservada(pacientes):
+    intervalos = [calcular_intervalo_dosificacion(p, "Ibuprofeno") for p in pacientes]
+    arreglos = parametros_a_arreglos(pacientes, "Ibuprofeno")
+    _, sol = simular_dosis_multiples_lote(arreglos, intervalos)
+    salida = np.empty(sol.shape, dtype=np.float32)
+    _, sol32 = simular_dosis_multiples_lote(arreglos, intervalos, salida=salida)
+    assert sol32 is salida
+    np.testing.assert_allclose(sol32, sol, rtol=1e-6)
+
+
+def test_poblacion_vectorizada_igual_a_bucle():
+    pacientes_v, resultados_v = simular_poblacion("Amoxicilina", 8, vectorizado=True)
+    pacientes_e, resultados_e = simular_poblacion("Amoxicilina", 8, vectorizado=False)
+    assert pacientes_v == pacientes_e
+    for (t_v, sol_v, intervalo_v), (t_e, sol_e, intervalo_e) in zip(resultados_v, resultados_e):
+        assert intervalo_v == intervalo_e
+        np.testing.assert_allclose(t_v, t_e, rtol=1e-12)
+        assert diferencia_relativa(sol_v, sol_e) < 1e-6
@@ -0,0 +1,35 @@
+# Compara los caminos escalares con las referencias de benchmarks/referencias,
+# generadas con el modelo original de Simulaciones.py
+# (benchmarks/generar_referencias.py).
+import os
+
+import numpy as np
+import pytest
+
+from conftest import COVARIABLES, diferencia_relativa
+from farmacocinetica import (lista_medicamentos, construir_parametros, simular_dosis_unica,
+                             simular_dosis_multiples)
+
+REFERENCIAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'referencias')
+
+
+def cargar(nombre):
+    with np.load(os.path.join(REFERENCIAS, nombre + '.npz')) as datos:
+        return {clave: datos[clave] for clave in datos.files}
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+def test_dosis_unica_igual_al_modelo_original(medicamento):
+    referencia = cargar(f'dosis_unica__{medicamento}')
+    t, sol = simular_dosis_unica(construir_parametros(*COVARIABLES[0]), medicamento)
+    np.testing.assert_array_equal(t, referencia['t'])
+    assert diferencia_relativa(sol, referencia['sol']) < 1e-6
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+def test_dosis_multiples_igual_al_modelo_original(medicamento):
+    referencia = cargar(f'dosis_multiples__{medicamento}')
+    t, sol, intervalo = simular_dosis_multiples(construir_parametros(*COVARIABLES[0]), medicamento)
+    assert intervalo == referencia['intervalo'][0]
+    np.testing.assert_allclose(t, referencia['t'], rtol=1e-12)
+    assert diferencia_relativa(sol, referencia['sol']) < 1e-6
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from conftest import referencia_odeint, diferencia_relativa
+from farmacocinetica import lista_medicamentos, simular_dosis_multiples, simular_regimen
+
+TIEMPOS_IRREGULARES = [0, 5, 7, 20, 31]
+DOSIS_IRREGULARES = [100, 50, 80, 100, 60]
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+def test_dosis_multiples_es_un_regimen_regular(paciente, medicamento):
+    t, sol, intervalo = simular_dosis_multiples(paciente, medicamento)
+    t_regimen, sol_regimen = simular_regimen(paciente, medicamento, np.arange(5) * intervalo, t_final=5 * intervalo)
+    np.testing.assert_allclose(t_regimen, t, rtol=1e-12)
+    np.testing.assert_array_equal(sol_regimen, sol)
+
+
+@pytest.mark.parametrize('medicamento', lista_medicamentos)
+def test_dosis_irregulares_igual_a_odeint_estricto(paciente, medicamento):
+    t_eval = np.linspace(0, 50, 201)
+    if medicamento == "Aspirina":
+        # odeint lleva D a valores negativos una vez agotado el depósito
+        t_eval = t_eval[t_eval <= 40]
+    _, sol = simular_regimen(paciente, medicamento, TIEMPOS_IRREGULARES, DOSIS_IRREGULARES, t_final=t_eval[-1],
+                             t_eval=t_eval)
+    referencia = referencia_odeint(paciente, medicamento, t_eval, TIEMPOS_IRREGULARES, DOSIS_IRREGULARES)
+    assert diferencia_relativa(sol, referencia) < 1e-6
+
+
+def test_en_un_instante_de_dosis_se_informa_el_estado_posterior(paciente):
+    _, sol = simular_regimen(paciente, "Ibuprofeno", [0, 12], dosis=[100, 40], t_eval=[12])
+    _, sol_previa = simular_regimen(paciente, "Ibuprofeno", [0], t_final=12, t_eval=[12])
+    np.testing.assert_allclose(sol[0, 1], sol_previa[0, 1] + 40)
+
+
+@pytest.mark.parametrize('opciones', [{'t_final': 10}, {'t_eval': [-1, 5]}, {'t_eval': [5, 100]}],
+                         ids=['t_final antes de la última dosis', 't_eval antes de la primera',
+                              't_eval después de t_final'])
+def test_tiempos_fuera_del_regimen_se_rechazan(paciente, opciones):
+    with pytest.raises(ValueError):
+        simular_regimen(paciente, "Ibuprofeno", [0, 12], **opciones)
+
+
+def test_tiempos_de_dosis_no_crecientes_se_rechazan(paciente):
+    with pytest.raises(ValueError):
+        simular_regimen(paciente, "Ibuprofeno", [0, 12, 12])
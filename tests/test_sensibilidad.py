@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy.stats import qmc
+
+from farmacocinetica.muestreo import COVARIABLES
+from farmacocinetica.sensibilidad import SALIDAS, _indices_sobol, analisis_sobol, analisis_morris, main
+
+OPCIONES = dict(num_dosis=2, puntos_por_ciclo=20)
+# Covariables que no entran en la regla del intervalo de Ibuprofeno
+SIN_EFECTO_INTERVALO = ('altura', 'edad', 'genero', 'alergia')
+
+
+def test_indices_de_una_funcion_aditiva():
+    # f = Σ a_i u_i con u_i ~ U(0, 1): S1_i = ST_i = a_i² / Σ a_j²
+    a = np.array([1.0, 2.0, 0.0, 4.0])
+    d = len(a)
+    base = qmc.Sobol(2 * d, scramble=True, seed=0).random_base2(14)
+    A, B = base[:, :d], base[:, d:]
+    AB = np.repeat(A[None], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    S1, ST = _indices_sobol((A @ a)[:, None], (B @ a)[:, None], (AB @ a)[..., None])
+    exacto = a ** 2 / np.sum(a ** 2)
+    np.testing.assert_allclose(S1[:, 0], exacto, atol=0.01)
+    np.testing.assert_allclose(ST[:, 0], exacto, atol=0.01)
+    assert S1[2, 0] == 0 and ST[2, 0] == 0
+
+
+def test_sobol_de_la_regla_del_intervalo():
+    resultado = analisis_sobol("Ibuprofeno", n_base=64, semilla=1, remuestreos=50, **OPCIONES)
+    assert resultado['factores'] == COVARIABLES
+    assert resultado['simulaciones'] < 64 * (len(COVARIABLES) + 2)  # filas repetidas de AB_i no se simulan
+    intervalo = resultado['intervalo']
+    for factor in SIN_EFECTO_INTERVALO:
+        i = COVARIABLES.index(factor)
+        assert intervalo['S1'][i] == 0 and intervalo['ST'][i] == 0
+    genetica = COVARIABLES.index('genetica')
+    assert intervalo['ST'][genetica] > 0.3
+    assert intervalo['ST_inferior'][genetica] <= intervalo['ST'][genetica] <= intervalo['ST_superior'][genetica]
+    for salida in SALIDAS:
+        assert resultado[salida]['S1'].shape == (len(COVARIABLES),)
+
+
+def test_morris_de_la_regla_del_intervalo():
+    resultado = analisis_morris("Loratadina", trayectorias=30, semilla=2, **OPCIONES)
+    assert resultado['simulaciones'] == 30 * (len(COVARIABLES) + 1)
+    mu_estrella = dict(zip(COVARIABLES, resultado['intervalo']['mu_estrella']))
+    for factor in ('altura', 'edad', 'genero', 'comorbilidad'):
+        assert mu_estrella[factor] == 0
+    assert mu_estrella['alergia'] > 0 and mu_estrella['genetica'] > 0
+
+
+def test_linea_de_comandos(capsys):
+    assert main(["Metformina", "--metodo", "morris", "-n", "4", "--num-dosis", "1", "--puntos-por-ciclo", "10"]) == 0
+    salida = capsys.readouterr().out
+    assert "Metformina: 32 simulaciones" in salida and "mu_estrella" in salida
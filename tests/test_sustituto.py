@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pytest
+
+from farmacocinetica import Cohorte, calcular_metricas, muestrear_covariables
+from farmacocinetica.sustituto import SALIDAS, Sustituto, entrenar_sustituto
+
+OPCIONES = dict(num_dosis=2, puntos_por_ciclo=30)
+
+
+@pytest.fixture(scope='module')
+def sustituto():
+    return entrenar_sustituto("Ibuprofeno", n_validacion=200, **OPCIONES)
+
+
+def simular(covariables, medicamento="Ibuprofeno"):
+    cohorte = Cohorte.desde_covariables(covariables, medicamento)
+    cohorte.calcular_intervalos()
+    cohorte.simular(**OPCIONES)
+    metricas = calcular_metricas(cohorte.t, cohorte.sol, OPCIONES['puntos_por_ciclo'])
+    return cohorte, metricas
+
+
+def test_error_en_pacientes_nuevos_dentro_de_la_cota(sustituto):
+    cohorte, metricas = simular(muestrear_covariables(np.random.default_rng(7), 300))
+    prediccion = sustituto.predecir(cohorte, curvas=True)
+    assert not prediccion['exacto'].any()
+    np.testing.assert_array_equal(prediccion['intervalo'], cohorte.intervalos)
+    np.testing.assert_array_equal(prediccion['t'], cohorte.t)
+    for salida in SALIDAS:
+        error = np.abs(prediccion[salida] - metricas[salida]) / np.abs(metricas[salida])
+        assert np.max(error) < 0.02
+        assert np.quantile(error, 0.99) < 2 * sustituto.error[salida]['p99'] + 1e-6
+    C = cohorte.sol[:, :, 0]
+    error_curva = np.max(np.abs(prediccion['C'] - C), axis=1) / np.max(C, axis=1)
+    assert np.max(error_curva) < 0.02
+
+
+def test_fuera_del_dominio_se_simula(sustituto):
+    covariables = muestrear_covariables(np.random.default_rng(8), 6)
+    covariables['masa'][0] = 130.0
+    covariables['edad'][1] = 5.0
+    covariables['altura'][2] = 1.2
+    covariables['genetica'][3] = -1
+    cohorte, metricas = simular(covariables)
+    prediccion = sustituto.predecir(cohorte, curvas=True)
+    np.testing.assert_array_equal(prediccion['exacto'], [True, True, True, True, False, False])
+    for salida in SALIDAS:
+        np.testing.assert_array_equal(prediccion[salida][:4], metricas[salida][:4])
+    np.testing.assert_array_equal(prediccion['C'][:4], cohorte.sol[:4, :, 0].astype(np.float32))
+
+
+def test_otro_medicamento_se_rechaza(sustituto):
+    with pytest.raises(ValueError):
+        sustituto.predecir(Cohorte.desde_covariables(muestrear_covariables(np.random.default_rng(0), 3),
+                                                     "Loratadina"))
+
+
+def test_guardar_y_cargar(sustituto, tmp_path):
+    ruta = str(tmp_path / "ibuprofeno.npz")
+    sustituto.guardar(ruta)
+    cargado = Sustituto.cargar(ruta)
+    assert cargado.metadatos == sustituto.metadatos
+    for clave in ('grupo', 'tramos', 'metricas', 'curvas'):
+        np.testing.assert_array_equal(getattr(cargado, clave), getattr(sustituto, clave))
+    cohorte = Cohorte.desde_covariables(muestrear_covariables(np.random.default_rng(9), 50), "Ibuprofeno")
+    a, b = sustituto.predecir(cohorte, curvas=True), cargado.predecir(cohorte, curvas=True)
+    for clave in SALIDAS + ('C',):
+        np.testing.assert_array_equal(a[clave], b[clave])
+
+
+def test_version_distinta_se_rechaza(sustituto, tmp_path):
+    ruta = str(tmp_path / "viejo.npz")
+    metadatos = dict(sustituto.metadatos, version=0)
+    Sustituto(metadatos, sustituto.grupo, sustituto.tramos, sustituto.metricas, sustituto.curvas).guardar(ruta)
+    with pytest.raises(ValueError):
+        Sustituto.cargar(ruta)
+    assert json.loads(str(np.load(ruta)['metadatos']))['version'] == 0
+
+
+def test_alergia_solo_separa_grupos_en_loratadina(sustituto):
+    loratadina = entrenar_sustituto("Loratadina", nodos={'masa': 2, 'altura': 2, 'edad': 2}, n_validacion=0,
+                                    **OPCIONES)
+    assert loratadina.error is None
+    # grupo tiene forma (género, comorbilidad, genética, alergia)
+    assert len(np.unique(loratadina.grupo[0, 0, 0])) == 4
+    assert np.all(sustituto.grupo == sustituto.grupo[..., :1])